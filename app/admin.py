@@ -0,0 +1,79 @@
+from fastapi import FastAPI, Request, Depends, HTTPException
+from fastapi.responses import FileResponse
+from bson.errors import InvalidId
+import hmac
+import logging
+
+from app.config import settings
+from app.api import FastJSONResponse
+from app.scheduler import scheduler
+from app.profiling import profile_store
+from app.sessions import session_registry
+
+logger = logging.getLogger(__name__)
+
+ADMIN_PREFIX = "/admin"
+
+async def require_admin(request: Request):
+    """Requiere el header X-Admin-Token; sin ADMIN_TOKEN configurado los endpoints no existen"""
+    if not settings.admin_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    token = request.headers.get("x-admin-token", "")
+    if not hmac.compare_digest(token.encode(), settings.admin_token.encode()):
+        raise HTTPException(status_code=403, detail="Token de administración inválido")
+
+def create_admin_routes(app: FastAPI):
+    """Registra los endpoints de administración y diagnóstico"""
+
+    @app.get(f"{ADMIN_PREFIX}/scheduler", dependencies=[Depends(require_admin)])
+    async def admin_scheduler():
+        """Métricas de las tareas programadas en este worker y estado compartido de sus slots"""
+        return FastJSONResponse(scheduler.metrics())
+
+    @app.post(f"{ADMIN_PREFIX}/scheduler/{{job_name}}/run", dependencies=[Depends(require_admin)])
+    async def admin_run_job(job_name: str):
+        """Ejecuta una tarea inmediatamente en este worker"""
+        if job_name not in scheduler.jobs:
+            raise HTTPException(status_code=404, detail="Tarea no encontrada")
+        try:
+            result = await scheduler.run_now(job_name)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"La tarea falló: {e}")
+        logger.info(f"Tarea {job_name} ejecutada manualmente")
+        return FastJSONResponse({"job": job_name, "result": result, "duration_ms": scheduler.jobs[job_name].last_ms})
+
+    @app.get(f"{ADMIN_PREFIX}/profiles", dependencies=[Depends(require_admin)])
+    async def admin_profiles():
+        """Perfiles guardados, del más reciente al más antiguo"""
+        return FastJSONResponse({"data": profile_store.list()})
+
+    @app.get(f"{ADMIN_PREFIX}/profiles/{{profile_id}}.folded", dependencies=[Depends(require_admin)])
+    async def admin_profile_folded(profile_id: str):
+        """Descarga los stacks en formato folded (flamegraph.pl, speedscope)"""
+        path = profile_store.path(profile_id, ".folded")
+        if not path:
+            raise HTTPException(status_code=404, detail="Perfil no encontrado")
+        return FileResponse(path, media_type="text/plain", filename=f"{profile_id}.folded")
+
+    @app.get(f"{ADMIN_PREFIX}/profiles/{{profile_id}}", dependencies=[Depends(require_admin)])
+    async def admin_profile(profile_id: str):
+        """Metadatos y reparto del tiempo de un perfil"""
+        path = profile_store.path(profile_id, ".json")
+        if not path:
+            raise HTTPException(status_code=404, detail="Perfil no encontrado")
+        return FileResponse(path, media_type="application/json")
+
+    @app.post(f"{ADMIN_PREFIX}/users/{{user_id}}/sessions/revoke", dependencies=[Depends(require_admin)])
+    async def admin_revoke_sessions(user_id: str, deactivate: bool = False):
+        """Invalida todas las sesiones del usuario (y opcionalmente lo desactiva)"""
+        try:
+            version = session_registry.revoke_user(user_id, deactivate=deactivate)
+        except (ValueError, InvalidId):
+            raise HTTPException(status_code=404, detail="Usuario no encontrado")
+        return FastJSONResponse({
+            "user_id": user_id,
+            "session_version": version,
+            "deactivated": deactivate,
+            # Los demás workers lo aplican en su próxima sincronización
+            "max_delay_s": settings.session_sync_interval
+        })
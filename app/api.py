@@ -0,0 +1,408 @@
+from fastapi import FastAPI, Request, Depends, HTTPException, status
+from fastapi.responses import JSONResponse, Response
+from datetime import datetime
+from bson import ObjectId
+from bson.errors import InvalidId
+from pydantic import BaseModel
+from typing import Optional, Dict, Any
+import base64
+import json
+import logging
+
+from app.config import settings, TRANSACTION_TYPES, COMMON_CATEGORIES
+from app.database import get_database, get_read_database
+from app.models import (
+    Transaction, TransactionAPICreate, TransactionPatch, TransactionFilter,
+    BulkSelection, BulkOperations, User
+)
+from app.auth import auth_manager, get_current_user
+from app import transactions as transaction_store
+from app.recurring import get_recurring
+from app.rate_limit import login_rate_limiter
+from app.sync import get_changes, SyncTokenError, SyncPending
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson es opcional
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+API_PREFIX = "/api/v1"
+
+# Campos que se pueden pedir con ?fields= (además de id, que siempre se incluye)
+API_FIELDS = {
+    "amount", "type", "category", "description", "date", "origin",
+    "validated", "metadata", "created_at", "updated_at"
+}
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+MAX_SYNC_PAGE_SIZE = 500
+
+def _json_default(value):
+    """Convierte tipos de BSON que el encoder JSON no conoce"""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Tipo no serializable: {type(value).__name__}")
+
+class FastJSONResponse(JSONResponse):
+    """Respuesta JSON serializada con orjson (si está instalado) directamente desde documentos BSON"""
+
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, default=_json_default, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(content, default=_json_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+class SessionRequest(BaseModel):
+    username: str
+    password: str
+
+def serialize_transaction(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Adapta un documento de MongoDB a la representación de la API (sin pasar por Pydantic).
+    Solo expone API_FIELDS: los campos internos (user_id, sync_version, merchant_key...) no salen
+    """
+    serialized = {"id": doc["_id"]}
+    serialized.update((field, value) for field, value in doc.items() if field in API_FIELDS)
+    return serialized
+
+def parse_fields(fields: Optional[str]) -> Optional[Dict[str, int]]:
+    """Convierte ?fields=a,b en una proyección de MongoDB"""
+    if not fields:
+        return None
+    requested = {f.strip() for f in fields.split(",") if f.strip()}
+    unknown = requested - API_FIELDS
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Campos no válidos: {', '.join(sorted(unknown))}")
+    # La fecha se necesita siempre para construir el cursor
+    return {field: 1 for field in requested | {"date"}}
+
+def encode_cursor(doc: Dict[str, Any]) -> str:
+    """Cursor opaco con la clave (date, _id) del último elemento entregado"""
+    raw = json.dumps({"d": doc["date"].isoformat(), "i": str(doc["_id"])}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """Convierte un cursor opaco en el filtro keyset para la siguiente página"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        last_date = datetime.fromisoformat(data["d"])
+        last_id = ObjectId(data["i"])
+    except (ValueError, KeyError, TypeError, InvalidId):
+        raise HTTPException(status_code=400, detail="Cursor no válido")
+    return {"$or": [
+        {"date": {"$lt": last_date}},
+        {"date": last_date, "_id": {"$lt": last_id}}
+    ]}
+
+def build_transaction_query(user_id: str, filters: TransactionFilter) -> Dict[str, Any]:
+    """Construye el filtro de MongoDB para las transacciones del usuario"""
+    query: Dict[str, Any] = {"user_id": ObjectId(str(user_id))}
+    if filters.type:
+        query["type"] = filters.type
+    if filters.category:
+        query["category"] = filters.category
+    if filters.origin:
+        query["origin"] = filters.origin
+    if filters.validated is not None:
+        query["validated"] = filters.validated
+    if filters.date_from or filters.date_to:
+        query["date"] = {}
+        if filters.date_from:
+            query["date"]["$gte"] = filters.date_from
+        if filters.date_to:
+            query["date"]["$lt"] = filters.date_to
+    return query
+
+def selection_query(user_id: str, selection: BulkSelection) -> Dict[str, Any]:
+    """Convierte una selección (ids o filtro) en un filtro de MongoDB"""
+    if selection.ids:
+        if not all(ObjectId.is_valid(i) for i in selection.ids):
+            raise HTTPException(status_code=400, detail="Ids no válidos")
+        return {"user_id": ObjectId(str(user_id)), "_id": {"$in": [ObjectId(i) for i in selection.ids]}}
+    if selection.filter:
+        query = build_transaction_query(user_id, selection.filter)
+        # Un filtro sin criterios seleccionaría todas las transacciones del usuario
+        if len(query) > 1:
+            return query
+    raise HTTPException(status_code=422, detail="Se requiere una lista de ids o un filtro con al menos un criterio")
+
+def validate_category(category: Optional[str]) -> str:
+    if category not in COMMON_CATEGORIES:
+        raise HTTPException(status_code=400, detail="Categoría no válida")
+    return category
+
+def parse_object_id(transaction_id: str) -> ObjectId:
+    if not ObjectId.is_valid(transaction_id):
+        raise HTTPException(status_code=404, detail="Transacción no encontrada")
+    return ObjectId(transaction_id)
+
+async def require_api_user(request: Request) -> User:
+    """Autentica con la cookie de sesión o con un header Authorization: Bearer <token>"""
+    token = request.cookies.get("session_token")
+    authorization = request.headers.get("authorization", "")
+    if authorization.lower().startswith("bearer "):
+        token = authorization[7:].strip()
+
+    user = get_current_user(token) if token else None
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="No autenticado",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    return user
+
+def create_api_routes(app: FastAPI):
+    """Crea las rutas de la API JSON de transacciones"""
+
+    @app.post(f"{API_PREFIX}/session")
+    async def api_create_session(payload: SessionRequest, request: Request):
+        """Obtiene un token de sesión para clientes sin cookies (app móvil)"""
+        client_ip = request.client.host if request.client else None
+        retry_after = login_rate_limiter.check(payload.username, client_ip)
+        if retry_after:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Demasiados intentos de login",
+                headers={"Retry-After": str(retry_after)}
+            )
+        user = auth_manager.authenticate_user(payload.username, payload.password)
+        if not user:
+            login_rate_limiter.record_failure(payload.username, client_ip)
+            raise HTTPException(status_code=401, detail="Usuario o contraseña incorrectos")
+        login_rate_limiter.reset(payload.username)
+        return FastJSONResponse({
+            "token": auth_manager.create_session_token(str(user.id), user),
+            "expires_in": settings.session_expires_hours * 3600
+        })
+
+    @app.get(f"{API_PREFIX}/transactions")
+    async def api_list_transactions(
+        fields: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        type: Optional[str] = None,
+        category: Optional[str] = None,
+        origin: Optional[str] = None,
+        validated: Optional[bool] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        user: User = Depends(require_api_user)
+    ):
+        """
+        Lista transacciones con proyección de campos, filtros y paginación por cursor.
+        Es la lectura de exportación: va según READ_PREFERENCE (puede atrasarse hasta
+        READ_MAX_STALENESS segundos); /sync siempre lee del primario
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        query = build_transaction_query(user.id, TransactionFilter(
+            type=type,
+            category=category,
+            origin=origin,
+            validated=validated,
+            date_from=date_from,
+            date_to=date_to
+        ))
+        if cursor:
+            query.update(decode_cursor(cursor))
+
+        db = get_read_database()
+        # Se pide un elemento extra para saber si hay otra página
+        docs = list(
+            db.transactions.find(query, parse_fields(fields))
+            .sort([("date", -1), ("_id", -1)])
+            .limit(limit + 1)
+        )
+        has_more = len(docs) > limit
+        docs = docs[:limit]
+        next_cursor = encode_cursor(docs[-1]) if has_more else None
+
+        return FastJSONResponse({
+            "data": [serialize_transaction(doc) for doc in docs],
+            "next_cursor": next_cursor
+        })
+
+    @app.get(f"{API_PREFIX}/transactions/{{transaction_id}}")
+    async def api_get_transaction(
+        transaction_id: str,
+        fields: Optional[str] = None,
+        user: User = Depends(require_api_user)
+    ):
+        """Obtiene una transacción"""
+        db = get_database()
+        doc = db.transactions.find_one(
+            {"_id": parse_object_id(transaction_id), "user_id": ObjectId(str(user.id))},
+            parse_fields(fields)
+        )
+        if not doc:
+            raise HTTPException(status_code=404, detail="Transacción no encontrada")
+        return FastJSONResponse(serialize_transaction(doc))
+
+    @app.post(f"{API_PREFIX}/transactions", status_code=201)
+    async def api_create_transaction(
+        payload: TransactionAPICreate,
+        user: User = Depends(require_api_user)
+    ):
+        """Crea una transacción"""
+        if payload.type not in TRANSACTION_TYPES:
+            raise HTTPException(status_code=400, detail="Tipo de transacción inválido")
+        if payload.category is not None:
+            validate_category(payload.category)
+
+        transaction = Transaction(
+            user_id=str(user.id),
+            amount=payload.amount,
+            type=payload.type,
+            category=payload.category,
+            description=payload.description,
+            date=payload.date or datetime.utcnow(),
+            origin=payload.origin,
+            validated=payload.validated,
+            metadata=payload.metadata
+        )
+        document = transaction.model_dump(by_alias=True)
+        transaction_store.insert_transaction(get_database(), document)
+        logger.info(f"Transacción creada vía API: {document['_id']} por usuario {user.username}")
+        return FastJSONResponse(serialize_transaction(document), status_code=201)
+
+    @app.patch(f"{API_PREFIX}/transactions/{{transaction_id}}")
+    async def api_update_transaction(
+        transaction_id: str,
+        payload: TransactionPatch,
+        user: User = Depends(require_api_user)
+    ):
+        """Actualiza parcialmente una transacción"""
+        parse_object_id(transaction_id)
+        changes = payload.model_dump(exclude_unset=True)
+        if not changes:
+            raise HTTPException(status_code=400, detail="No hay cambios")
+        if "type" in changes and changes["type"] not in TRANSACTION_TYPES:
+            raise HTTPException(status_code=400, detail="Tipo de transacción inválido")
+        if changes.get("category") is not None:
+            validate_category(changes["category"])
+        changes["updated_at"] = datetime.utcnow()
+
+        previous = transaction_store.update_transaction(get_database(), user.id, transaction_id, changes)
+        if not previous:
+            raise HTTPException(status_code=404, detail="Transacción no encontrada")
+        return FastJSONResponse(serialize_transaction({**previous, **changes}))
+
+    @app.delete(f"{API_PREFIX}/transactions/{{transaction_id}}", status_code=204)
+    async def api_delete_transaction(
+        transaction_id: str,
+        user: User = Depends(require_api_user)
+    ):
+        """Elimina una transacción"""
+        parse_object_id(transaction_id)
+        if not transaction_store.delete_transaction(get_database(), user.id, transaction_id):
+            raise HTTPException(status_code=404, detail="Transacción no encontrada")
+        return Response(status_code=204)
+
+    # Operaciones masivas: una sola escritura en MongoDB por petición
+
+    @app.post(f"{API_PREFIX}/transactions/bulk/validate")
+    async def api_bulk_validate(
+        selection: BulkSelection,
+        user: User = Depends(require_api_user)
+    ):
+        """Valida todos los gastos seleccionados"""
+        query = {**selection_query(user.id, selection), "type": "gasto"}
+        counts = transaction_store.update_many_transactions(get_database(), user.id, query, {"validated": True})
+        logger.info(f"Validación masiva: {counts['modified']} transacciones por usuario {user.username}")
+        return FastJSONResponse(counts)
+
+    @app.post(f"{API_PREFIX}/transactions/bulk/recategorize")
+    async def api_bulk_recategorize(
+        selection: BulkSelection,
+        user: User = Depends(require_api_user)
+    ):
+        """Cambia la categoría de todas las transacciones seleccionadas"""
+        category = validate_category(selection.category)
+        counts = transaction_store.update_many_transactions(
+            get_database(), user.id, selection_query(user.id, selection), {"category": category}
+        )
+        logger.info(f"Recategorización masiva a {category}: {counts['modified']} transacciones por usuario {user.username}")
+        return FastJSONResponse(counts)
+
+    @app.post(f"{API_PREFIX}/transactions/bulk/delete")
+    async def api_bulk_delete(
+        selection: BulkSelection,
+        user: User = Depends(require_api_user)
+    ):
+        """Elimina todas las transacciones seleccionadas"""
+        counts = transaction_store.delete_many_transactions(
+            get_database(), user.id, selection_query(user.id, selection)
+        )
+        logger.info(f"Eliminación masiva: {counts['deleted']} transacciones por usuario {user.username}")
+        return FastJSONResponse(counts)
+
+    @app.post(f"{API_PREFIX}/transactions/bulk")
+    async def api_bulk_operations(
+        payload: BulkOperations,
+        user: User = Depends(require_api_user)
+    ):
+        """Ejecuta una lista ordenada de operaciones distintas en un solo bulk_write"""
+        operations = []
+        for operation in payload.operations:
+            if not ObjectId.is_valid(operation.id):
+                raise HTTPException(status_code=400, detail=f"Id no válido: {operation.id}")
+            if operation.action == "delete":
+                operations.append({"id": operation.id, "delete": True})
+            elif operation.action == "validate":
+                operations.append({"id": operation.id, "set": {"validated": True}, "filter": {"type": "gasto"}})
+            else:
+                operations.append({"id": operation.id, "set": {"category": validate_category(operation.category)}})
+
+        counts = transaction_store.bulk_write_transactions(get_database(), user.id, operations)
+        return FastJSONResponse(counts)
+
+    @app.get(f"{API_PREFIX}/recurring")
+    async def api_list_recurring(
+        active: bool = True,
+        user: User = Depends(require_api_user)
+    ):
+        """Cobros recurrentes detectados (materializados por el job de app/recurring.py)"""
+        docs = get_recurring(get_read_database(), user.id, active_only=active)
+        return FastJSONResponse({
+            "data": [
+                {key: value for key, value in doc.items() if key not in ("_id", "user_id", "run_id")}
+                for doc in docs
+            ]
+        })
+
+    @app.get(f"{API_PREFIX}/sync")
+    async def api_sync(
+        since: Optional[str] = None,
+        fields: Optional[str] = None,
+        limit: int = MAX_SYNC_PAGE_SIZE,
+        user: User = Depends(require_api_user)
+    ):
+        """
+        Cambios desde el token since (ver app/sync.py). Sin token o con reset=true el
+        cliente debe reemplazar su copia local; con has_more=true repite con next
+        """
+        limit = max(1, min(limit, MAX_SYNC_PAGE_SIZE))
+        try:
+            changes = get_changes(get_database(), user.id, since, limit, parse_fields(fields))
+        except SyncTokenError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except SyncPending:
+            raise HTTPException(
+                status_code=503,
+                detail="Hay cambios en curso, reintenta en un momento",
+                headers={"Retry-After": "1"}
+            )
+        return FastJSONResponse({
+            "data": {
+                "upserts": [serialize_transaction(doc) for doc in changes["upserts"]],
+                "deletes": changes["deletes"]
+            },
+            "next": changes["next"],
+            "has_more": changes["has_more"],
+            "reset": changes["reset"]
+        })
@@ -1,11 +1,13 @@
 import bcrypt
+import uuid
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Dict, Any
 from bson import ObjectId
 from itsdangerous import URLSafeTimedSerializer
 from app.config import settings
 from app.database import get_database
 from app.models import User
+from app.sessions import session_registry
 import logging
 
 logger = logging.getLogger(__name__)
@@ -35,8 +37,6 @@ class AuthManager:
         try:
             # Buscar usuario por username
             user_doc = self.db.users.find_one({"username": username, "is_active": True})
-            for user_doc in self.db.users.find():
-                logger.info(user_doc)
             
             if not user_doc:
                 logger.info(f"Usuario no encontrado: {username}")
@@ -56,32 +56,58 @@ class AuthManager:
             logger.error(f"Error en autenticación: {e}")
             return None
     
-    def create_session_token(self, user_id: str) -> str:
+    def create_session_token(self, user_id: str, user: Optional[User] = None) -> str:
         """Crea un token de sesión seguro"""
         data = {
             "user_id": user_id,
             "created_at": datetime.utcnow().isoformat(),
             "expires_at": (datetime.utcnow() + timedelta(hours=settings.session_expires_hours)).isoformat()
         }
+        if settings.session_mode == "stateless":
+            # Foto del usuario y versión de sesión: los requests se autentican sin consultar MongoDB
+            user = user or self.get_user_by_id(user_id)
+            data.update({
+                "jti": uuid.uuid4().hex,
+                "sv": user.session_version,
+                "user": {"username": user.username, "email": user.email, "created_at": user.created_at.isoformat()}
+            })
         return self.serializer.dumps(data)
     
-    def verify_session_token(self, token: str) -> Optional[str]:
-        """Verifica un token de sesión y retorna el user_id si es válido"""
+    def load_session_token(self, token: str) -> Optional[Dict[str, Any]]:
+        """Verifica la firma y la expiración del token y retorna su contenido"""
         try:
             # Verificar token (incluye verificación de tiempo)
             data = self.serializer.loads(
                 token, 
                 max_age=settings.session_expires_hours * 3600  # en segundos
             )
-            
-            user_id = data.get("user_id")
             expires_at = datetime.fromisoformat(data.get("expires_at"))
             
             # Verificar que no haya expirado
             if datetime.utcnow() > expires_at:
                 logger.info("Token de sesión expirado")
                 return None
+            return data
             
+        except Exception as e:
+            logger.error(f"Error verificando token de sesión: {e}")
+            return None
+    
+    def _stateless_valid(self, data: Dict[str, Any]) -> bool:
+        """Token con foto del usuario, validado contra la tabla de sesiones en memoria"""
+        return "user" in data and session_registry.is_valid(data["user_id"], data.get("sv", 0), data.get("jti"))
+    
+    def verify_session_token(self, token: str) -> Optional[str]:
+        """Verifica un token de sesión y retorna el user_id si es válido"""
+        data = self.load_session_token(token)
+        if not data:
+            return None
+        user_id = data.get("user_id")
+        
+        if settings.session_mode == "stateless":
+            return user_id if self._stateless_valid(data) else None
+        
+        try:
             # Verificar que el usuario aún existe y está activo
             user_doc = self.db.users.find_one({
                 "_id": ObjectId(user_id),
@@ -98,6 +124,32 @@ class AuthManager:
             logger.error(f"Error verificando token de sesión: {e}")
             return None
     
+    def get_user_from_token(self, token: str) -> Optional[User]:
+        """Obtiene el usuario de un token; en modo stateless se arma desde la foto del token"""
+        if settings.session_mode != "stateless":
+            user_id = self.verify_session_token(token)
+            return self.get_user_by_id(user_id) if user_id else None
+        
+        data = self.load_session_token(token)
+        if not data or not self._stateless_valid(data):
+            return None
+        snapshot = data["user"]
+        return User.model_construct(
+            id=data["user_id"],
+            username=snapshot["username"],
+            email=snapshot["email"],
+            password_hash="",
+            created_at=datetime.fromisoformat(snapshot["created_at"]),
+            is_active=True,
+            session_version=data.get("sv", 0)
+        )
+    
+    def revoke_session_token(self, token: str):
+        """Revoca un token stateless (logout); en modo database basta con borrar la cookie"""
+        data = self.load_session_token(token)
+        if data and data.get("jti"):
+            session_registry.revoke(data["jti"], data["user_id"], datetime.fromisoformat(data["expires_at"]))
+    
     def get_user_by_id(self, user_id: str) -> Optional[User]:
         """Obtiene un usuario por su ID"""
         try:
@@ -157,7 +209,4 @@ def get_current_user_id(session_token: str) -> Optional[str]:
 
 def get_current_user(session_token: str) -> Optional[User]:
     """Función helper para obtener el usuario actual desde el token de sesión"""
-    user_id = get_current_user_id(session_token)
-    if user_id:
-        return auth_manager.get_user_by_id(user_id)
-    return None
+    return auth_manager.get_user_from_token(session_token)
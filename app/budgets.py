@@ -0,0 +1,195 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Iterable, Tuple
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.database import Database
+from app.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Presupuestos mensuales por categoría.
+# Un documento por usuario y mes en la colección budgets:
+#   {_id: "<user_id>:<YYYY-MM>", user_id, month, limits: {cat: monto}, spent: {cat: monto},
+#    alerts: [{category, threshold, spent, limit, at}], initialized: True, spent_version: n}
+# Los montos gastados se actualizan con $inc en las mismas escrituras que insertan,
+# recategorizan o eliminan transacciones, así el dashboard lee el estado con un solo find_one.
+# Cada $inc sube spent_version; initialize_budget solo guarda su recálculo si no cambió.
+
+# Campos de una transacción que afectan el gasto de su presupuesto
+SPEND_FIELDS = {"type", "category", "amount", "date"}
+SPEND_PROJECTION = {"user_id": 1, "type": 1, "category": 1, "amount": 1, "date": 1}
+
+UNCATEGORIZED = "sin_categoria"
+
+# Recálculos que initialize_budget intenta si un $inc concurrente cambia spent_version
+INITIALIZE_ATTEMPTS = 5
+
+def month_key(date: Optional[datetime] = None) -> str:
+    """Mes de una fecha en formato YYYY-MM"""
+    return (date or datetime.now()).strftime("%Y-%m")
+
+def budget_id(user_id: Any, month: str) -> str:
+    return f"{user_id}:{month}"
+
+def _category_field(category: Optional[str]) -> str:
+    """Nombre de categoría seguro para usar como clave de un subdocumento"""
+    return (category or UNCATEGORIZED).replace(".", "_").replace("$", "_")
+
+def _spend_key(doc: Dict[str, Any]) -> Optional[Tuple[str, str, str]]:
+    """(usuario, mes, categoría) de un gasto, o None si la transacción no cuenta para presupuestos"""
+    if doc.get("type") != "gasto" or not doc.get("date"):
+        return None
+    return str(doc["user_id"]), month_key(doc["date"]), _category_field(doc.get("category"))
+
+def spend_deltas(removed: Iterable[Dict[str, Any]] = (), added: Iterable[Dict[str, Any]] = ()) -> Dict[Tuple[str, str, str], float]:
+    """Suma las variaciones de gasto por (usuario, mes, categoría); las que se anulan se descartan"""
+    deltas: Dict[Tuple[str, str, str], float] = defaultdict(float)
+    for sign, docs in ((-1, removed), (1, added)):
+        for doc in docs:
+            key = _spend_key(doc)
+            if key:
+                deltas[key] += sign * float(doc.get("amount") or 0)
+    return {key: round(amount, 2) for key, amount in deltas.items() if round(amount, 2)}
+
+def track_spending(db: Database, removed: Iterable[Dict[str, Any]] = (), added: Iterable[Dict[str, Any]] = ()):
+    """
+    Aplica a los presupuestos el efecto de una escritura: removed son los documentos
+    previos (eliminados o antes del cambio) y added los nuevos o ya modificados.
+    Un $inc por mes afectado; los umbrales se evalúan solo para las categorías que cambiaron.
+    """
+    by_month: Dict[Tuple[str, str], Dict[str, float]] = defaultdict(dict)
+    for (user_id, month, category), amount in spend_deltas(removed, added).items():
+        by_month[(user_id, month)][category] = amount
+
+    for (user_id, month), deltas in by_month.items():
+        try:
+            _apply_month_deltas(db, user_id, month, deltas)
+        except Exception as e:
+            # El presupuesto nunca debe bloquear la escritura de la transacción
+            logger.error(f"Error actualizando presupuesto {budget_id(user_id, month)}: {e}")
+
+def _apply_month_deltas(db: Database, user_id: str, month: str, deltas: Dict[str, float]):
+    doc = db.budgets.find_one_and_update(
+        {"_id": budget_id(user_id, month)},
+        {
+            "$inc": {**{f"spent.{category}": amount for category, amount in deltas.items()}, "spent_version": 1},
+            "$setOnInsert": {"user_id": ObjectId(user_id), "month": month}
+        },
+        projection={"limits": 1, "spent": 1, "initialized": 1},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    if not doc.get("initialized"):
+        # Primer gasto del mes: el documento recién creado parte de lo que ya había en la base
+        doc = initialize_budget(db, user_id, month)
+
+    alerts = evaluate_thresholds(doc.get("limits") or {}, doc.get("spent") or {}, deltas)
+    if alerts:
+        db.budgets.update_one(
+            {"_id": budget_id(user_id, month)},
+            {"$push": {"alerts": {"$each": alerts, "$slice": -settings.budget_alerts_kept}}}
+        )
+        for alert in alerts:
+            logger.info(f"Presupuesto {alert['category']} de {user_id} superó el {alert['threshold']:.0%} en {month}")
+
+def evaluate_thresholds(limits: Dict[str, float], spent: Dict[str, float], deltas: Dict[str, float]) -> List[Dict[str, Any]]:
+    """Umbrales cruzados hacia arriba por esta escritura (constante por categoría modificada)"""
+    alerts = []
+    now = datetime.utcnow()
+    for category, amount in deltas.items():
+        limit = limits.get(category)
+        if not limit or amount <= 0:
+            continue
+        after = spent.get(category, 0)
+        before = after - amount
+        for threshold in settings.budget_alert_thresholds:
+            if before < threshold * limit <= after:
+                alerts.append({"category": category, "threshold": threshold, "spent": after, "limit": limit, "at": now})
+    return alerts
+
+def _month_spending(db: Database, user_id: Any, month: str) -> Dict[str, float]:
+    """Gasto del mes por categoría, sumado desde las transacciones"""
+    start = datetime.strptime(month, "%Y-%m")
+    end = datetime(start.year + (start.month == 12), start.month % 12 + 1, 1)
+    pipeline = [
+        {"$match": {"user_id": ObjectId(str(user_id)), "type": "gasto", "date": {"$gte": start, "$lt": end}}},
+        {"$group": {"_id": "$category", "total": {"$sum": "$amount"}}}
+    ]
+    spent: Dict[str, float] = defaultdict(float)
+    for group in db.transactions.aggregate(pipeline):
+        spent[_category_field(group["_id"])] += round(float(group["total"]), 2)
+    return dict(spent)
+
+def initialize_budget(db: Database, user_id: Any, month: str) -> Dict[str, Any]:
+    """
+    Recalcula el gasto del mes desde las transacciones y copia los límites por defecto del usuario.
+    El resultado se guarda con una actualización condicionada a spent_version: si un $inc de
+    track_spending llegó mientras se sumaba, no se pisa y se vuelve a calcular
+    """
+    budget = {"_id": budget_id(user_id, month)}
+    user_doc = db.users.find_one({"_id": ObjectId(str(user_id))}, {"budget_limits": 1}) or {}
+    db.budgets.update_one(
+        budget, {"$setOnInsert": {"user_id": ObjectId(str(user_id)), "month": month}}, upsert=True
+    )
+    # El $inc del primer gasto crea el documento sin límites: se copian los del usuario
+    db.budgets.update_one(
+        {**budget, "limits": {"$exists": False}}, {"$set": {"limits": user_doc.get("budget_limits") or {}}}
+    )
+
+    for _ in range(INITIALIZE_ATTEMPTS):
+        # La versión se lee antes de sumar: todo $inc posterior la cambia
+        version = db.budgets.find_one(budget, {"spent_version": 1}).get("spent_version")
+        spent = _month_spending(db, user_id, month)
+        doc = db.budgets.find_one_and_update(
+            {**budget, "spent_version": version},
+            {"$set": {"spent": spent, "initialized": True}},
+            return_document=ReturnDocument.AFTER
+        )
+        if doc:
+            return doc
+
+    # Sin inicializar: lo reintenta el próximo gasto del mes o la reconciliación diaria
+    logger.warning(f"No se pudo recalcular el presupuesto {budget['_id']}: escrituras concurrentes")
+    return db.budgets.find_one(budget)
+
+def set_budget_limits(db: Database, user_id: Any, limits: Dict[str, float], month: Optional[str] = None) -> Dict[str, Any]:
+    """Guarda los límites como valores por defecto del usuario y los aplica al mes indicado (o al actual)"""
+    limits = {_category_field(category): round(float(amount), 2) for category, amount in limits.items() if amount and amount > 0}
+    month = month or month_key()
+
+    db.users.update_one({"_id": ObjectId(str(user_id))}, {"$set": {"budget_limits": limits}})
+    doc = db.budgets.find_one_and_update(
+        {"_id": budget_id(user_id, month)},
+        {"$set": {"limits": limits}, "$setOnInsert": {"user_id": ObjectId(str(user_id)), "month": month}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    if not doc.get("initialized"):
+        doc = initialize_budget(db, user_id, month)
+    return doc
+
+def get_budget(db: Database, user_id: Any, month: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Estado del presupuesto de un mes en una sola lectura"""
+    return db.budgets.find_one({"_id": budget_id(user_id, month or month_key())})
+
+def budget_status(doc: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Filas para mostrar: límite, gasto, porcentaje y nivel por categoría con presupuesto"""
+    if not doc:
+        return []
+    spent = doc.get("spent") or {}
+    rows = []
+    for category, limit in (doc.get("limits") or {}).items():
+        amount = max(spent.get(category, 0), 0)
+        ratio = amount / limit if limit else 0
+        level = "danger" if ratio >= 1 else "warning" if ratio >= min(settings.budget_alert_thresholds, default=1) else "success"
+        rows.append({
+            "category": category,
+            "limit": limit,
+            "spent": amount,
+            "remaining": limit - amount,
+            "percent": round(ratio * 100, 1),
+            "level": level
+        })
+    return sorted(rows, key=lambda row: row["percent"], reverse=True)
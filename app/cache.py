@@ -0,0 +1,110 @@
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from threading import Lock
+from typing import Optional, Dict, Any
+from bson import ObjectId
+from pymongo.database import Database
+from app.config import settings
+from app.database import get_database
+import logging
+
+logger = logging.getLogger(__name__)
+
+class MongoFragmentBackend:
+    """Backend compartido en MongoDB para fragmentos renderizados (entre workers)"""
+
+    def __init__(self, collection_name: str = "fragment_cache", ttl_seconds: int = 300):
+        self.collection_name = collection_name
+        self.ttl_seconds = ttl_seconds
+
+    @property
+    def collection(self):
+        return get_database()[self.collection_name]
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Obtiene un fragmento si existe y no ha expirado"""
+        doc = self.collection.find_one({"_id": key, "expires_at": {"$gt": datetime.utcnow()}})
+        return doc["value"] if doc else None
+
+    def set(self, key: str, value: Dict[str, Any]):
+        """Guarda un fragmento con fecha de expiración (índice TTL)"""
+        self.collection.replace_one(
+            {"_id": key},
+            {"_id": key, "value": value, "expires_at": datetime.utcnow() + timedelta(seconds=self.ttl_seconds)},
+            upsert=True
+        )
+
+class FragmentCache:
+    """Cache LRU acotada en memoria para fragmentos HTML, con backend compartido opcional"""
+
+    def __init__(self, max_entries: int = 512, backend: Optional[MongoFragmentBackend] = None):
+        self.max_entries = max_entries
+        self.backend = backend
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Busca un fragmento primero en memoria y luego en el backend compartido"""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+
+        if self.backend:
+            try:
+                value = self.backend.get(key)
+            except Exception as e:
+                logger.warning(f"Error leyendo cache compartida de fragmentos: {e}")
+                value = None
+            if value is not None:
+                self._store(key, value)
+                self.hits += 1
+                return value
+
+        self.misses += 1
+        return None
+
+    def set(self, key: str, value: Dict[str, Any]):
+        """Guarda un fragmento en memoria y en el backend compartido"""
+        self._store(key, value)
+        if self.backend:
+            try:
+                self.backend.set(key, value)
+            except Exception as e:
+                logger.warning(f"Error escribiendo cache compartida de fragmentos: {e}")
+
+    def clear(self):
+        """Vacía la cache en memoria"""
+        with self._lock:
+            self._entries.clear()
+
+    def _store(self, key: str, value: Dict[str, Any]):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+def fragment_key(user_id: str, view: str, period: str, version: int) -> str:
+    """Construye la clave de un fragmento: usuario, vista, periodo y versión de datos"""
+    return f"{user_id}:{view}:{period}:v{version}"
+
+def get_data_version(db: Database, user_id: str, session=None) -> int:
+    """Retorna la versión actual de los datos del usuario (la incrementa app/sync.py:tracked_change)"""
+    doc = db.data_versions.find_one({"_id": ObjectId(str(user_id))}, session=session)
+    return doc["version"] if doc else 0
+
+def _create_backend() -> Optional[MongoFragmentBackend]:
+    if settings.fragment_cache_backend == "mongo":
+        return MongoFragmentBackend(ttl_seconds=settings.fragment_cache_ttl)
+    return None
+
+# Instancia global de la cache de fragmentos
+fragment_cache = FragmentCache(
+    max_entries=settings.fragment_cache_size,
+    backend=_create_backend()
+)
@@ -0,0 +1,149 @@
+"""
+Compresión de respuestas dinámicas (HTML y JSON) como middleware ASGI.
+
+Elige gzip o brotli según Accept-Encoding y COMPRESSION_ALGORITHM, y comprime:
+- respuestas completas de al menos COMPRESSION_MIN_SIZE bytes, de una vez
+- respuestas en streaming (stream_template) parte por parte, con flush en cada bloque
+  para que el navegador pueda ir mostrando la página
+
+No toca respuestas que ya traen Content-Encoding, tipos que no comprimen bien
+ni las rutas excluidas (los estáticos ya vienen precomprimidos de static/dist).
+"""
+import zlib
+from typing import Optional, Tuple
+from starlette.datastructures import Headers, MutableHeaders
+from app.config import settings
+from app.static_assets import STATIC_URL, accepted_encodings
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli es opcional
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "text/html", "text/plain", "text/css", "text/csv", "text/javascript",
+    "application/json", "application/javascript", "image/svg+xml",
+)
+
+class GzipEncoder:
+    def __init__(self, level: int):
+        # wbits 31: formato gzip (cabecera + deflate + CRC)
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+class BrotliEncoder:
+    def __init__(self, level: int):
+        self._compressor = brotli.Compressor(quality=min(level, 11))
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+ENCODERS = {"gzip": GzipEncoder}
+if brotli is not None:
+    ENCODERS["br"] = BrotliEncoder
+
+def choose_encoding(accept_encoding: str, algorithm: str) -> Optional[str]:
+    """Codificación a usar según lo que acepta el cliente; "auto" prefiere brotli"""
+    accepted = accepted_encodings(accept_encoding)
+    preference = ("br", "gzip") if algorithm == "auto" else (algorithm,)
+    for name in preference:
+        if name in ENCODERS and accepted.get(name, 0) > 0:
+            return name
+    return None
+
+class CompressionMiddleware:
+    """Middleware ASGI de compresión con soporte para respuestas en streaming"""
+
+    def __init__(
+        self,
+        app,
+        algorithm: str = None,
+        minimum_size: int = None,
+        level: int = None,
+        exclude_paths: Tuple[str, ...] = (STATIC_URL,)
+    ):
+        self.app = app
+        self.algorithm = algorithm or settings.compression_algorithm
+        self.minimum_size = settings.compression_min_size if minimum_size is None else minimum_size
+        self.level = level or settings.compression_level
+        self.exclude_paths = exclude_paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.exclude_paths):
+            return await self.app(scope, receive, send)
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""), self.algorithm)
+        if not encoding:
+            return await self.app(scope, receive, send)
+        await CompressedResponder(self.app, encoding, self.level, self.minimum_size)(scope, receive, send)
+
+class CompressedResponder:
+    """Estado de una respuesta: decide al ver el primer bloque del cuerpo si comprime o no"""
+
+    def __init__(self, app, encoding: str, level: int, minimum_size: int):
+        self.app = app
+        self.encoding = encoding
+        self.level = level
+        self.minimum_size = minimum_size
+        self.start_message = None
+        self.encoder = None
+        self.passthrough = False
+
+    async def __call__(self, scope, receive, send):
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+
+    def _compressible(self, headers: Headers) -> bool:
+        if "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+        return content_type in COMPRESSIBLE_TYPES
+
+    async def send_compressed(self, message):
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            self.start_message = message
+            self.passthrough = not self._compressible(Headers(raw=message["headers"]))
+            if self.passthrough:
+                await self.send(message)
+            return
+        if message_type != "http.response.body" or self.passthrough:
+            return await self.send(message)
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.encoder is None:
+            headers = MutableHeaders(raw=list(self.start_message["headers"]))
+            if not more_body and len(body) < self.minimum_size:
+                # Respuesta completa y pequeña: comprimir no compensa la cabecera
+                self.passthrough = True
+                await self.send(self.start_message)
+                return await self.send(message)
+
+            self.encoder = ENCODERS[self.encoding](self.level)
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            self.start_message = {**self.start_message, "headers": headers.raw}
+            if more_body:
+                # Streaming: el largo final no se conoce
+                del headers["Content-Length"]
+                await self.send(self.start_message)
+            else:
+                compressed = self.encoder.compress(body) + self.encoder.finish()
+                headers["Content-Length"] = str(len(compressed))
+                await self.send({**self.start_message, "headers": headers.raw})
+                return await self.send({"type": "http.response.body", "body": compressed})
+
+        chunk = self.encoder.compress(body) if body else b""
+        if not more_body:
+            chunk += self.encoder.finish()
+        if chunk or not more_body:
+            await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
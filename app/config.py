@@ -11,7 +11,97 @@ class Settings:
         self.mongodb_uri: str = os.getenv("MONGODB_URI", "mongodb://localhost:27017/mybills")
         self.secret_key: str = os.getenv("SECRET_KEY", "development-secret-key-change-in-production")
         self.database_name: str = self._extract_db_name(self.mongodb_uri)
+        # Lecturas pesadas (dashboard, analítica, exportaciones): read preference y
+        # atraso máximo tolerado de un secundario en segundos (-1 sin límite, mínimo 90)
+        self.read_preference: str = os.getenv("READ_PREFERENCE", "primary")
+        self.read_max_staleness: int = int(os.getenv("READ_MAX_STALENESS", "90"))
         self.session_expires_hours: int = 24
+        # "database": cada request verifica el usuario en MongoDB; "stateless": el token lleva
+        # una foto del usuario y se valida contra una tabla en memoria sincronizada cada N segundos
+        self.session_mode: str = os.getenv("SESSION_MODE", "database")
+        self.session_sync_interval: int = int(os.getenv("SESSION_SYNC_INTERVAL", "30"))
+        self.debug: bool = os.getenv("DEBUG", "False").lower() in ("1", "true", "yes")
+
+        # Logging (ver app/logging_setup.py)
+        self.log_level: str = os.getenv("LOG_LEVEL", "INFO").upper()
+        self.log_levels: str = os.getenv("LOG_LEVELS", "")
+        self.log_file: str = os.getenv("LOG_FILE", "mybills.log")
+        self.log_json: bool = os.getenv("LOG_JSON", "False").lower() in ("1", "true", "yes")
+        self.log_max_bytes: int = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+        self.log_backup_count: int = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+        # "size": cada proceso rota su archivo; "external": logrotate rota y el handler reabre
+        self.log_rotation: str = os.getenv("LOG_ROTATION", "size")
+
+        # Templates y cache de bytecode de Jinja2
+        self.templates_dir: str = os.getenv("TEMPLATES_DIR", "templates")
+        self.static_dir: str = os.getenv("STATIC_DIR", "static")
+
+        # Compresión de respuestas HTML/JSON: "auto" (brotli si está instalado, si no gzip), "gzip" o "br"
+        self.compression_enabled: bool = os.getenv("COMPRESSION_ENABLED", "True").lower() in ("1", "true", "yes")
+        self.compression_algorithm: str = os.getenv("COMPRESSION_ALGORITHM", "auto")
+        self.compression_min_size: int = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+        self.compression_level: int = int(os.getenv("COMPRESSION_LEVEL", "5"))
+        self.template_cache_dir: str = os.getenv("TEMPLATE_CACHE_DIR", ".jinja_cache")
+
+        # Renderizado en streaming de listas largas
+        self.stream_chunk_size: int = int(os.getenv("STREAM_CHUNK_SIZE", "16384"))
+        self.stream_batch_size: int = int(os.getenv("STREAM_BATCH_SIZE", "500"))
+
+        # Cache de fragmentos del dashboard ("memory" o "mongo" para compartir entre workers)
+        self.fragment_cache_size: int = int(os.getenv("FRAGMENT_CACHE_SIZE", "512"))
+        self.fragment_cache_ttl: int = int(os.getenv("FRAGMENT_CACHE_TTL", "300"))
+        self.fragment_cache_backend: str = os.getenv("FRAGMENT_CACHE_BACKEND", "memory")
+
+        # Pool de procesos para parsear lotes de emails (0 = parseo inline, -1 = núcleos / WEB_CONCURRENCY)
+        self.parser_workers: int = int(os.getenv("PARSER_WORKERS", "0"))
+        self.parser_chunk_size: int = int(os.getenv("PARSER_CHUNK_SIZE", "64"))
+
+        # Presupuestos: umbrales de alerta (fracción del límite) y alertas guardadas por mes
+        self.budget_alert_thresholds: list = sorted(
+            float(t) for t in os.getenv("BUDGET_ALERT_THRESHOLDS", "0.8,1.0").split(",") if t.strip()
+        )
+        self.budget_alerts_kept: int = int(os.getenv("BUDGET_ALERTS_KEPT", "50"))
+
+        # Detección de cobros recurrentes
+        self.recurring_window: int = int(os.getenv("RECURRING_WINDOW", "24"))
+        self.recurring_min_occurrences: int = int(os.getenv("RECURRING_MIN_OCCURRENCES", "3"))
+        self.recurring_amount_tolerance: float = float(os.getenv("RECURRING_AMOUNT_TOLERANCE", "0.15"))
+        self.recurring_min_confidence: float = float(os.getenv("RECURRING_MIN_CONFIDENCE", "0.6"))
+
+        # Scheduler de tareas en segundo plano (cron de 5 campos o intervalos en segundos)
+        self.scheduler_enabled: bool = os.getenv("SCHEDULER_ENABLED", "True").lower() in ("1", "true", "yes")
+        self.recurring_schedule: str = os.getenv("RECURRING_SCHEDULE", "30 3 * * *")
+        self.budget_reconcile_schedule: str = os.getenv("BUDGET_RECONCILE_SCHEDULE", "0 4 * * *")
+        self.index_maintenance_schedule: str = os.getenv("INDEX_MAINTENANCE_SCHEDULE", "15 4 * * 0")
+        self.cache_warm_interval: int = int(os.getenv("CACHE_WARM_INTERVAL", "300"))
+        self.cache_warm_users: int = int(os.getenv("CACHE_WARM_USERS", "200"))
+
+        # Health checks: ping a MongoDB en segundo plano y medición del retraso del event loop
+        self.health_check_interval: float = float(os.getenv("HEALTH_CHECK_INTERVAL", "5"))
+        self.health_check_timeout: float = float(os.getenv("HEALTH_CHECK_TIMEOUT", "2"))
+        self.health_lag_interval: float = float(os.getenv("HEALTH_LAG_INTERVAL", "0.5"))
+
+        # Límite de intentos de login (ventana deslizante en segundos); backend "memory" o "mongo"
+        self.login_limit_per_username: int = int(os.getenv("LOGIN_LIMIT_PER_USERNAME", "5"))
+        self.login_limit_per_ip: int = int(os.getenv("LOGIN_LIMIT_PER_IP", "20"))
+        self.login_limit_window: int = int(os.getenv("LOGIN_LIMIT_WINDOW", "300"))
+        self.login_limit_backend: str = os.getenv("LOGIN_LIMIT_BACKEND", "memory")
+        self.login_limit_max_keys: int = int(os.getenv("LOGIN_LIMIT_MAX_KEYS", "10000"))
+
+        # Endpoints de administración (/admin/*), deshabilitados si no hay token
+        self.admin_token: str = os.getenv("ADMIN_TOKEN", "")
+
+        # Perfilado de requests (header X-Profile: 1 con X-Admin-Token, o una fracción al azar)
+        self.profile_sample_rate: float = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+        self.profile_interval_ms: float = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+        self.profile_dir: str = os.getenv("PROFILE_DIR", "profiles")
+        self.profile_max_files: int = int(os.getenv("PROFILE_MAX_FILES", "200"))
+
+        # Eventos en vivo (/events): origen "auto" (change streams si hay replica set), "change_stream" o "memory"
+        self.events_source: str = os.getenv("EVENTS_SOURCE", "auto")
+        self.events_heartbeat: float = float(os.getenv("EVENTS_HEARTBEAT", "15"))
+        self.events_max_duration: float = float(os.getenv("EVENTS_MAX_DURATION", "300"))
+        self.events_queue_size: int = int(os.getenv("EVENTS_QUEUE_SIZE", "100"))
         
     def _extract_db_name(self, uri: str) -> str:
         """Extrae el nombre de la base de datos de la URI"""
@@ -1,24 +1,114 @@
-from pymongo import MongoClient
+import threading
+from contextlib import contextmanager
+from typing import Optional, Dict, Iterator
+from pymongo import MongoClient, monitoring
+from pymongo.client_session import ClientSession
+from pymongo.read_preferences import (
+    ReadPreference, PrimaryPreferred, Secondary, SecondaryPreferred, Nearest
+)
 from pymongo.server_api import ServerApi
 from pymongo.database import Database
 from app.config import settings
+from app.indexes import ensure_indexes
 import logging
 
 logger = logging.getLogger(__name__)
 
+class PoolStats(monitoring.ConnectionPoolListener):
+    """Contadores del pool de conexiones de pymongo, actualizados por sus eventos"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.open = 0
+        self.in_use = 0
+        self.waiting = 0
+        self.created = 0
+        self.checkout_failures = 0
+        self.cleared = 0
+
+    def _add(self, **deltas):
+        with self._lock:
+            for name, delta in deltas.items():
+                setattr(self, name, getattr(self, name) + delta)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._add(cleared=1)
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._add(open=1, created=1)
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._add(open=-1)
+
+    def connection_check_out_started(self, event):
+        self._add(waiting=1)
+
+    def connection_check_out_failed(self, event):
+        self._add(waiting=-1, checkout_failures=1)
+
+    def connection_checked_out(self, event):
+        self._add(waiting=-1, in_use=1)
+
+    def connection_checked_in(self, event):
+        self._add(in_use=-1)
+
+    def snapshot(self) -> Dict[str, int]:
+        return {
+            "open": self.open,
+            "in_use": self.in_use,
+            "waiting": self.waiting,
+            "created": self.created,
+            "checkout_failures": self.checkout_failures,
+            "cleared": self.cleared,
+            "max_size": db_connection.max_pool_size,
+        }
+
+# Modos de READ_PREFERENCE distintos de primary (aceptan maxStalenessSeconds)
+READ_PREFERENCE_MODES = {
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+
+def build_read_preference(mode: str, max_staleness: int = -1):
+    """Read preference de las lecturas pesadas; un modo desconocido usa el primario"""
+    if mode == "primary":
+        return ReadPreference.PRIMARY
+    if mode not in READ_PREFERENCE_MODES:
+        logger.error(f"READ_PREFERENCE no válido: {mode!r}; las lecturas irán al primario")
+        return ReadPreference.PRIMARY
+    return READ_PREFERENCE_MODES[mode](max_staleness=max_staleness)
+
 class DatabaseConnection:
     """Maneja la conexión a MongoDB"""
     
     def __init__(self):
         self._client: MongoClient = None
         self._database: Database = None
+        self._read_database: Database = None
+        self.max_pool_size: Optional[int] = None
     
     def connect(self) -> Database:
         """Establece conexión con MongoDB"""
         try:
-            self._client = MongoClient(settings.mongodb_uri, server_api=ServerApi('1'))
+            self._client = MongoClient(settings.mongodb_uri, server_api=ServerApi('1'), event_listeners=[pool_stats])
 
             self._database = self._client[settings.database_name]
+            self._read_database = None
+            self.max_pool_size = self._client.options.pool_options.max_pool_size
             
             # Verificar conexión
             self._client.admin.command('ping')
@@ -33,17 +123,18 @@ class DatabaseConnection:
             logger.error(f"Error conectando a MongoDB: {e}")
             raise
     
+    def attach(self, client: MongoClient, database: Database):
+        """Usa un cliente ya creado (p. ej. un MongoDB en memoria para benchmarks)"""
+        self._client = client
+        self._database = database
+        self._read_database = None
+        self._create_indexes()
+    
     def _create_indexes(self):
         """Crea índices necesarios para optimizar consultas"""
         try:
-            # Índices para usuarios
-            self._database.users.create_index("username", unique=True)
-            self._database.users.create_index("email", unique=True)
-            
-            # Índices para transacciones
-            self._database.transactions.create_index("user_id")
-            self._database.transactions.create_index([("user_id", 1), ("date", -1)])
-            self._database.transactions.create_index("date")
+            # Índices derivados de las formas de consulta (ver app/indexes.py)
+            ensure_indexes(self._database)
             
             logger.info("Índices creados correctamente")
             
@@ -62,14 +153,65 @@ class DatabaseConnection:
         if self._database is None:
             return self.connect()
         return self._database
+    
+    @property
+    def read_database(self) -> Database:
+        """La misma base con la read preference de las lecturas pesadas (READ_PREFERENCE)"""
+        if self._read_database is None:
+            self._read_database = self.database.with_options(
+                read_preference=build_read_preference(settings.read_preference, settings.read_max_staleness)
+            )
+        return self._read_database
+    
+    @property
+    def routes_reads(self) -> bool:
+        """True si las lecturas pesadas pueden ir a un secundario"""
+        return self.read_database.read_preference != ReadPreference.PRIMARY
 
-# Instancia global de conexión
+# Instancias globales: estadísticas del pool (health checks) y conexión
+pool_stats = PoolStats()
 db_connection = DatabaseConnection()
 
 def get_database() -> Database:
     """Función helper para obtener la base de datos"""
     return db_connection.database
 
+def get_read_database(primary: bool = False) -> Database:
+    """
+    Base para lecturas pesadas de solo lectura (dashboard, analítica, exportaciones).
+    Con primary=True usa el primario, para flujos que deben ver lo recién escrito
+    """
+    if primary:
+        return db_connection.database
+    return db_connection.read_database
+
+def start_causal_session() -> Optional[ClientSession]:
+    """
+    Sesión causalmente consistente: una lectura en un secundario dentro de la sesión
+    espera a haber replicado lo que ya se leyó en el primario. None si las lecturas
+    pesadas van al primario (no hace falta). Quien la abre debe llamar end_session()
+    """
+    if not db_connection.routes_reads:
+        return None
+    return db_connection.database.client.start_session(causal_consistency=True)
+
+@contextmanager
+def causal_session() -> Iterator[Optional[ClientSession]]:
+    """start_causal_session() como context manager"""
+    session = start_causal_session()
+    try:
+        yield session
+    finally:
+        if session is not None:
+            session.end_session()
+
+def iterate_in_session(iterable, session: ClientSession) -> Iterator:
+    """Recorre un cursor y cierra su sesión al terminar (respuestas en streaming)"""
+    try:
+        yield from iterable
+    finally:
+        session.end_session()
+
 def close_database():
     """Función helper para cerrar la conexión"""
     db_connection.close()
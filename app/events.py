@@ -0,0 +1,181 @@
+"""
+Eventos en vivo por usuario para el dashboard (Server-Sent Events en /events).
+
+Toda escritura de transacciones termina en tracked_change() (app/sync.py), que guarda en
+data_versions.last_change la versión y la variación del resumen por mes. Los eventos
+salen de ahí por uno de dos caminos:
+- change_stream: un thread sigue el change stream de data_versions y publica en el bus,
+  así cada worker recibe también las escrituras hechas por los otros (requiere replica set)
+- memory: tracked_change publica directo en el bus del proceso (MongoDB standalone)
+
+El bus solo despierta a los streams abiertos del usuario; cada stream pide los cambios
+desde su token de sincronización y envía las filas afectadas, no la página completa.
+"""
+import asyncio
+from collections import defaultdict
+from threading import Thread, Event, Lock
+from typing import Optional, Dict, Any, Set
+from pymongo.errors import PyMongoError, OperationFailure
+from app.config import settings
+from app.database import get_database
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Evento que indica al cliente que perdió cambios y debe recargar la página
+RESET = {"reset": True}
+
+# Código de MongoDB cuando el token de reanudación ya salió del oplog
+CHANGE_STREAM_HISTORY_LOST = 286
+
+class EventBus:
+    """Colas asyncio por usuario para los streams abiertos en este worker"""
+
+    def __init__(self, queue_size: int = None):
+        self.queue_size = queue_size or settings.events_queue_size
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = Lock()
+        # True mientras un change stream entrega los eventos (tracked_change no publica)
+        self.external = False
+        self.published = 0
+        self.dropped = 0
+
+    def subscribe(self, user_id) -> asyncio.Queue:
+        """Registra un stream del usuario; se llama desde el event loop"""
+        self._loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers[str(user_id)].add(queue)
+        return queue
+
+    def unsubscribe(self, user_id, queue: asyncio.Queue):
+        with self._lock:
+            queues = self._subscribers.get(str(user_id))
+            if queues is not None:
+                queues.discard(queue)
+                if not queues:
+                    del self._subscribers[str(user_id)]
+
+    def publish(self, user_id, event: Dict[str, Any]):
+        """Entrega el evento a los streams del usuario; se puede llamar desde cualquier thread"""
+        user_id = str(user_id)
+        if self._loop is None or user_id not in self._subscribers:
+            return
+        self.published += 1
+        try:
+            self._loop.call_soon_threadsafe(self._deliver, user_id, event)
+        except RuntimeError:
+            # El event loop ya se cerró
+            pass
+
+    def publish_local(self, user_id, event: Dict[str, Any]):
+        """Publicación desde la escritura; con change stream activo el evento llega por ese camino"""
+        if not self.external:
+            self.publish(user_id, event)
+
+    def broadcast_reset(self):
+        """Pide a todos los clientes conectados que recarguen (se perdieron eventos)"""
+        with self._lock:
+            user_ids = list(self._subscribers)
+        for user_id in user_ids:
+            self.publish(user_id, RESET)
+
+    def _deliver(self, user_id: str, event: Dict[str, Any]):
+        for queue in list(self._subscribers.get(user_id, ())):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # El cliente no alcanza a consumir: se descartan sus eventos y recarga
+                self.dropped += 1
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(RESET)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "source": "change_stream" if self.external else "memory",
+            "users": len(self._subscribers),
+            "streams": sum(len(queues) for queues in self._subscribers.values()),
+            "published": self.published,
+            "dropped": self.dropped,
+        }
+
+class ChangeStreamWatcher:
+    """Thread que sigue los cambios de data_versions.last_change y los publica en el bus"""
+
+    PIPELINE = [{"$match": {
+        "operationType": "update",
+        "updateDescription.updatedFields.last_change": {"$exists": True}
+    }}]
+
+    def __init__(self, bus: EventBus):
+        self.bus = bus
+        self._thread: Optional[Thread] = None
+        self._stop = Event()
+        self._resume_token = None
+        self.errors = 0
+
+    def _open(self):
+        return get_database().data_versions.watch(
+            self.PIPELINE, resume_after=self._resume_token, max_await_time_ms=1000
+        )
+
+    def start(self) -> bool:
+        """Abre el change stream; retorna False si el servidor no lo soporta (standalone)"""
+        if self._thread:
+            return True
+        try:
+            stream = self._open()
+        except Exception as e:
+            logger.info(f"Change streams no disponibles ({e}); eventos en memoria del proceso")
+            return False
+        self._stop.clear()
+        self.bus.external = True
+        self._thread = Thread(target=self._run, args=(stream,), name="events-change-stream", daemon=True)
+        self._thread.start()
+        logger.info("Eventos en vivo desde el change stream de data_versions")
+        return True
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        self._thread = None
+        self.bus.external = False
+
+    def _run(self, stream):
+        while not self._stop.is_set():
+            try:
+                if stream is None:
+                    stream = self._open()
+                with stream:
+                    while not self._stop.is_set() and stream.alive:
+                        change = stream.try_next()
+                        self._resume_token = stream.resume_token
+                        if change is not None:
+                            fields = change["updateDescription"]["updatedFields"]
+                            self.bus.publish(change["documentKey"]["_id"], fields["last_change"])
+            except PyMongoError as e:
+                self.errors += 1
+                logger.warning(f"Change stream de eventos interrumpido: {e}")
+                if isinstance(e, OperationFailure) and e.code == CHANGE_STREAM_HISTORY_LOST:
+                    self._resume_token = None
+                    self.bus.broadcast_reset()
+                self._stop.wait(1)
+            stream = None
+
+# Instancias globales del bus de eventos y del watcher
+event_bus = EventBus()
+change_stream_watcher = ChangeStreamWatcher(event_bus)
+
+def start_event_source() -> str:
+    """Elige el origen de los eventos según EVENTS_SOURCE; retorna el usado"""
+    if settings.events_source != "memory" and change_stream_watcher.start():
+        return "change_stream"
+    if settings.events_source == "change_stream":
+        logger.error("EVENTS_SOURCE=change_stream pero MongoDB no soporta change streams; se usan eventos en memoria")
+    return "memory"
+
+def stop_event_source():
+    change_stream_watcher.stop()
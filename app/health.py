@@ -0,0 +1,147 @@
+"""
+Health checks baratos para probes de liveness y readiness.
+
+- /health/live no toca la base de datos: responde si el proceso y su event loop atienden.
+- /health/ready devuelve el estado de MongoDB que un task de fondo refresca cada
+  HEALTH_CHECK_INTERVAL segundos con un ping; el probe nunca espera a la base.
+
+Ambos incluyen las estadísticas del pool de conexiones (PoolStats en app/database.py) y
+el retraso del event loop, medido por un task que duerme un intervalo fijo y mide
+cuánto tarde despierta.
+"""
+import asyncio
+import time
+from datetime import datetime
+from typing import Optional, Dict, Any
+from fastapi import FastAPI
+from app.config import settings
+from app.database import get_database, pool_stats
+from app.events import event_bus
+from app.api import FastJSONResponse
+import logging
+
+logger = logging.getLogger(__name__)
+
+class HealthMonitor:
+    """Tasks de fondo: ping periódico a MongoDB y medición del retraso del event loop"""
+
+    def __init__(self, check_interval: float = None, lag_interval: float = None):
+        self.check_interval = check_interval or settings.health_check_interval
+        self.lag_interval = lag_interval or settings.health_lag_interval
+        self.started_at = time.monotonic()
+        self.database_ok: Optional[bool] = None
+        self.last_check: Optional[float] = None
+        self.last_check_at: Optional[datetime] = None
+        self.ping_ms: Optional[float] = None
+        self.error: Optional[str] = None
+        self.failures = 0
+        self.loop_lag_ms = 0.0
+        self.max_loop_lag_ms = 0.0
+        self._tasks = []
+
+    def start(self):
+        """Inicia los tasks en el event loop actual"""
+        if self._tasks:
+            return
+        self._tasks = [asyncio.create_task(self._check_loop()), asyncio.create_task(self._lag_loop())]
+        logger.info(f"Health checks en segundo plano cada {self.check_interval}s")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+
+    def _ping(self):
+        get_database().command("ping")
+
+    async def check(self):
+        """Hace un ping (en un thread, con timeout) y guarda el resultado"""
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.to_thread(self._ping), timeout=settings.health_check_timeout)
+            self.database_ok = True
+            self.error = None
+            self.failures = 0
+        except Exception as e:
+            if self.database_ok is not False:
+                logger.error(f"Health check de MongoDB falló: {e!r}")
+            self.database_ok = False
+            self.error = repr(e)
+            self.failures += 1
+        self.ping_ms = round((time.perf_counter() - start) * 1000, 2)
+        self.last_check = time.monotonic()
+        self.last_check_at = datetime.utcnow()
+
+    async def _check_loop(self):
+        while True:
+            await self.check()
+            await asyncio.sleep(self.check_interval)
+
+    async def _lag_loop(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.lag_interval)
+            lag = max(0.0, (time.perf_counter() - start - self.lag_interval) * 1000)
+            self.loop_lag_ms = round(lag, 3)
+            # Máximo con decaimiento, para que un pico no quede reportado para siempre
+            self.max_loop_lag_ms = round(max(lag, self.max_loop_lag_ms * 0.9), 3)
+
+    @property
+    def ready(self) -> bool:
+        """Listo si el último ping fue exitoso y no es más viejo que tres intervalos"""
+        if not self.database_ok or self.last_check is None:
+            return False
+        return time.monotonic() - self.last_check <= 3 * self.check_interval
+
+    def runtime(self) -> Dict[str, Any]:
+        return {
+            "uptime_s": round(time.monotonic() - self.started_at, 1),
+            "loop_lag_ms": self.loop_lag_ms,
+            "max_loop_lag_ms": self.max_loop_lag_ms,
+            "pool": pool_stats.snapshot(),
+            "events": event_bus.metrics(),
+        }
+
+    def database(self) -> Dict[str, Any]:
+        return {
+            "ok": self.database_ok,
+            "checked_at": self.last_check_at.isoformat() if self.last_check_at else None,
+            "age_s": round(time.monotonic() - self.last_check, 2) if self.last_check else None,
+            "ping_ms": self.ping_ms,
+            "failures": self.failures,
+            "error": self.error,
+        }
+
+# Instancia global del monitor
+health_monitor = HealthMonitor()
+
+def create_health_routes(app: FastAPI):
+    """Registra los endpoints de liveness y readiness"""
+
+    @app.get("/health/live")
+    async def health_live():
+        """Liveness: el proceso atiende; nunca consulta MongoDB"""
+        return FastJSONResponse({"status": "alive", **health_monitor.runtime()})
+
+    @app.get("/health/ready")
+    async def health_ready():
+        """Readiness: último estado de MongoDB conocido por el task de fondo"""
+        ready = health_monitor.ready
+        return FastJSONResponse(
+            {"status": "ready" if ready else "unavailable", "database": health_monitor.database(), **health_monitor.runtime()},
+            status_code=200 if ready else 503
+        )
+
+    @app.get("/health")
+    async def health_check():
+        """Health check endpoint (compatibilidad; equivale a /health/ready)"""
+        ready = health_monitor.ready
+        return FastJSONResponse(
+            {"status": "healthy" if ready else "unhealthy", "timestamp": datetime.now().isoformat(), "database": health_monitor.database()},
+            status_code=200 if ready else 503
+        )
@@ -0,0 +1,307 @@
+"""
+Índices de MongoDB derivados de las consultas reales de la aplicación.
+
+QUERY_SHAPES enumera las formas de consulta de app/routes.py, app/auth.py, app/api.py y los jobs
+(el filtro, el orden y la proyección; los valores son de ejemplo). INDEX_SPECS define
+los índices que las cubren y ensure_indexes los crea y luego elimina los obsoletos.
+
+Verificación contra un MongoDB real (explain de cada forma de consulta):
+    python -m app.indexes --verify
+"""
+import argparse
+import sys
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Iterator
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING
+from pymongo.database import Database
+import logging
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_USER = ObjectId("68ae0680e37dadbe6b948619")
+SAMPLE_MONTH = {"$gte": datetime(2025, 8, 1), "$lt": datetime(2025, 9, 1)}
+
+# Retención de las lápidas de transacciones eliminadas (sincronización incremental, app/sync.py)
+TOMBSTONE_TTL_DAYS = 90
+
+# Índices por colección: nombre -> (claves, opciones)
+INDEX_SPECS: Dict[str, Dict[str, tuple]] = {
+    "users": {
+        "username_1": ([("username", ASCENDING)], {"unique": True}),
+        "email_1": ([("email", ASCENDING)], {"unique": True}),
+    },
+    "transactions": {
+        # Listas (dashboard y API): igualdad por usuario, orden por fecha y desempate por _id (keyset)
+        "user_date_id": (
+            [("user_id", ASCENDING), ("date", DESCENDING), ("_id", DESCENDING)], {}
+        ),
+        # Resumen y gráfico: el $group solo lee campos del índice (consulta cubierta)
+        "user_date_type_category_amount": (
+            [("user_id", ASCENDING), ("date", ASCENDING), ("type", ASCENDING),
+             ("category", ASCENDING), ("amount", ASCENDING)], {}
+        ),
+        # Pendientes de validar: solo indexa las transacciones sin validar
+        "user_pending_date_id": (
+            [("user_id", ASCENDING), ("validated", ASCENDING), ("date", DESCENDING), ("_id", DESCENDING)],
+            {"partialFilterExpression": {"validated": False}}
+        ),
+        # Sincronización incremental: cambios del usuario posteriores a una versión, en orden keyset
+        "user_sync_version_id": (
+            [("user_id", ASCENDING), ("sync_version", ASCENDING), ("_id", ASCENDING)], {}
+        ),
+        # Detección de cobros recurrentes: recorre los gastos ordenados por comercio y fecha
+        "user_merchant_date": (
+            [("user_id", ASCENDING), ("merchant_key", ASCENDING), ("date", ASCENDING)],
+            {"partialFilterExpression": {"type": "gasto"}}
+        ),
+    },
+    "recurring": {
+        "user_next_expected": ([("user_id", ASCENDING), ("next_expected", ASCENDING)], {}),
+    },
+    "fragment_cache": {
+        # Expiración automática de la cache compartida de fragmentos
+        "expires_at_1": ([("expires_at", ASCENDING)], {"expireAfterSeconds": 0}),
+    },
+    "tombstones": {
+        "user_sync_version_id": ([("user_id", ASCENDING), ("sync_version", ASCENDING), ("_id", ASCENDING)], {}),
+        "deleted_at_1": ([("deleted_at", ASCENDING)], {"expireAfterSeconds": TOMBSTONE_TTL_DAYS * 86400}),
+    },
+    "revoked_sessions": {
+        # Sincronización incremental de revocaciones y expiración junto con el token
+        "revoked_at_1": ([("revoked_at", ASCENDING)], {}),
+        "expires_at_1": ([("expires_at", ASCENDING)], {"expireAfterSeconds": 0}),
+    },
+    "rate_limits": {
+        # Contadores de intentos de login (backend mongo de app/rate_limit.py)
+        "expires_at_1": ([("expires_at", ASCENDING)], {"expireAfterSeconds": 0}),
+    },
+}
+
+# Índices de versiones anteriores que ya no usa ninguna consulta
+OBSOLETE_INDEXES: Dict[str, List[str]] = {
+    # "date_1" no lo usaba ninguna ruta; "user_id_1" y "user_id_1_date_-1" son prefijos de user_date_id
+    "transactions": ["date_1", "user_id_1", "user_id_1_date_-1"],
+}
+
+# Formas de consulta: de dónde vienen, qué índice deben usar y si deben quedar cubiertas
+QUERY_SHAPES: List[Dict[str, Any]] = [
+    {
+        "name": "login_by_username",
+        "source": "app/auth.py:authenticate_user",
+        "collection": "users",
+        "command": {"find": "users", "filter": {"username": "admin", "is_active": True}, "limit": 1},
+        "index": "username_1",
+    },
+    {
+        "name": "register_duplicate_check",
+        "source": "app/auth.py:create_user",
+        "collection": "users",
+        "command": {"find": "users", "filter": {"$or": [{"username": "admin"}, {"email": "a@b.cl"}]}, "limit": 1},
+        "index": ["username_1", "email_1"],
+    },
+    {
+        "name": "dashboard_summary_monthly",
+        "source": "app/routes.py:aggregate_dashboard_data",
+        "collection": "transactions",
+        "command": {"aggregate": "transactions", "cursor": {}, "pipeline": [
+            {"$match": {"user_id": SAMPLE_USER, "date": SAMPLE_MONTH}},
+            {"$group": {"_id": {"type": "$type", "category": "$category"},
+                        "total": {"$sum": "$amount"}, "count": {"$sum": 1}}},
+        ]},
+        "index": "user_date_type_category_amount",
+        "covered": True,
+    },
+    {
+        "name": "dashboard_summary_historical",
+        "source": "app/routes.py:aggregate_dashboard_data",
+        "collection": "transactions",
+        "command": {"aggregate": "transactions", "cursor": {}, "pipeline": [
+            {"$match": {"user_id": SAMPLE_USER}},
+            {"$group": {"_id": {"type": "$type", "category": "$category"},
+                        "total": {"$sum": "$amount"}, "count": {"$sum": 1}}},
+        ]},
+        "index": "user_date_type_category_amount",
+        "covered": True,
+    },
+    {
+        "name": "dashboard_page",
+        "source": "app/routes.py:dashboard",
+        "collection": "transactions",
+        "command": {"find": "transactions", "filter": {"user_id": SAMPLE_USER, "date": SAMPLE_MONTH},
+                    "sort": {"date": -1}, "skip": 20, "limit": 20},
+        "index": "user_date_id",
+    },
+    {
+        "name": "api_list_keyset",
+        "source": "app/api.py:api_list_transactions",
+        "collection": "transactions",
+        "command": {"find": "transactions", "filter": {
+            "user_id": SAMPLE_USER,
+            "$or": [{"date": {"$lt": datetime(2025, 8, 15)}},
+                    {"date": datetime(2025, 8, 15), "_id": {"$lt": SAMPLE_USER}}]
+        }, "sort": {"date": -1, "_id": -1}, "limit": 50},
+        "index": "user_date_id",
+    },
+    {
+        "name": "api_list_pending",
+        "source": "app/api.py:api_list_transactions",
+        "collection": "transactions",
+        "command": {"find": "transactions", "filter": {"user_id": SAMPLE_USER, "validated": False},
+                    "sort": {"date": -1, "_id": -1}, "limit": 50},
+        "index": ["user_pending_date_id", "user_date_id"],
+    },
+    {
+        "name": "sync_snapshot",
+        "source": "app/sync.py:get_changes",
+        "collection": "transactions",
+        "command": {"find": "transactions", "filter": {
+            "user_id": SAMPLE_USER,
+            "$or": [{"date": {"$lt": datetime(2025, 8, 15)}},
+                    {"date": datetime(2025, 8, 15), "_id": {"$lt": SAMPLE_USER}}]
+        }, "sort": {"date": -1, "_id": -1}, "limit": 501},
+        "index": "user_date_id",
+    },
+    {
+        "name": "sync_delta",
+        "source": "app/sync.py:get_changes",
+        "collection": "transactions",
+        "command": {"find": "transactions", "filter": {"user_id": SAMPLE_USER, "sync_version": {"$gt": 10, "$lte": 40}},
+                    "sort": {"sync_version": 1, "_id": 1}, "limit": 501},
+        "index": "user_sync_version_id",
+    },
+    {
+        "name": "sync_tombstones",
+        "source": "app/sync.py:get_changes",
+        "collection": "tombstones",
+        "command": {"find": "tombstones", "filter": {"user_id": SAMPLE_USER, "sync_version": {"$gt": 10, "$lte": 40}},
+                    "projection": {"sync_version": 1}, "sort": {"sync_version": 1, "_id": 1}, "limit": 501},
+        "index": "user_sync_version_id",
+    },
+    {
+        "name": "recurring_scan",
+        "source": "app/recurring.py:detect_recurring",
+        "collection": "transactions",
+        "command": {"find": "transactions", "filter": {"type": "gasto", "user_id": SAMPLE_USER,
+                                                        "merchant_key": {"$nin": [None, ""]}},
+                    "sort": {"user_id": 1, "merchant_key": 1, "date": 1}},
+        "index": "user_merchant_date",
+    },
+    {
+        "name": "transaction_by_owner",
+        "source": "app/routes.py:transaction_detail, app/transactions.py:owner_filter",
+        "collection": "transactions",
+        "command": {"find": "transactions", "filter": {"_id": SAMPLE_USER, "user_id": SAMPLE_USER}, "limit": 1},
+        "index": "_id_",
+    },
+]
+
+def ensure_indexes(db: Database):
+    """
+    Crea los índices de INDEX_SPECS y después elimina los obsoletos: mientras se construyen
+    los nuevos las consultas siguen usando los anteriores, y si una creación falla la
+    excepción corta antes de borrar nada
+    """
+    for collection_name, specs in INDEX_SPECS.items():
+        collection = db[collection_name]
+        for name, (keys, options) in specs.items():
+            collection.create_index(keys, name=name, **options)
+
+    for collection_name, names in OBSOLETE_INDEXES.items():
+        collection = db[collection_name]
+        existing = collection.index_information()
+        for name in names:
+            if name in existing:
+                collection.drop_index(name)
+                logger.info(f"Índice obsoleto eliminado: {collection_name}.{name}")
+
+def _find_key(document: Any, key: str) -> Iterator[Any]:
+    """Recorre un documento de explain buscando todas las apariciones de key"""
+    if isinstance(document, dict):
+        for k, v in document.items():
+            if k == key:
+                yield v
+            yield from _find_key(v, key)
+    elif isinstance(document, list):
+        for item in document:
+            yield from _find_key(item, key)
+
+def explain_shape(db: Database, shape: Dict[str, Any]) -> Dict[str, Any]:
+    """Ejecuta explain (executionStats) de una forma de consulta y resume el plan ganador"""
+    explain = db.command({"explain": shape["command"], "verbosity": "executionStats"})
+
+    winning_plans = list(_find_key(explain, "winningPlan"))
+    plans = [plan.get("queryPlan", plan) for plan in winning_plans]
+    stages = [stage for plan in plans for stage in _find_key(plan, "stage")]
+    indexes = {name for plan in plans for name in _find_key(plan, "indexName")}
+    if any(stage in ("IDHACK", "EXPRESS_IXSCAN") for stage in stages):
+        indexes.add("_id_")
+    indexes = sorted(indexes)
+    docs_examined = sum(_find_key(explain, "totalDocsExamined"))
+
+    expected = shape["index"] if isinstance(shape["index"], list) else [shape["index"]]
+    problems = []
+    if "COLLSCAN" in stages:
+        problems.append("recorre la colección completa")
+    if not any(name in indexes for name in expected):
+        problems.append(f"usa {indexes or 'ningún índice'} en vez de {expected}")
+    if "SORT" in stages:
+        problems.append("ordena en memoria")
+    if shape.get("covered") and docs_examined:
+        problems.append(f"no es cubierta ({docs_examined} documentos leídos)")
+
+    return {
+        "name": shape["name"],
+        "source": shape["source"],
+        "indexes": indexes,
+        "stages": stages,
+        "docs_examined": docs_examined,
+        "problems": problems,
+    }
+
+def verify_query_plans(db: Database) -> List[Dict[str, Any]]:
+    """Verifica con explain() que cada forma de consulta usa su índice"""
+    return [explain_shape(db, shape) for shape in QUERY_SHAPES]
+
+def _seed_sample(db: Database, count: int):
+    """Datos mínimos para que el planificador tenga documentos que recorrer"""
+    now = datetime(2025, 8, 31)
+    db.transactions.insert_many([
+        {"user_id": SAMPLE_USER if i % 2 else ObjectId(), "amount": float(i), "type": "gasto",
+         "category": "otros", "description": f"tx {i}", "merchant_key": f"comercio {i % 40}",
+         "origin": "tenpo", "validated": i % 3 == 0,
+         "date": now - timedelta(hours=i)}
+        for i in range(count)
+    ])
+
+if __name__ == "__main__":
+    from pymongo import MongoClient
+    from app.config import settings
+
+    parser = argparse.ArgumentParser(description="Crea y verifica los índices de MyBills")
+    parser.add_argument("--uri", default=settings.mongodb_uri, help="URI de MongoDB")
+    parser.add_argument("--verify", action="store_true", help="Verifica los planes en una base temporal")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    client = MongoClient(args.uri)
+    if not args.verify:
+        ensure_indexes(client[settings.database_name])
+        sys.exit(0)
+
+    scratch = client["mybills_index_check"]
+    client.drop_database(scratch.name)
+    try:
+        ensure_indexes(scratch)
+        _seed_sample(scratch, 5000)
+        report = verify_query_plans(scratch)
+    finally:
+        client.drop_database(scratch.name)
+
+    failures = [item for item in report if item["problems"]]
+    for item in report:
+        status = "FALLA" if item["problems"] else "ok"
+        print(f"[{status}] {item['name']} ({item['source']}): índices={item['indexes']} docs={item['docs_examined']}")
+        for problem in item["problems"]:
+            print(f"    - {problem}")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,75 @@
+from datetime import datetime
+from typing import Dict, Any
+from app.config import settings
+from app.database import get_database, get_read_database, causal_session
+from app.budgets import initialize_budget, month_key
+from app.cache import fragment_cache, fragment_key, get_data_version
+from app.indexes import ensure_indexes
+from app.recurring import detect_recurring
+from app.routes import dashboard_filter, get_dashboard_fragments
+from app.scheduler import Scheduler, IntervalTrigger, CronTrigger
+from app.sessions import session_registry
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Tareas periódicas: análisis pesados y mantenimiento fuera del camino de los requests
+
+def detect_recurring_job() -> Dict[str, int]:
+    """Recalcula los cobros recurrentes de todos los usuarios (el historial se lee según READ_PREFERENCE)"""
+    return detect_recurring(get_database(), read_db=get_read_database())
+
+def reconcile_budgets_job() -> Dict[str, int]:
+    """Recalcula desde las transacciones el gasto de los presupuestos del mes (corrige desvíos del $inc)"""
+    db = get_database()
+    month = month_key()
+    rebuilt = 0
+    for doc in db.budgets.find({"month": month}, {"user_id": 1}):
+        initialize_budget(db, doc["user_id"], month)
+        rebuilt += 1
+    return {"month": month, "budgets": rebuilt}
+
+def ensure_indexes_job() -> Dict[str, Any]:
+    """Crea índices faltantes y elimina los obsoletos"""
+    ensure_indexes(get_database())
+    return {"at": datetime.utcnow()}
+
+def warm_fragment_cache_job() -> Dict[str, int]:
+    """Precalcula los fragmentos del dashboard de los usuarios activos que no estén en cache"""
+    db = get_database()
+    warmed = 0
+    users = db.users.find({"is_active": True}, {"_id": 1}).limit(settings.cache_warm_users)
+    for user in users:
+        for view in ("monthly", "historical"):
+            base_filter, period = dashboard_filter(user["_id"], view)
+            key = fragment_key(str(user["_id"]), view, period, get_data_version(db, user["_id"]))
+            if fragment_cache.get(key) is None:
+                with causal_session() as session:
+                    get_dashboard_fragments(db, user["_id"], view, base_filter, period, get_read_database(), session)
+                warmed += 1
+    return {"warmed": warmed}
+
+def session_sync_job() -> Dict[str, int]:
+    """Sincroniza la tabla de sesiones en memoria de este worker"""
+    return session_registry.sync()
+
+def register_default_jobs(scheduler: Scheduler):
+    """Registra las tareas periódicas de la aplicación"""
+    scheduler.add_job("recurring", detect_recurring_job, CronTrigger(settings.recurring_schedule))
+    scheduler.add_job("budgets_reconcile", reconcile_budgets_job, CronTrigger(settings.budget_reconcile_schedule))
+    scheduler.add_job("indexes", ensure_indexes_job, CronTrigger(settings.index_maintenance_schedule))
+    # Con la cache en memoria cada worker calienta la suya; con el backend mongo basta uno
+    scheduler.add_job(
+        "cache_warm",
+        warm_fragment_cache_job,
+        IntervalTrigger(settings.cache_warm_interval),
+        exclusive=settings.fragment_cache_backend == "mongo"
+    )
+    if settings.session_mode == "stateless":
+        # Cada worker mantiene su propia tabla; sin scheduler se refresca en segundo plano al validar un token
+        scheduler.add_job(
+            "session_sync",
+            session_sync_job,
+            IntervalTrigger(settings.session_sync_interval),
+            exclusive=False
+        )
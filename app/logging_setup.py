@@ -0,0 +1,138 @@
+"""
+Configuración de logging sin escrituras bloqueantes en el event loop.
+
+Los loggers solo encolan el registro (QueueHandler); un thread de fondo (QueueListener)
+lo formatea y lo escribe en consola y en un archivo. La cola ordena las escrituras dentro
+de un proceso, pero no entre los workers de gunicorn/uvicorn, así que el archivo se maneja
+según LOG_ROTATION:
+- size: RotatingFileHandler por tamaño; con varios workers (WEB_CONCURRENCY > 1) cada proceso
+  escribe y rota su propio archivo (mybills.<pid>.log), porque dos procesos rotando el mismo
+  archivo se renombran mutuamente y pierden o duplican líneas
+- external: WatchedFileHandler sobre un archivo compartido, rotado por logrotate; cada proceso
+  reabre el archivo cuando detecta que fue movido
+Los niveles se ajustan por módulo con LOG_LEVELS, p. ej. "pymongo=WARNING,app.routes=DEBUG".
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, WatchedFileHandler
+from typing import Optional, Dict, TextIO
+from app.config import settings
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Atributos estándar de LogRecord; el resto viene de extra={...} y va al JSON
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_listener: Optional[QueueListener] = None
+
+class JsonFormatter(logging.Formatter):
+    """Un objeto JSON por línea, con los campos pasados en extra"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_FIELDS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler que solo resuelve el mensaje y el traceback antes de encolar;
+    el formato final lo aplica cada handler del listener
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+def parse_levels(spec: str) -> Dict[str, str]:
+    """Convierte "pymongo=WARNING,app.routes=DEBUG" en {"pymongo": "WARNING", ...}"""
+    levels = {}
+    for item in spec.split(","):
+        if "=" in item:
+            name, level = item.split("=", 1)
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+def server_workers() -> int:
+    return max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+
+def create_file_handler(log_file: str, rotation: str = None, workers: int = None) -> logging.Handler:
+    """Handler del archivo de log según LOG_ROTATION (ver docstring del módulo)"""
+    rotation = rotation or settings.log_rotation
+    if rotation == "external":
+        return WatchedFileHandler(log_file, encoding="utf-8")
+    if (workers or server_workers()) > 1:
+        root, ext = os.path.splitext(log_file)
+        log_file = f"{root}.{os.getpid()}{ext or '.log'}"
+    return RotatingFileHandler(
+        log_file, maxBytes=settings.log_max_bytes, backupCount=settings.log_backup_count, encoding="utf-8"
+    )
+
+def configure_logging(
+    level: Optional[str] = None,
+    log_file: Optional[str] = None,
+    json_format: Optional[bool] = None,
+    module_levels: Optional[Dict[str, str]] = None,
+    stream: Optional[TextIO] = None
+) -> QueueListener:
+    """Reemplaza los handlers del logger raíz por la cola y arranca el listener"""
+    global _listener
+    stop_logging()
+
+    level = level or settings.log_level
+    log_file = settings.log_file if log_file is None else log_file
+    json_format = settings.log_json if json_format is None else json_format
+    module_levels = parse_levels(settings.log_levels) if module_levels is None else module_levels
+
+    formatter = JsonFormatter() if json_format else logging.Formatter(TEXT_FORMAT)
+    handlers = [logging.StreamHandler(stream or sys.stderr)]
+    if log_file:
+        handlers.append(create_file_handler(log_file))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+    root.addHandler(DeferredQueueHandler(log_queue))
+    root.setLevel(level)
+
+    for name, module_level in module_levels.items():
+        logging.getLogger(name).setLevel(module_level)
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+def stop_logging():
+    """Detiene el listener escribiendo lo que quede en la cola"""
+    global _listener
+    if _listener:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+atexit.register(stop_logging)
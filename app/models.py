@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional, Dict, Any, Annotated
+from typing import Optional, Dict, Any, Annotated, List, Literal
 from pydantic import BaseModel, Field, ConfigDict, field_validator
 from bson import ObjectId
 import json
@@ -38,6 +38,8 @@ class User(BaseModel):
     email: str = Field(..., pattern=r'^[\w\.-]+@[\w\.-]+\.\w+$')
     created_at: datetime = Field(default_factory=datetime.utcnow)
     is_active: bool = Field(default=True)
+    # Se incrementa para invalidar todas las sesiones del usuario (ver app/sessions.py)
+    session_version: int = Field(default=0)
 
     @field_validator('id', mode='before')
     @classmethod
@@ -117,6 +119,42 @@ class Transaction(BaseModel):
         """Mantener compatibilidad con dict()"""
         return self.model_dump(**kwargs)
 
+class TransactionRow:
+    """
+    Fila de transacción de solo lectura para listas (dashboard, streaming).
+    Se construye directo desde el BSON proyectado, sin validación de Pydantic:
+    los documentos ya fueron validados al escribirse.
+    """
+    
+    __slots__ = ("id", "date", "type", "category", "description", "origin", "amount", "validated")
+    
+    # Proyección con los campos que usan las filas del dashboard
+    PROJECTION = {field: 1 for field in ("date", "type", "category", "description", "origin", "amount", "validated")}
+    
+    def __init__(self, id, date, type, category, description, origin, amount, validated):
+        self.id = id
+        self.date = date
+        self.type = type
+        self.category = category
+        self.description = description
+        self.origin = origin
+        self.amount = amount
+        self.validated = validated
+    
+    @classmethod
+    def from_bson(cls, doc: Dict[str, Any]) -> "TransactionRow":
+        """Crea la fila desde un documento de MongoDB proyectado con PROJECTION"""
+        get = doc.get
+        return cls(
+            str(doc["_id"]), get("date"), get("type"), get("category"),
+            get("description"), get("origin"), get("amount", 0), get("validated", False)
+        )
+    
+    @property
+    def _id(self) -> str:
+        """Alias usado por los templates (mismo nombre que en el documento)"""
+        return self.id
+
 class TransactionCreate(BaseModel):
     """Modelo para crear transacciones (sin campos auto-generados)"""
     
@@ -127,17 +165,21 @@ class TransactionCreate(BaseModel):
     date: Optional[datetime] = Field(None)
     origin: Optional[str] = Field(None)
     metadata_json: Optional[str] = Field(None, description="JSON string de metadata")
+    metadata: Optional[Dict[str, Any]] = Field(None, description="Metadata ya estructurada (parsers)")
 
-    def to_transaction(self, user_id: str) -> Transaction:
-        """Convierte a objeto Transaction completo"""
-        # Parsear metadata si existe
-        metadata = {}
+    def _metadata_dict(self) -> Dict[str, Any]:
+        """Metadata como dict: la estructurada tiene prioridad sobre el JSON string"""
+        if self.metadata is not None:
+            return self.metadata
         if self.metadata_json:
             try:
-                metadata = json.loads(self.metadata_json)
+                return json.loads(self.metadata_json)
             except json.JSONDecodeError:
-                metadata = {"raw": self.metadata_json}
-        
+                return {"raw": self.metadata_json}
+        return {}
+
+    def to_transaction(self, user_id: str) -> Transaction:
+        """Convierte a objeto Transaction completo"""
         return Transaction(
             user_id=user_id,
             amount=self.amount,
@@ -147,9 +189,103 @@ class TransactionCreate(BaseModel):
             date=self.date or datetime.now(),
             updated_at=datetime.now(),
             origin=self.origin,
-            metadata=metadata
+            metadata=self._metadata_dict()
         )
 
+    def to_document(self, user_id: Any) -> Dict[str, Any]:
+        """
+        Convierte directo a un documento listo para MongoDB, sin pasar por Transaction.
+        Equivale a to_transaction(user_id).model_dump(by_alias=True); acepta user_id
+        como ObjectId para no reconvertirlo en cada documento de un lote.
+        """
+        now = datetime.now()
+        return {
+            "_id": ObjectId(),
+            "user_id": user_id if isinstance(user_id, ObjectId) else ObjectId(user_id),
+            "amount": self.amount,
+            "type": self.type,
+            "category": self.category,
+            "description": self.description,
+            "date": self.date or now,
+            "origin": self.origin,
+            "validated": False,
+            "metadata": self._metadata_dict(),
+            "created_at": datetime.utcnow(),
+            "updated_at": now
+        }
+
+class TransactionAPICreate(BaseModel):
+    """Cuerpo JSON para crear transacciones desde la API"""
+    
+    amount: float = Field(..., gt=0)
+    type: str = Field(...)
+    category: Optional[str] = Field(None, max_length=100)
+    description: Optional[str] = Field(None, max_length=500)
+    date: Optional[datetime] = Field(None)
+    origin: Optional[str] = Field(None)
+    validated: bool = False
+    metadata: Dict[str, Any] = Field(default_factory=dict)
+
+class TransactionPatch(BaseModel):
+    """Cuerpo JSON para actualizar parcialmente una transacción desde la API"""
+    
+    amount: Optional[float] = Field(None, gt=0)
+    type: Optional[str] = Field(None)
+    category: Optional[str] = Field(None, max_length=100)
+    description: Optional[str] = Field(None, max_length=500)
+    date: Optional[datetime] = Field(None)
+    origin: Optional[str] = Field(None)
+    validated: Optional[bool] = Field(None)
+    metadata: Optional[Dict[str, Any]] = Field(None)
+
+    @field_validator('amount', 'type', 'date', 'validated', 'metadata', mode='before')
+    @classmethod
+    def reject_null(cls, v):
+        # Omitir el campo lo deja sin cambios; null no es un valor válido para estos campos
+        if v is None:
+            raise ValueError("no puede ser null")
+        return v
+
+class TransactionFilter(BaseModel):
+    """Filtro de transacciones para la API (listas y operaciones masivas)"""
+    
+    type: Optional[str] = None
+    category: Optional[str] = None
+    origin: Optional[str] = None
+    validated: Optional[bool] = None
+    date_from: Optional[datetime] = None
+    date_to: Optional[datetime] = None
+
+class BulkSelection(BaseModel):
+    """Selección de transacciones para una operación masiva: lista de ids o filtro"""
+    
+    ids: Optional[List[str]] = Field(None, max_length=1000)
+    filter: Optional[TransactionFilter] = None
+    category: Optional[str] = Field(None, max_length=100)
+
+class BulkOperation(BaseModel):
+    """Operación individual dentro de un bulk_write ordenado"""
+    
+    id: str
+    action: Literal["validate", "recategorize", "delete"]
+    category: Optional[str] = Field(None, max_length=100)
+
+class BulkOperations(BaseModel):
+    """Lista ordenada de operaciones heterogéneas"""
+    
+    operations: List[BulkOperation] = Field(..., max_length=1000)
+
+class EmailMessage(BaseModel):
+    """Email recibido para ser parseado como transacción"""
+    
+    subject: str = Field(..., min_length=1, max_length=1000)
+    body: str = Field(..., min_length=1, max_length=100_000)
+
+class EmailBatch(BaseModel):
+    """Lote de emails para importación masiva"""
+    
+    emails: List[EmailMessage] = Field(..., min_length=1, max_length=5000)
+
 class TransactionSummary(BaseModel):
     """Resumen de transacciones para el dashboard"""
     
@@ -1,5 +1,6 @@
 import re
 from datetime import datetime
+from itertools import islice
 from typing import Optional, Dict, Any
 from .models import TransactionCreate
 
@@ -12,6 +13,26 @@ class TenpoEmailParser:
         "fue exitosa"
     ]
     
+    # Los comprobantes reales ocupan ~1 KB; el resto (firmas, hilos reenviados) no se analiza
+    MAX_BODY_CHARS = 20000
+    
+    # Espacios horizontales consecutivos (sin saltos de línea)
+    HORIZONTAL_SPACE = re.compile(r'[^\S\r\n]+')
+    
+    # Patrón "comercio: NOMBRE_COMERCIO", de más a menos específico. El nombre siempre
+    # empieza con un carácter que no es espacio, para que el separador (\s*) y el nombre
+    # no compitan por los mismos espacios, y su largo está acotado
+    MERCHANT_LABEL = re.compile(r'comercio:', re.IGNORECASE)
+    MAX_MERCHANT_LABELS = 20
+    MERCHANT_PATTERNS = [
+        re.compile(p, re.IGNORECASE) for p in (
+            r'comercio:\s*(\S[^\n\r]{0,200}?)(?:\s+cuotas:|$)',  # Buscar hasta "cuotas:" o fin
+            r'comercio:\s+([^0-9\s][^0-9\n\r]{0,200}?)(?:\s+\d|$)',    # Buscar hasta número o fin
+            r'comercio:\s*(\S[^\n\r]{2,49}?)(?:\s+cuotas|\s+fecha|$)',  # Más específico
+            r'comercio:\s*([a-zA-Z][a-zA-Z\s]{0,200}[a-zA-Z])',       # Solo letras y espacios
+        )
+    ]
+    
     @classmethod
     def can_parse(cls, subject: str, body: str) -> bool:
         """Verifica si el email es un comprobante de Tenpo"""
@@ -25,6 +46,7 @@ class TenpoEmailParser:
             return None
         
         try:
+            body = cls._normalize_body(body)
 
             # Extraer monto
             amount = cls._extract_amount(body)
@@ -51,13 +73,22 @@ class TenpoEmailParser:
                 description=description or "Compra con tarjeta Tenpo",
                 date=transaction_date,
                 origin="tenpo",
-                metadata_json=str(metadata) if metadata else None
+                metadata=metadata
             )
         
         except Exception as e:
             print(f"Error parsing Tenpo email: {e}")
             return None
 
+    @classmethod
+    def _normalize_body(cls, body: str) -> str:
+        """
+        Acota el tamaño del cuerpo y colapsa espacios repetidos.
+        Los patrones de comercio aceptan espacios tanto en el separador como en el
+        nombre, y con secuencias largas de espacios el backtracking crece de forma cúbica.
+        """
+        return cls.HORIZONTAL_SPACE.sub(" ", body[:cls.MAX_BODY_CHARS])
+    
     @classmethod
     def _determine_category(cls, merchant_name: str) -> str:
         """Determina la categoría basándose en el nombre del comercio"""
@@ -162,23 +193,21 @@ class TenpoEmailParser:
     @classmethod
     def _extract_merchant(cls, body: str) -> Optional[str]:
             """Extrae el nombre del comercio"""
-            # Buscar patrón "comercio: NOMBRE_COMERCIO" con más flexibilidad
-            patterns = [
-                r'comercio:\s*([^\n\r]+?)(?:\s+cuotas:|$)',  # Buscar hasta "cuotas:" o fin
-                r'comercio:\s+([^0-9\n\r]+?)(?:\s+\d|$)',    # Buscar hasta número o fin
-                r'comercio:\s*([^\n\r]{3,50}?)(?:\s+cuotas|\s+fecha|$)',  # Más específico
-                r'comercio:\s*([a-zA-Z\s]+[a-zA-Z]+)',       # Solo letras y espacios
-            ]
+            # Se prueba cada patrón en las primeras apariciones de "comercio:", en orden
+            label_positions = [m.start() for m in islice(cls.MERCHANT_LABEL.finditer(body), cls.MAX_MERCHANT_LABELS)]
             
-            for pattern in patterns:
-                match = re.search(pattern, body, re.IGNORECASE)
-                if match:
+            for pattern in cls.MERCHANT_PATTERNS:
+                for position in label_positions:
+                    match = pattern.match(body, position)
+                    if not match:
+                        continue
                     merchant = match.group(1).strip()
                     # Limpiar caracteres extraños y normalizar espacios
                     merchant = re.sub(r'\s+', ' ', merchant)
                     merchant = re.sub(r'[^\w\s\-]', '', merchant)  # Remover caracteres especiales
                     if len(merchant) > 3:  # Validar que tenga contenido útil
                         return merchant[:200] if len(merchant) > 200 else merchant
+                    break
             
             return None
 
@@ -0,0 +1,104 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, List, Tuple
+from app.config import settings
+from app.models import TransactionCreate
+from app.parsers import TenpoEmailParser
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Parsers disponibles, en orden de prioridad
+EMAIL_PARSERS = [TenpoEmailParser]
+
+Email = Tuple[str, str]
+
+def parse_email(subject: str, body: str) -> Optional[TransactionCreate]:
+    """Intenta parsear un email con cada parser registrado"""
+    for parser in EMAIL_PARSERS:
+        if parser.can_parse(subject, body):
+            transaction_data = parser.parse(subject, body)
+            if transaction_data:
+                return transaction_data
+    return None
+
+def parse_chunk(emails: List[Email]) -> List[Optional[TransactionCreate]]:
+    """Parsea un bloque de emails dentro de un worker (una sola ida y vuelta de pickle)"""
+    return [parse_email(subject, body) for subject, body in emails]
+
+class ParsingPool:
+    """
+    Servicio de parseo de emails sobre un ProcessPoolExecutor.
+    El parseo es trabajo de CPU con regex; en un proceso aparte no bloquea el event loop
+    ni queda limitado a un núcleo. Los emails sueltos se parsean inline; los lotes chicos,
+    o todos si el pool está deshabilitado o falla, en el threadpool para no frenar a los
+    demás requests.
+    """
+
+    def __init__(self, workers: int = 0, chunk_size: int = 64):
+        self.workers = workers
+        self.chunk_size = max(1, chunk_size)
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def active(self) -> bool:
+        return self._executor is not None
+
+    def start(self):
+        """Levanta los procesos del pool (workers=0 deja todo el parseo inline)"""
+        if self.workers <= 0 or self._executor:
+            return
+        self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        logger.info(f"Pool de parseo iniciado con {self.workers} workers")
+
+    def shutdown(self):
+        """Detiene el pool esperando las tareas en curso"""
+        if self._executor:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+            logger.info("Pool de parseo detenido")
+
+    def _disable(self, error: Exception):
+        logger.error(f"Pool de parseo no disponible, se parseará inline: {error}")
+        executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    async def parse(self, subject: str, body: str) -> Optional[TransactionCreate]:
+        """
+        Parsea un email inline: el regex toma decenas de microsegundos, menos que la ida
+        y vuelta a otro proceso. El pool queda para los lotes (parse_batch)
+        """
+        return parse_email(subject, body)
+
+    async def parse_batch(self, emails: List[Email]) -> List[Optional[TransactionCreate]]:
+        """Parsea una lista de emails en bloques de chunk_size repartidos entre los workers"""
+        if not self.active or len(emails) <= self.chunk_size:
+            return await asyncio.to_thread(parse_chunk, emails)
+
+        loop = asyncio.get_running_loop()
+        chunks = [emails[i:i + self.chunk_size] for i in range(0, len(emails), self.chunk_size)]
+        try:
+            results = await asyncio.gather(*(
+                loop.run_in_executor(self._executor, parse_chunk, chunk) for chunk in chunks
+            ))
+        except BrokenProcessPool as e:
+            self._disable(e)
+            return await asyncio.to_thread(parse_chunk, emails)
+        return [item for chunk in results for item in chunk]
+
+def _default_workers() -> int:
+    # -1 reparte los núcleos del host entre los workers del servidor (WEB_CONCURRENCY),
+    # así cada proceso de gunicorn/uvicorn no levanta un pool del tamaño de la máquina
+    if settings.parser_workers >= 0:
+        return settings.parser_workers
+    server_workers = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+    return max(1, (os.cpu_count() or 1) // server_workers)
+
+# Instancia global del pool de parseo
+parsing_pool = ParsingPool(
+    workers=_default_workers(),
+    chunk_size=settings.parser_chunk_size
+)
@@ -0,0 +1,260 @@
+"""
+Perfilado estadístico de requests bajo demanda.
+
+ProfilingMiddleware muestrea cada PROFILE_INTERVAL_MS, mientras se procesa el request
+(incluido el envío de respuestas en streaming), el stack del event loop y el de los threads
+del threadpool que están ejecutando trabajo: endpoints síncronos, asyncio.to_thread y el
+render de templates en streaming corren ahí, no en el event loop.
+Se activa con el header X-Profile: 1 junto al X-Admin-Token, o al azar con
+PROFILE_SAMPLE_RATE. Cada perfil se guarda en PROFILE_DIR como:
+- <id>.folded: stacks en formato "folded" (flamegraph.pl, speedscope, inferno)
+- <id>.json: metadatos y el reparto del tiempo entre MongoDB, render de templates y Python
+
+Como el event loop y el threadpool son compartidos, las muestras pueden incluir trabajo de
+otros requests concurrentes; con un solo request en curso el perfil es exacto.
+"""
+import asyncio
+import hmac
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Tuple
+from app.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+PROFILE_ID = re.compile(r"^[0-9a-f]{32}$")
+MAX_DEPTH = 128
+
+# Clasificación de cada muestra según los módulos presentes en el stack
+MONGO_MARKERS = (f"{os.sep}pymongo{os.sep}", f"{os.sep}bson{os.sep}", f"{os.sep}mongomock{os.sep}")
+RENDER_MARKERS = (f"{os.sep}jinja2{os.sep}", ".html")
+
+# Bucles de los threads del threadpool (anyio para to_thread/endpoints síncronos, y el
+# executor por defecto de asyncio); lo que cuelga de ellos es trabajo de un request
+WORKER_LOOPS = (
+    ("run", os.path.join("anyio", "_backends", "_asyncio.py")),
+    ("_worker", os.path.join("concurrent", "futures", "thread.py")),
+)
+
+Frame = Tuple[str, str, int]
+Stack = Tuple[Frame, ...]
+
+def is_loop_waiting(stack: Stack) -> bool:
+    """El event loop está esperando I/O o a un thread (bloqueado en el selector)"""
+    return bool(stack) and stack[-1][0] == "select" and stack[-1][1].endswith("selectors.py")
+
+def is_busy_worker(stack: Stack) -> bool:
+    """Un thread del threadpool ejecutando una tarea (no esperando en su cola)"""
+    for index, (name, filename, _) in enumerate(stack):
+        if any(name == loop_name and filename.endswith(loop_file) for loop_name, loop_file in WORKER_LOOPS):
+            task = stack[index + 1:]
+            return bool(task) and not task[0][1].endswith("queue.py")
+    return False
+
+def classify_stack(stack: Stack) -> str:
+    """
+    wait si el event loop espera sin trabajo en el threadpool, mongo si hay un frame del
+    driver, render si hay uno de Jinja2 o de un template, si no python
+    """
+    if is_loop_waiting(stack):
+        return "wait"
+    filenames = [filename for _, filename, _ in stack]
+    if any(marker in filename for filename in filenames for marker in MONGO_MARKERS):
+        return "mongo"
+    if any(marker in filename for filename in filenames for marker in RENDER_MARKERS):
+        return "render"
+    return "python"
+
+class StackSampler:
+    """Muestrea periódicamente, desde un thread aparte, el event loop y los threads del threadpool ocupados"""
+
+    def __init__(self, loop_thread_id: int, interval: float):
+        self.loop_thread_id = loop_thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample(sys._current_frames())
+
+    def sample(self, frames: Dict[int, Any]):
+        """Registra una muestra a partir de sys._current_frames()"""
+        loop_stack = None
+        workers: List[Stack] = []
+        for thread_id, frame in frames.items():
+            if thread_id == self._thread.ident:
+                continue
+            stack = extract_stack(frame)
+            if thread_id == self.loop_thread_id:
+                loop_stack = stack
+            elif is_busy_worker(stack):
+                workers.append(stack)
+        # Mientras el loop espera a un thread ocupado, ese tiempo se cuenta en el thread
+        if loop_stack is not None and not (workers and is_loop_waiting(loop_stack)):
+            workers.append(loop_stack)
+        for stack in workers:
+            self.stacks[stack] += 1
+            self.samples += 1
+
+def extract_stack(frame) -> Stack:
+    """Stack de raíz a hoja, acotado a MAX_DEPTH frames"""
+    stack: List[Frame] = []
+    while frame is not None and len(stack) < MAX_DEPTH:
+        code = frame.f_code
+        stack.append((code.co_name, code.co_filename, frame.f_lineno))
+        frame = frame.f_back
+    return tuple(reversed(stack))
+
+def folded_stacks(stacks: Counter) -> str:
+    """Formato folded: "raiz;...;hoja cantidad" por línea"""
+    lines = []
+    for stack, count in stacks.most_common():
+        frames = ";".join(f"{name} ({os.path.basename(filename)}:{line})" for name, filename, line in stack)
+        lines.append(f"{frames} {count}")
+    return "\n".join(lines) + "\n"
+
+def breakdown(stacks: Counter, duration_ms: float) -> Dict[str, Dict[str, float]]:
+    """Reparte la duración del request entre mongo, render, python y espera según las muestras"""
+    counts: Counter = Counter()
+    for stack, count in stacks.items():
+        counts[classify_stack(stack)] += count
+    total = sum(counts.values())
+    return {
+        category: {
+            "samples": counts[category],
+            "percent": round(100 * counts[category] / total, 1) if total else 0.0,
+            "ms": round(duration_ms * counts[category] / total, 1) if total else 0.0,
+        }
+        for category in ("mongo", "render", "python", "wait")
+    }
+
+class ProfileStore:
+    """Perfiles guardados en un directorio local, acotados a max_files"""
+
+    def __init__(self, directory: str, max_files: int = 200):
+        self.directory = directory
+        self.max_files = max_files
+
+    def save(self, profile_id: str, meta: Dict[str, Any], folded: str):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, f"{profile_id}.folded"), "w", encoding="utf-8") as f:
+            f.write(folded)
+        with open(os.path.join(self.directory, f"{profile_id}.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, default=str, ensure_ascii=False, indent=2)
+        self._prune()
+
+    def _prune(self):
+        metas = sorted(
+            (entry for entry in os.scandir(self.directory) if entry.name.endswith(".json")),
+            key=lambda entry: entry.stat().st_mtime
+        )
+        for entry in metas[:max(0, len(metas) - self.max_files)]:
+            profile_id = entry.name[:-5]
+            for suffix in (".json", ".folded"):
+                try:
+                    os.remove(os.path.join(self.directory, profile_id + suffix))
+                except FileNotFoundError:
+                    pass
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Metadatos de los perfiles, del más reciente al más antiguo"""
+        if not os.path.isdir(self.directory):
+            return []
+        metas = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".json"):
+                with open(entry.path, encoding="utf-8") as f:
+                    metas.append(json.load(f))
+        return sorted(metas, key=lambda meta: meta["started_at"], reverse=True)
+
+    def path(self, profile_id: str, suffix: str) -> Optional[str]:
+        """Ruta de un archivo del perfil, o None si el id no es válido o no existe"""
+        if not PROFILE_ID.match(profile_id):
+            return None
+        path = os.path.join(self.directory, f"{profile_id}{suffix}")
+        return path if os.path.exists(path) else None
+
+class ProfilingMiddleware:
+    """Middleware ASGI que perfila los requests pedidos por un administrador o elegidos al azar"""
+
+    def __init__(self, app, store: "ProfileStore" = None, sample_rate: float = None, interval_ms: float = None):
+        self.app = app
+        self.store = store or profile_store
+        self.sample_rate = settings.profile_sample_rate if sample_rate is None else sample_rate
+        self.interval = (interval_ms or settings.profile_interval_ms) / 1000
+
+    def _trigger(self, scope) -> Optional[str]:
+        headers = dict(scope.get("headers") or [])
+        if headers.get(b"x-profile") == b"1" and settings.admin_token:
+            token = headers.get(b"x-admin-token", b"")
+            if hmac.compare_digest(token, settings.admin_token.encode()):
+                return "header"
+        if self.sample_rate and random.random() < self.sample_rate:
+            return "sample"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        trigger = self._trigger(scope)
+        if not trigger:
+            return await self.app(scope, receive, send)
+
+        profile_id = uuid.uuid4().hex
+        status = {"code": None}
+
+        async def send_with_header(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                message = {**message, "headers": list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode())]}
+            await send(message)
+
+        sampler = StackSampler(threading.get_ident(), self.interval)
+        started_at = datetime.utcnow()
+        start = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_header)
+        finally:
+            sampler.stop()
+            duration_ms = (time.perf_counter() - start) * 1000
+            meta = {
+                "id": profile_id,
+                "trigger": trigger,
+                "method": scope.get("method"),
+                "path": scope.get("path"),
+                "query": (scope.get("query_string") or b"").decode("latin-1"),
+                "status": status["code"],
+                "started_at": started_at,
+                "duration_ms": round(duration_ms, 1),
+                "interval_ms": self.interval * 1000,
+                "samples": sampler.samples,
+                "breakdown": breakdown(sampler.stacks, duration_ms),
+            }
+            try:
+                await asyncio.to_thread(self.store.save, profile_id, meta, folded_stacks(sampler.stacks))
+                logger.info(f"Perfil {profile_id} de {meta['method']} {meta['path']}: {meta['duration_ms']} ms")
+            except Exception as e:
+                logger.error(f"No se pudo guardar el perfil {profile_id}: {e}")
+
+# Instancia global del almacén de perfiles
+profile_store = ProfileStore(settings.profile_dir, settings.profile_max_files)
@@ -0,0 +1,174 @@
+"""
+Límite de intentos fallidos de login con ventana deslizante, por usuario y por IP.
+
+Se consulta antes de buscar el usuario y de verificar bcrypt, así una ráfaga de
+credential stuffing se rechaza con 429 sin gastar CPU. Solo cuentan los intentos
+fallidos: los logins correctos no gastan el cupo de la IP (que detrás de un NAT o
+de un proxy sin --proxy-headers es compartida por muchos usuarios). Dos backends:
+- memory: registro exacto de los intentos por clave en cada worker (LRU acotada)
+- mongo: contador compartido entre workers, con ventana deslizante aproximada
+  (ventana actual + fracción de la anterior) en la colección rate_limits con TTL
+"""
+import math
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta
+from threading import Lock
+from typing import Optional, List
+from app.config import settings
+from app.database import get_database
+import logging
+
+logger = logging.getLogger(__name__)
+
+class MemoryRateLimitBackend:
+    """Timestamps de los últimos intentos por clave, en memoria del worker"""
+
+    def __init__(self, max_keys: int = 10000):
+        self.max_keys = max_keys
+        self._attempts: "OrderedDict[str, deque]" = OrderedDict()
+        self._lock = Lock()
+
+    def retry_after(self, keys: List[str], limits: List[int], window: float) -> Optional[float]:
+        """Segundos de espera si alguna clave llegó a su límite, o None"""
+        now = time.monotonic()
+        with self._lock:
+            retry_after = 0.0
+            for key, limit in zip(keys, limits):
+                attempts = self._attempts.get(key)
+                if attempts is None:
+                    continue
+                while attempts and attempts[0] <= now - window:
+                    attempts.popleft()
+                if len(attempts) >= limit:
+                    retry_after = max(retry_after, attempts[0] + window - now)
+        return retry_after or None
+
+    def record(self, keys: List[str], limits: List[int], window: float):
+        """Registra un intento en todas las claves"""
+        now = time.monotonic()
+        with self._lock:
+            for key, limit in zip(keys, limits):
+                attempts = self._attempts.get(key)
+                if attempts is None:
+                    attempts = self._attempts[key] = deque(maxlen=limit)
+                attempts.append(now)
+                self._attempts.move_to_end(key)
+            while len(self._attempts) > self.max_keys:
+                self._attempts.popitem(last=False)
+
+    def reset(self, key: str, window: float):
+        with self._lock:
+            self._attempts.pop(key, None)
+
+class MongoRateLimitBackend:
+    """Contadores por ventana fija en MongoDB, combinados como ventana deslizante"""
+
+    def __init__(self, collection_name: str = "rate_limits"):
+        self.collection_name = collection_name
+
+    @property
+    def collection(self):
+        return get_database()[self.collection_name]
+
+    def retry_after(self, keys: List[str], limits: List[int], window: float) -> Optional[float]:
+        now = time.time()
+        index = int(now // window)
+        elapsed = (now % window) / window
+        counts = {
+            doc["_id"]: doc["count"]
+            for doc in self.collection.find(
+                {"_id": {"$in": [f"{key}:{i}" for key in keys for i in (index - 1, index)]}}, {"count": 1}
+            )
+        }
+
+        retry_after = 0.0
+        for key, limit in zip(keys, limits):
+            previous = counts.get(f"{key}:{index - 1}", 0)
+            estimate = previous * (1 - elapsed) + counts.get(f"{key}:{index}", 0)
+            if estimate >= limit:
+                # Espera hasta que el peso de la ventana anterior baje lo suficiente (o empiece otra)
+                wait = (1 - elapsed) * window
+                if previous:
+                    wait = min(wait, (estimate - limit + 1) / previous * window)
+                retry_after = max(retry_after, wait)
+        return retry_after or None
+
+    def record(self, keys: List[str], limits: List[int], window: float):
+        index = int(time.time() // window)
+        expires_at = datetime.utcnow() + timedelta(seconds=2 * window)
+        for key in keys:
+            self.collection.update_one(
+                {"_id": f"{key}:{index}"},
+                {"$inc": {"count": 1}, "$setOnInsert": {"expires_at": expires_at}},
+                upsert=True
+            )
+
+    def reset(self, key: str, window: float):
+        index = int(time.time() // window)
+        self.collection.delete_many({"_id": {"$in": [f"{key}:{index - 1}", f"{key}:{index}"]}})
+
+class LoginRateLimiter:
+    """Límite de intentos fallidos de login por usuario y por IP de origen"""
+
+    def __init__(
+        self,
+        per_username: int = None,
+        per_ip: int = None,
+        window: float = None,
+        backend=None
+    ):
+        self.per_username = per_username or settings.login_limit_per_username
+        self.per_ip = per_ip or settings.login_limit_per_ip
+        self.window = window or settings.login_limit_window
+        self.backend = backend or MemoryRateLimitBackend()
+        self.rejected = 0
+
+    @staticmethod
+    def username_key(username: str) -> str:
+        return f"login:user:{username.strip().lower()}"
+
+    @staticmethod
+    def ip_key(ip: Optional[str]) -> str:
+        return f"login:ip:{ip or 'unknown'}"
+
+    def check(self, username: str, ip: Optional[str]) -> Optional[int]:
+        """
+        Retorna None si se permite el intento, o los segundos (Retry-After) que hay que
+        esperar si el usuario o la IP ya acumulan el máximo de intentos fallidos
+        """
+        keys = [self.username_key(username), self.ip_key(ip)]
+        try:
+            retry_after = self.backend.retry_after(keys, [self.per_username, self.per_ip], self.window)
+        except Exception as e:
+            # Si el backend compartido falla no se bloquea el login
+            logger.warning(f"Error consultando el límite de intentos de login: {e}")
+            return None
+        if retry_after is None:
+            return None
+        self.rejected += 1
+        logger.warning(f"Intentos de login limitados para {username!r} desde {ip}")
+        return max(1, math.ceil(retry_after))
+
+    def record_failure(self, username: str, ip: Optional[str]):
+        """Cuenta un intento fallido para el usuario y para la IP"""
+        keys = [self.username_key(username), self.ip_key(ip)]
+        try:
+            self.backend.record(keys, [self.per_username, self.per_ip], self.window)
+        except Exception as e:
+            logger.warning(f"Error registrando un intento de login fallido: {e}")
+
+    def reset(self, username: str):
+        """Limpia el contador del usuario tras un login exitoso"""
+        try:
+            self.backend.reset(self.username_key(username), self.window)
+        except Exception as e:
+            logger.warning(f"Error limpiando el límite de intentos de login: {e}")
+
+def _create_backend():
+    if settings.login_limit_backend == "mongo":
+        return MongoRateLimitBackend()
+    return MemoryRateLimitBackend(max_keys=settings.login_limit_max_keys)
+
+# Instancia global del limitador de login
+login_rate_limiter = LoginRateLimiter(backend=_create_backend())
@@ -0,0 +1,224 @@
+"""
+Detección de cobros recurrentes (suscripciones) sobre el historial de transacciones.
+
+Recorre los gastos ordenados por (user_id, merchant_key, date) con un solo cursor.
+Solo mantiene en memoria el grupo del comercio actual, acotado a sus últimos
+RECURRING_WINDOW cobros. Al cambiar de grupo evalúa la periodicidad y guarda el
+resultado en la colección recurring.
+
+Uso:
+    python -m app.recurring                 # todos los usuarios
+    python -m app.recurring --user <id>     # un usuario
+"""
+import argparse
+import re
+import statistics
+import unicodedata
+import uuid
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, List, Iterator, Tuple
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.database import Database
+from app.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Periodos reconocidos: nombre -> (días, tolerancia en días)
+PERIODS = {
+    "semanal": (7, 1),
+    "quincenal": (14, 2),
+    "mensual": (30, 4),
+    "bimestral": (61, 5),
+    "trimestral": (91, 7),
+    "anual": (365, 12),
+}
+
+# Palabras que no distinguen comercios (sufijos legales, dominios, prefijos de pasarelas)
+MERCHANT_STOPWORDS = {"www", "com", "cl", "spa", "ltda", "sa", "eirl", "inc", "llc", "pago", "compra"}
+NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+# Migración única: desde que insert/update_transaction calculan merchant_key, solo los
+# documentos anteriores al campo lo necesitan; terminada, queda registrada en migrations
+MERCHANT_KEY_MIGRATION = "merchant_key_backfill"
+
+RECURRING_PROJECTION = {"user_id": 1, "merchant_key": 1, "date": 1, "amount": 1, "description": 1, "category": 1}
+
+def normalize_merchant(description: Optional[str]) -> Optional[str]:
+    """
+    Clave estable de comercio: sin tildes, minúsculas, sin números ni palabras genéricas.
+    "NETFLIX.COM" -> "netflix", "Uber *Trip 4821" -> "uber trip"
+    """
+    if not description:
+        return None
+    text = unicodedata.normalize("NFKD", description).encode("ascii", "ignore").decode().lower()
+    tokens = [
+        token for token in NON_ALNUM.split(text)
+        if token and not any(char.isdigit() for char in token) and token not in MERCHANT_STOPWORDS
+    ]
+    return " ".join(tokens[:4]) or None
+
+def backfill_merchant_keys(db: Database, batch_size: int = 1000) -> int:
+    """
+    Calcula merchant_key para las transacciones escritas antes de que existiera el campo.
+    Corre una sola vez: la consulta no tiene índice, así que al terminar se registra en
+    migrations y las siguientes llamadas solo leen ese documento
+    """
+    if db.migrations.find_one({"_id": MERCHANT_KEY_MIGRATION}, {"_id": 1}):
+        return 0
+    updated = 0
+    batch = []
+    # Todos los tipos: un ingreso antiguo puede pasar a gasto con un PATCH que no toca la descripción
+    cursor = db.transactions.find(
+        {"merchant_key": {"$exists": False}}, {"description": 1}
+    ).batch_size(batch_size)
+    for doc in cursor:
+        batch.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"merchant_key": normalize_merchant(doc.get("description"))}}))
+        if len(batch) >= batch_size:
+            updated += db.transactions.bulk_write(batch, ordered=False).modified_count
+            batch = []
+    if batch:
+        updated += db.transactions.bulk_write(batch, ordered=False).modified_count
+    db.migrations.update_one(
+        {"_id": MERCHANT_KEY_MIGRATION},
+        {"$set": {"completed_at": datetime.utcnow(), "updated": updated}},
+        upsert=True
+    )
+    logger.info(f"Migración {MERCHANT_KEY_MIGRATION} completada: merchant_key calculado para {updated} transacciones")
+    return updated
+
+def classify_period(intervals: List[float]) -> Optional[Tuple[str, int, float]]:
+    """Retorna (periodo, días, fracción de intervalos que calzan) si los intervalos son periódicos"""
+    if not intervals:
+        return None
+    median = statistics.median(intervals)
+    for name, (days, tolerance) in PERIODS.items():
+        if abs(median - days) <= tolerance:
+            matching = sum(1 for interval in intervals if abs(interval - days) <= tolerance * 1.5)
+            return name, days, matching / len(intervals)
+    return None
+
+def evaluate_group(charges: deque, occurrences: int, now: datetime) -> Optional[Dict[str, Any]]:
+    """Evalúa si los cobros de un comercio (ordenados por fecha) forman un cobro recurrente"""
+    if occurrences < settings.recurring_min_occurrences or len(charges) < settings.recurring_min_occurrences:
+        return None
+
+    dates = [charge["date"] for charge in charges]
+    intervals = [(later - earlier).total_seconds() / 86400 for earlier, later in zip(dates, dates[1:])]
+    period = classify_period(intervals)
+    if not period:
+        return None
+    name, days, regularity = period
+
+    amounts = [float(charge.get("amount") or 0) for charge in charges]
+    typical = statistics.median(amounts)
+    stable = sum(1 for amount in amounts if abs(amount - typical) <= typical * settings.recurring_amount_tolerance)
+    amount_stability = stable / len(amounts)
+
+    confidence = round(regularity * amount_stability, 3)
+    if confidence < settings.recurring_min_confidence:
+        return None
+
+    last = charges[-1]
+    next_expected = last["date"] + timedelta(days=days)
+    return {
+        "period": name,
+        "interval_days": days,
+        "amount": round(float(last.get("amount") or 0), 2),
+        "typical_amount": round(typical, 2),
+        "occurrences": occurrences,
+        "last_seen": last["date"],
+        "next_expected": next_expected,
+        "active": now <= next_expected + timedelta(days=days // 2),
+        "confidence": confidence,
+        "description": last.get("description"),
+        "category": last.get("category"),
+    }
+
+def _grouped_charges(cursor) -> Iterator[Tuple[Tuple[Any, str], deque, int, datetime]]:
+    """Agrupa un cursor ordenado por (user_id, merchant_key, date) sin materializarlo"""
+    key = None
+    charges: deque = deque(maxlen=settings.recurring_window)
+    occurrences = 0
+    first_seen = None
+    for doc in cursor:
+        doc_key = (doc["user_id"], doc["merchant_key"])
+        if doc_key != key:
+            if key is not None:
+                yield key, charges, occurrences, first_seen
+            key = doc_key
+            charges = deque(maxlen=settings.recurring_window)
+            occurrences = 0
+            first_seen = doc["date"]
+        charges.append(doc)
+        occurrences += 1
+    if key is not None:
+        yield key, charges, occurrences, first_seen
+
+def detect_recurring(
+    db: Database,
+    user_id: Optional[str] = None,
+    batch_size: int = 500,
+    read_db: Optional[Database] = None
+) -> Dict[str, int]:
+    """
+    Detecta cobros recurrentes de un usuario (o de todos) y materializa el resultado en recurring.
+    Los documentos de corridas anteriores que ya no se detectan se eliminan.
+    El historial se puede leer de read_db (p. ej. un secundario); las escrituras van a db.
+    """
+    backfill_merchant_keys(db)
+
+    query: Dict[str, Any] = {"type": "gasto", "merchant_key": {"$nin": [None, ""]}}
+    scope: Dict[str, Any] = {}
+    if user_id:
+        query["user_id"] = scope["user_id"] = ObjectId(str(user_id))
+
+    run_id = uuid.uuid4().hex
+    now = datetime.now()
+    cursor = (
+        (db if read_db is None else read_db).transactions.find(query, RECURRING_PROJECTION)
+        .sort([("user_id", 1), ("merchant_key", 1), ("date", 1)])
+        .batch_size(batch_size)
+    )
+
+    stats = {"groups": 0, "recurring": 0}
+    pending: List[UpdateOne] = []
+    for (owner, merchant), charges, occurrences, first_seen in _grouped_charges(cursor):
+        stats["groups"] += 1
+        result = evaluate_group(charges, occurrences, now)
+        if not result:
+            continue
+        stats["recurring"] += 1
+        pending.append(UpdateOne(
+            {"_id": f"{owner}:{merchant}"},
+            {"$set": {**result, "user_id": owner, "merchant_key": merchant, "first_seen": first_seen,
+                      "run_id": run_id, "updated_at": datetime.utcnow()}},
+            upsert=True
+        ))
+        if len(pending) >= batch_size:
+            db.recurring.bulk_write(pending, ordered=False)
+            pending = []
+    if pending:
+        db.recurring.bulk_write(pending, ordered=False)
+
+    stats["removed"] = db.recurring.delete_many({**scope, "run_id": {"$ne": run_id}}).deleted_count
+    logger.info(f"Cobros recurrentes: {stats['recurring']} de {stats['groups']} comercios ({stats['removed']} eliminados)")
+    return stats
+
+def get_recurring(db: Database, user_id: Any, active_only: bool = True) -> List[Dict[str, Any]]:
+    """Cobros recurrentes materializados de un usuario, ordenados por próxima fecha esperada"""
+    query: Dict[str, Any] = {"user_id": ObjectId(str(user_id))}
+    if active_only:
+        query["active"] = True
+    return list(db.recurring.find(query).sort("next_expected", 1))
+
+if __name__ == "__main__":
+    from app.database import get_database
+
+    parser = argparse.ArgumentParser(description="Detecta cobros recurrentes en el historial de transacciones")
+    parser.add_argument("--user", help="Id del usuario (por defecto todos)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    print(detect_recurring(get_database(), args.user))
@@ -1,42 +1,32 @@
 from fastapi import FastAPI, Request, Form, Depends, HTTPException, status
-from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
+from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse
 from datetime import datetime
 from bson import ObjectId
+import asyncio
+import json
 import logging
 
 from typing import Optional
 
 from app.config import settings, TRANSACTION_TYPES, TRANSACTION_ORIGINS, COMMON_CATEGORIES
-from app.database import get_database, verify_collection_connection
-from app.models import Transaction, TransactionSummary, User
+from app.database import get_database, get_read_database, start_causal_session, iterate_in_session
+from app.models import Transaction, TransactionSummary, TransactionRow, User, EmailBatch
 from app.auth import auth_manager, get_current_user
-from app.utils import (
-    format_currency, format_datetime, format_date, humanize_origin,
-    humanize_category, humanize_transaction_type, get_transaction_type_color,
-    get_transaction_type_icon, validate_metadata_json, paginate_list,
-    get_current_month_name
-)
+from app.api import require_api_user
+from app.cache import fragment_cache, fragment_key, get_data_version
+from app import transactions as transaction_store
+from app.budgets import get_budget, budget_status, set_budget_limits, month_key
+from app.templating import templates, stream_template
+from app.rate_limit import login_rate_limiter
+from app.sync import get_changes, decode_token, version_token, SyncTokenError, SyncPending
+from app.events import event_bus, RESET
+from app.utils import validate_metadata_json, build_pagination
 
 
-from app.parsers import TenpoEmailParser
+from app.parsing_pool import parsing_pool
 
 logger = logging.getLogger(__name__)
 
-# Configurar templates
-templates = Jinja2Templates(directory="templates")
-
-# Añadir funciones helper a los templates
-templates.env.globals["format_currency"] = format_currency
-templates.env.globals["format_datetime"] = format_datetime
-templates.env.globals["format_date"] = format_date
-templates.env.globals["humanize_origin"] = humanize_origin
-templates.env.globals["humanize_category"] = humanize_category
-templates.env.globals["humanize_transaction_type"] = humanize_transaction_type
-templates.env.globals["get_transaction_type_color"] = get_transaction_type_color
-templates.env.globals["get_transaction_type_icon"] = get_transaction_type_icon
-templates.env.globals["get_current_month_name"] = get_current_month_name
-
 async def get_current_user_from_session(request: Request) -> Optional[User]:
     """Obtiene el usuario actual desde la sesión"""
     session_token = request.cookies.get("session_token")
@@ -54,24 +44,10 @@ async def require_auth(request: Request) -> User:
         )
     return user
 
-def prepare_chart_data(transactions_list):
-    """Prepara los datos para los gráficos de categorías"""
+def build_chart_data(category_totals: dict) -> dict:
+    """Convierte los totales por categoría al formato de Chart.js"""
     from app.utils import humanize_category
     
-    # Solo procesar gastos para el gráfico de categorías
-    gastos = [t for t in transactions_list if t.get('type') == 'gasto']
-    
-    # Agrupar por categoría
-    category_totals = {}
-    for transaction in gastos:
-        category = transaction.get('category', 'sin_categoria')
-        amount = float(transaction.get('amount', 0))
-        
-        if category in category_totals:
-            category_totals[category] += amount
-        else:
-            category_totals[category] = amount
-    
     # Colores predefinidos para cada categoría
     category_colors = {
         'alimentacion': '#FF6384',
@@ -106,6 +82,171 @@ def prepare_chart_data(transactions_list):
         'amounts': amounts
     }
 
+def aggregate_dashboard_data(db, base_filter: dict, session=None) -> tuple:
+    """Calcula el resumen y los datos del gráfico en MongoDB, sin materializar las transacciones"""
+    pipeline = [
+        {"$match": base_filter},
+        {"$group": {
+            "_id": {"type": "$type", "category": "$category"},
+            "total": {"$sum": "$amount"},
+            "count": {"$sum": 1}
+        }},
+        {"$sort": {"total": -1}}
+    ]
+    
+    summary = TransactionSummary()
+    category_totals = {}
+    for group in db.transactions.aggregate(pipeline, session=session):
+        summary.count_transactions += group["count"]
+        tx_type = (group["_id"].get("type") or "").lower()
+        
+        if tx_type == "ingreso":
+            summary.total_ingresos += group["total"]
+        elif tx_type == "gasto":
+            summary.total_gastos += group["total"]
+            category = group["_id"].get("category", "sin_categoria")
+            category_totals[category] = category_totals.get(category, 0) + float(group["total"])
+    
+    summary.balance = summary.total_ingresos - summary.total_gastos
+    return summary, build_chart_data(category_totals)
+
+def dashboard_filter(user_id, view: str) -> tuple:
+    """Filtro de transacciones de una vista del dashboard y su periodo (YYYY-MM o "all")"""
+    base_filter = {"user_id": ObjectId(str(user_id))}
+    if view != "monthly":
+        return base_filter, "all"
+    
+    now = datetime.now()
+    start_of_month = datetime(now.year, now.month, 1)
+    if now.month == 12:
+        end_of_month = datetime(now.year + 1, 1, 1)
+    else:
+        end_of_month = datetime(now.year, now.month + 1, 1)
+    
+    base_filter["date"] = {
+        "$gte": start_of_month,
+        "$lt": end_of_month
+    }
+    return base_filter, now.strftime("%Y-%m")
+
+def get_dashboard_fragments(db, user_id, view: str, base_filter: dict, period: str, read_db=None, session=None) -> dict:
+    """
+    Fragmentos de resumen y gráfico desde la cache, o agregados y renderizados si no están.
+    La versión se lee del primario; el agregado puede ir a read_db (un secundario) dentro
+    de una sesión causal, así nunca se cachea bajo una versión un resumen más viejo que ella
+    """
+    version = get_data_version(db, user_id, session)
+    cache_key = fragment_key(str(user_id), view, period, version)
+    fragments = fragment_cache.get(cache_key)
+    
+    if fragments is None:
+        # Resumen y gráfico agregados en MongoDB; sus fragmentos no dependen de la página
+        summary, chart_data = aggregate_dashboard_data(db if read_db is None else read_db, base_filter, session)
+        fragments = render_dashboard_fragments(summary, chart_data, view)
+        fragment_cache.set(cache_key, fragments)
+    # La versión de los datos es el punto de partida de los eventos en vivo
+    return {**fragments, "version": version}
+
+def render_dashboard_fragments(summary: TransactionSummary, chart_data: dict, view: str) -> dict:
+    """Renderiza los fragmentos del dashboard que no dependen de la página (resumen y gráfico)"""
+    context = {
+        "summary": summary,
+        "chart_data": chart_data,
+        "is_monthly": view == "monthly",
+        "has_transactions": summary.count_transactions > 0
+    }
+    return {
+        "summary": templates.get_template("partials/dashboard_summary.html").render(context),
+        "chart": templates.get_template("partials/dashboard_chart.html").render(context),
+        "chart_script": templates.get_template("partials/dashboard_chart_script.html").render(context),
+        "count": summary.count_transactions
+    }
+
+# Máximo de filas que se envían en un evento; con más cambios el cliente recarga la página
+LIVE_MAX_ROWS = 200
+
+def format_sse(event: str, data: dict, event_id: Optional[str] = None) -> str:
+    """Mensaje de Server-Sent Events"""
+    lines = [f"event: {event}"]
+    if event_id:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+def merge_summaries(events: list) -> dict:
+    """Suma las variaciones del resumen por mes de varios eventos"""
+    merged = {}
+    for event in events:
+        for month, totals in event.get("summary", {}).items():
+            current = merged.setdefault(month, {"ingreso": 0.0, "gasto": 0.0, "count": 0})
+            for key, value in totals.items():
+                current[key] = round(current[key] + value, 2)
+    return merged
+
+def live_changes(db, user_id, since: str) -> tuple:
+    """
+    Filas cambiadas desde el token, renderizadas con el mismo partial del dashboard.
+    Retorna (datos, token nuevo), o (None, token) si son demasiadas para un evento
+    """
+    changes = get_changes(db, user_id, since, LIVE_MAX_ROWS, TransactionRow.PROJECTION)
+    if changes["has_more"] or changes["reset"]:
+        return None, since
+    row_template = templates.get_template("partials/transaction_row.html")
+    return {
+        "upserts": [
+            {
+                "id": str(doc["_id"]),
+                "month": month_key(doc["date"]) if doc.get("date") else None,
+                "html": row_template.render(transaction=TransactionRow.from_bson(doc))
+            }
+            for doc in changes["upserts"]
+        ],
+        "deletes": [str(transaction_id) for transaction_id in changes["deletes"]]
+    }, changes["next"]
+
+async def live_event_stream(request: Request, user_id: str, since: str):
+    """
+    Stream de eventos de un dashboard abierto. Espera en la cola del bus, y con cada
+    evento envía las filas cambiadas y la variación del resumen; si el cliente se
+    perdió cambios (reconexión tardía, cola llena) le pide recargar
+    """
+    queue = event_bus.subscribe(user_id)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.events_max_duration
+    try:
+        yield "retry: 3000\n\n"
+        if get_data_version(get_database(), user_id) > decode_token(since)["v"]:
+            # Hubo escrituras entre el render (o la última conexión) y ahora
+            yield format_sse("reload", {})
+            return
+
+        while loop.time() < deadline:
+            try:
+                timeout = min(settings.events_heartbeat, deadline - loop.time())
+                events = [await asyncio.wait_for(queue.get(), timeout=max(timeout, 0))]
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    return
+                yield ": ping\n\n"
+                continue
+            while not queue.empty():
+                events.append(queue.get_nowait())
+            if RESET in events:
+                yield format_sse("reload", {})
+                return
+
+            try:
+                rows, since = await asyncio.to_thread(live_changes, get_database(), user_id, since)
+            except SyncPending:
+                # Otra escritura sigue en curso; sus filas llegan con su propio evento
+                rows = {"upserts": [], "deletes": []}
+            if rows is None:
+                yield format_sse("reload", {})
+                return
+            yield format_sse("change", {"summary": merge_summaries(events), **rows}, since)
+    finally:
+        event_bus.unsubscribe(user_id, queue)
+
 def create_routes(app: FastAPI):
     """Crea todas las rutas de la aplicación"""
     
@@ -137,20 +278,33 @@ def create_routes(app: FastAPI):
         password: str = Form(...)
     ):
         """Procesar login"""
+        # Rechazar ráfagas antes de buscar el usuario y verificar bcrypt
+        client_ip = request.client.host if request.client else None
+        retry_after = login_rate_limiter.check(username, client_ip)
+        if retry_after:
+            return templates.TemplateResponse("login.html", {
+                "request": request,
+                "error": f"Demasiados intentos. Intenta de nuevo en {retry_after} segundos",
+                "username": username
+            }, status_code=429, headers={"Retry-After": str(retry_after)})
+
         # Autenticar usuario
         user = auth_manager.authenticate_user(username, password)
 
 
         
         if not user:
+            login_rate_limiter.record_failure(username, client_ip)
             return templates.TemplateResponse("login.html", {
                 "request": request,
                 "error": "Usuario o contraseña incorrectos",
                 "username": username
             })
         
+        login_rate_limiter.reset(username)
+
         # Crear sesión
-        session_token = auth_manager.create_session_token(str(user.id))
+        session_token = auth_manager.create_session_token(str(user.id), user)
         
         # Redirigir al dashboard con cookie de sesión
         response = RedirectResponse(url="/dashboard", status_code=302)
@@ -169,6 +323,9 @@ def create_routes(app: FastAPI):
     @app.get("/logout", response_class=HTMLResponse)
     async def logout(request: Request):
         """Cerrar sesión"""
+        session_token = request.cookies.get("session_token")
+        if session_token:
+            auth_manager.revoke_session_token(session_token)
         response = RedirectResponse(url="/login", status_code=302)
         response.delete_cookie("session_token")
         return response
@@ -178,53 +335,79 @@ def create_routes(app: FastAPI):
         request: Request,
         page: int = 1,
         view: str = "monthly",  # monthly o historical
+        stream: bool = False,  # renderiza todas las filas en streaming
         user: User = Depends(require_auth)
     ):
         """Dashboard principal con lista de transacciones"""
         db = get_database()
+        # Tras una escritura propia (redirect con ?success=) todo se lee del primario
+        fresh = "success" in request.query_params
+        read_db = get_read_database(primary=fresh)
+        session = None if fresh else start_causal_session()
         
         try:
-            # Crear filtro base
-            base_filter = {"user_id": ObjectId(str(user.id))}
-            
-            # Si es vista mensual, filtrar por mes actual
-            if view == "monthly":
-                from datetime import datetime
-                now = datetime.now()
-                start_of_month = datetime(now.year, now.month, 1)
-                if now.month == 12:
-                    end_of_month = datetime(now.year + 1, 1, 1)
-                else:
-                    end_of_month = datetime(now.year, now.month + 1, 1)
-                
-                base_filter["date"] = {
-                    "$gte": start_of_month,
-                    "$lt": end_of_month
-                }
+            # Crear filtro base (vista mensual: solo el mes actual)
+            base_filter, period = dashboard_filter(user.id, view)
             
-            # Obtener transacciones del usuario ordenadas por fecha descendente
-            transactions_cursor = db.transactions.find(base_filter).sort("date", -1)
-            transactions_list = list(transactions_cursor)
-            
-            # Paginar resultados
             per_page = 20
-            transactions_page, pagination = paginate_list(transactions_list, page, per_page)
+            fragments = get_dashboard_fragments(db, user.id, view, base_filter, period, read_db, session)
             
-            # Crear resumen
-            summary = TransactionSummary.from_transactions(transactions_list)
+            # Presupuesto del mes en curso: un solo documento con límites, gasto y alertas
+            budget = get_budget(db, user.id)
+            budget_rows = budget_status(budget)
+            budget_alerts = list(reversed((budget or {}).get("alerts", [])[-3:]))
             
-            # Preparar datos para gráficos
-            chart_data = prepare_chart_data(transactions_list)
+            # Obtener transacciones del usuario ordenadas por fecha descendente
+            transactions_cursor = read_db.transactions.find(
+                base_filter, TransactionRow.PROJECTION, session=session
+            ).sort("date", -1)
+            
+            if stream:
+                # Todas las filas desde un cursor perezoso, renderizadas y enviadas por partes
+                rows = map(TransactionRow.from_bson, transactions_cursor.batch_size(settings.stream_batch_size))
+                if session is not None:
+                    # La sesión se cierra cuando termina el streaming
+                    rows, session = iterate_in_session(rows, session), None
+                return stream_template("dashboard.html", {
+                    "request": request,
+                    "user": user,
+                    "transactions": rows,
+                    "has_transactions": fragments["count"] > 0,
+                    "transaction_count": fragments["count"],
+                    "fragments": fragments,
+                    "pagination": build_pagination(fragments["count"], 1, max(fragments["count"], 1)),
+                    "current_view": view,
+                    "is_monthly": view == "monthly",
+                    "categories": COMMON_CATEGORIES,
+                    "budget_rows": budget_rows,
+                    "budget_alerts": budget_alerts,
+                    "is_streaming": True,
+                    "period": period,
+                    "events_since": version_token(fragments["version"])
+                })
+            
+            # Solo se consulta la página pedida
+            transactions_page = [
+                TransactionRow.from_bson(doc)
+                for doc in transactions_cursor.skip((max(page, 1) - 1) * per_page).limit(per_page)
+            ]
+            pagination = build_pagination(fragments["count"], page, per_page)
             
             return templates.TemplateResponse("dashboard.html", {
                 "request": request,
                 "user": user,
                 "transactions": transactions_page,
-                "summary": summary,
+                "has_transactions": bool(transactions_page),
+                "transaction_count": fragments["count"],
+                "fragments": fragments,
                 "pagination": pagination,
                 "current_view": view,
                 "is_monthly": view == "monthly",
-                "chart_data": chart_data
+                "categories": COMMON_CATEGORIES,
+                "budget_rows": budget_rows,
+                "budget_alerts": budget_alerts,
+                "period": period,
+                "events_since": version_token(fragments["version"])
             })
             
         except Exception as e:
@@ -233,13 +416,41 @@ def create_routes(app: FastAPI):
                 "request": request,
                 "user": user,
                 "transactions": [],
-                "summary": TransactionSummary(),
+                "has_transactions": False,
+                "transaction_count": 0,
+                "fragments": render_dashboard_fragments(
+                    TransactionSummary(), {"categories": [], "colors": [], "amounts": []}, view
+                ),
                 "pagination": {"page": 1, "pages": 1, "has_prev": False, "has_next": False},
                 "current_view": view,
                 "is_monthly": view == "monthly",
-                "chart_data": {"categories": [], "colors": [], "amounts": []},
+                "categories": COMMON_CATEGORIES,
                 "error": "Error cargando transacciones"
             })
+        finally:
+            if session is not None:
+                session.end_session()
+
+    @app.get("/events")
+    async def live_events(
+        request: Request,
+        since: Optional[str] = None,
+        user: User = Depends(require_auth)
+    ):
+        """Cambios en vivo del dashboard (Server-Sent Events) desde el token del render"""
+        # Al reconectar, EventSource envía el id del último evento recibido
+        since = request.headers.get("last-event-id") or since
+        if not since:
+            raise HTTPException(status_code=400, detail="Falta el token since")
+        try:
+            decode_token(since)
+        except SyncTokenError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return StreamingResponse(
+            live_event_stream(request, str(user.id), since),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
 
     @app.get("/add-transaction", response_class=HTMLResponse)
     async def add_transaction_page(
@@ -257,6 +468,71 @@ def create_routes(app: FastAPI):
             "success": None
         })
 
+    @app.get("/budgets", response_class=HTMLResponse)
+    async def budgets_page(
+        request: Request,
+        user: User = Depends(require_auth)
+    ):
+        """Página para configurar los presupuestos mensuales por categoría"""
+        db = get_database()
+        budget = get_budget(db, user.id) or {}
+        
+        success = None
+        if request.query_params.get("success") == "budgets_saved":
+            success = "Presupuestos guardados correctamente"
+        
+        return templates.TemplateResponse("budgets.html", {
+            "request": request,
+            "user": user,
+            "categories": COMMON_CATEGORIES,
+            "limits": {category: int(limit) for category, limit in (budget.get("limits") or {}).items()},
+            "spent": budget.get("spent") or {},
+            "error": None,
+            "success": success
+        })
+
+    @app.post("/budgets", response_class=HTMLResponse)
+    async def budgets_post(
+        request: Request,
+        user: User = Depends(require_auth)
+    ):
+        """Guardar los límites de presupuesto (campos limit_<categoría>, vacío = sin límite)"""
+        db = get_database()
+        form = await request.form()
+        
+        try:
+            limits = {}
+            for category in COMMON_CATEGORIES:
+                value = (form.get(f"limit_{category}") or "").strip()
+                if value:
+                    try:
+                        limits[category] = float(value)
+                    except ValueError:
+                        raise ValueError("Los límites deben ser números")
+            if any(limit < 0 for limit in limits.values()):
+                raise ValueError("Los límites no pueden ser negativos")
+            
+            set_budget_limits(db, user.id, limits, month_key())
+            logger.info(f"Presupuestos actualizados por usuario {user.username}: {len(limits)} categorías")
+            return RedirectResponse(url="/budgets?success=budgets_saved", status_code=302)
+            
+        except ValueError as e:
+            error = str(e)
+        except Exception as e:
+            logger.error(f"Error guardando presupuestos: {e}")
+            error = "Error interno del servidor"
+        
+        budget = get_budget(db, user.id) or {}
+        return templates.TemplateResponse("budgets.html", {
+            "request": request,
+            "user": user,
+            "categories": COMMON_CATEGORIES,
+            "limits": {category: form.get(f"limit_{category}") or "" for category in COMMON_CATEGORIES},
+            "spent": budget.get("spent") or {},
+            "error": error,
+            "success": None
+        })
+
     @app.post("/add-transaction", response_class=HTMLResponse)
     async def add_transaction_post(
         request: Request,
@@ -318,9 +594,9 @@ def create_routes(app: FastAPI):
             )
             
             # Insertar en base de datos
-            result = db.transactions.insert_one(transaction.model_dump(by_alias=True))
+            inserted_id = transaction_store.insert_transaction(db, transaction.model_dump(by_alias=True))
             
-            logger.info(f"Transacción creada: {result.inserted_id} por usuario {user.username}")
+            logger.info(f"Transacción creada: {inserted_id} por usuario {user.username}")
             
             # Redirigir al dashboard con mensaje de éxito
             return RedirectResponse(url="/dashboard?success=transaction_added", status_code=302)
@@ -424,20 +700,11 @@ def create_routes(app: FastAPI):
                 raise HTTPException(status_code=400, detail="Categoría no válida")
             
             # Actualizar la transacción
-            result = db.transactions.update_one(
-                {
-                    "_id": ObjectId(transaction_id),
-                    "user_id": ObjectId(str(user.id))
-                },
-                {
-                    "$set": {
-                        "category": category,
-                        "updated_at": datetime.utcnow()
-                    }
-                }
+            previous = transaction_store.update_transaction(
+                db, user.id, transaction_id, {"category": category}
             )
             
-            if result.matched_count == 0:
+            if not previous:
                 raise HTTPException(status_code=404, detail="Transacción no encontrada")
             
             # Redirigir de vuelta al detalle de la transacción con mensaje de éxito
@@ -463,15 +730,10 @@ def create_routes(app: FastAPI):
         try:
             if not ObjectId.is_valid(transaction_id):
                 raise HTTPException(status_code=404, detail="Transacción no encontrada")
-            result = db.transactions.update_one(
-                {
-                    "_id": ObjectId(transaction_id),
-                    "user_id": ObjectId(str(user.id)),
-                    "type": "gasto"
-                },
-                {"$set": {"validated": True, "updated_at": datetime.utcnow()}}
+            previous = transaction_store.update_transaction(
+                db, user.id, transaction_id, {"validated": True}, extra_filter={"type": "gasto"}
             )
-            if result.matched_count == 0:
+            if not previous:
                 raise HTTPException(status_code=404, detail="Transacción no encontrada o no es un gasto")
             return RedirectResponse(url="/dashboard?success=validated", status_code=302)
         except HTTPException:
@@ -492,12 +754,7 @@ def create_routes(app: FastAPI):
         try:
             if not ObjectId.is_valid(transaction_id):
                 raise HTTPException(status_code=404, detail="Transacción no encontrada")
-            db.transactions.delete_one(
-                {
-                    "_id": ObjectId(transaction_id),
-                    "user_id": ObjectId(str(user.id)),
-                }
-            )
+            transaction_store.delete_transaction(db, user.id, transaction_id)
             return RedirectResponse(url="/dashboard?success=deleted", status_code=302)
         except HTTPException:
             raise
@@ -521,13 +778,8 @@ def create_routes(app: FastAPI):
                 raise HTTPException(status_code=400, detail="Subject y body son requeridos")
 
             
-            # Importar parsers
-            # Intentar parsear con diferentes parsers
-            transaction_data = None
-            
-            # Parser de Tenpo
-            if TenpoEmailParser.can_parse(subject, body):
-                transaction_data = TenpoEmailParser.parse(subject, body)
+            # Intentar parsear con los parsers registrados (inline; el pool es para lotes)
+            transaction_data = await parsing_pool.parse(subject, body)
             
             if not transaction_data:
                 # Log del email no parseado para debugging
@@ -541,19 +793,19 @@ def create_routes(app: FastAPI):
             default_user_id = "68ae0680e37dadbe6b948619"  # Cambiar por lógica real
             
             # Crear la transacción
-            transaction = transaction_data.to_transaction(default_user_id)
+            document = transaction_data.to_document(default_user_id)
             
             # Guardar en base de datos
             db = get_database()
-            result = db.transactions.insert_one(transaction.model_dump(by_alias=True))
+            inserted_id = transaction_store.insert_transaction(db, document)
             
-            logger.info(f"Transacción creada desde email: {result.inserted_id}")
+            logger.info(f"Transacción creada desde email: {inserted_id}")
             
             return {
                 "status": "success", 
-                "transaction_id": str(result.inserted_id),
-                "amount": transaction.amount,
-                "description": transaction.description
+                "transaction_id": str(inserted_id),
+                "amount": document["amount"],
+                "description": document["description"]
             }
             
         except HTTPException:
@@ -563,15 +815,31 @@ def create_routes(app: FastAPI):
             raise HTTPException(status_code=500, detail="Error interno del servidor")
 
 
-    # Ruta para health check
-    @app.get("/health")
-    async def health_check():
-        """Health check endpoint"""
+    @app.post("/webhook/email/batch")
+    async def receive_email_batch(batch: EmailBatch, user: User = Depends(require_api_user)):
+        """Importa un lote de emails (JSON) como transacciones del usuario autenticado"""
         try:
+            emails = [(email.subject, email.body) for email in batch.emails]
+            parsed = await parsing_pool.parse_batch(emails)
+
+            documents = [
+                transaction_data.to_document(ObjectId(str(user.id)))
+                for transaction_data in parsed if transaction_data
+            ]
+
             db = get_database()
-            # Verificar conexión a la base de datos
-            db.command("ping")
-            return {"status": "healthy", "timestamp": datetime.now().isoformat()}
+            inserted_ids = transaction_store.insert_transactions(db, documents)
+
+            logger.info(f"Lote de emails procesado: {len(inserted_ids)} transacciones de {len(emails)} emails por usuario {user.username}")
+
+            return {
+                "status": "success",
+                "received": len(emails),
+                "created": len(inserted_ids),
+                "ignored": len(emails) - len(documents),
+                "transaction_ids": [str(inserted_id) for inserted_id in inserted_ids]
+            }
+
         except Exception as e:
-            logger.error(f"Health check failed: {e}")
-            raise HTTPException(status_code=503, detail="Service unavailable")
+            logger.error(f"Error procesando lote de emails: {e}")
+            raise HTTPException(status_code=500, detail="Error interno del servidor")
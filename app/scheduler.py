@@ -0,0 +1,311 @@
+"""
+Scheduler de tareas en segundo plano sobre asyncio, iniciado desde el lifespan de main.py.
+
+Cada worker de gunicorn corre su propio scheduler. Para que cada ejecución programada
+ocurra una sola vez entre todos los workers, las tareas exclusivas reclaman su turno
+(slot) en la colección scheduler_locks antes de ejecutarse. Los triggers están
+alineados al reloj, así que todos los workers calculan los mismos slots.
+"""
+import asyncio
+import inspect
+import os
+import socket
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Optional, Dict, Any, List, Set
+from pymongo.errors import DuplicateKeyError
+from app.database import get_database
+import logging
+
+logger = logging.getLogger(__name__)
+
+class IntervalTrigger:
+    """Ejecuta cada N segundos, alineado a múltiplos del intervalo desde la medianoche"""
+
+    def __init__(self, seconds: int):
+        self.seconds = max(1, int(seconds))
+
+    def next_run(self, after: datetime) -> datetime:
+        midnight = after.replace(hour=0, minute=0, second=0, microsecond=0)
+        elapsed = (after - midnight).total_seconds()
+        return midnight + timedelta(seconds=(int(elapsed // self.seconds) + 1) * self.seconds)
+
+    def __repr__(self):
+        return f"every {self.seconds}s"
+
+class CronTrigger:
+    """
+    Expresión cron de 5 campos: minuto hora día-del-mes mes día-de-la-semana.
+    Cada campo acepta *, */n, a-b, a-b/n y listas separadas por coma (domingo = 0).
+    """
+
+    FIELDS = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 6)]
+
+    def __init__(self, expression: str):
+        parts = expression.split()
+        if len(parts) != 5:
+            raise ValueError(f"Expresión cron inválida: {expression}")
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, self.weekdays = (
+            self._parse_field(part, low, high) for part, (low, high) in zip(parts, self.FIELDS)
+        )
+        self.any_day = parts[2] == "*"
+        self.any_weekday = parts[4] == "*"
+
+    @staticmethod
+    def _parse_field(field: str, low: int, high: int) -> Set[int]:
+        values: Set[int] = set()
+        for part in field.split(","):
+            step = 1
+            if "/" in part:
+                part, step_str = part.split("/", 1)
+                step = int(step_str)
+            if part == "*":
+                start, end = low, high
+            elif "-" in part:
+                start, end = (int(value) for value in part.split("-", 1))
+            else:
+                start = end = int(part)
+            if start < low or end > high or step < 1:
+                raise ValueError(f"Campo cron fuera de rango: {field}")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, moment: datetime) -> bool:
+        weekday = (moment.weekday() + 1) % 7  # cron: domingo = 0
+        day_ok = moment.day in self.days
+        weekday_ok = weekday in self.weekdays
+        # Como en cron: si ambos campos están restringidos basta con que calce uno
+        if not self.any_day and not self.any_weekday:
+            return day_ok or weekday_ok
+        return day_ok and weekday_ok
+
+    def next_run(self, after: datetime) -> datetime:
+        moment = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = moment + timedelta(days=366 * 4)
+        while moment < limit:
+            if moment.month not in self.months:
+                moment = datetime(moment.year + (moment.month == 12), moment.month % 12 + 1, 1)
+            elif not self._day_matches(moment):
+                moment = moment.replace(hour=0, minute=0) + timedelta(days=1)
+            elif moment.hour not in self.hours:
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+            elif moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+            else:
+                return moment
+        raise ValueError(f"La expresión cron no tiene próximas ejecuciones: {self.expression}")
+
+    def __repr__(self):
+        return f"cron '{self.expression}'"
+
+class MongoSlotLock:
+    """Reclama en MongoDB el slot de una ejecución: el primer worker que lo reclama la ejecuta"""
+
+    def __init__(self, collection_name: str = "scheduler_locks"):
+        self.collection_name = collection_name
+
+    @property
+    def collection(self):
+        return get_database()[self.collection_name]
+
+    def acquire(self, job_name: str, slot: datetime, owner: str) -> bool:
+        try:
+            self.collection.find_one_and_update(
+                {"_id": job_name, "$or": [{"slot": {"$lt": slot}}, {"slot": {"$exists": False}}]},
+                {"$set": {"slot": slot, "owner": owner, "started_at": datetime.utcnow(), "status": "running"}},
+                upsert=True
+            )
+            return True
+        except DuplicateKeyError:
+            # Otro worker ya reclamó este slot
+            return False
+
+    def release(self, job_name: str, owner: str, result: Dict[str, Any]):
+        self.collection.update_one(
+            {"_id": job_name, "owner": owner},
+            {"$set": {**result, "finished_at": datetime.utcnow()}}
+        )
+
+    def states(self) -> List[Dict[str, Any]]:
+        return list(self.collection.find())
+
+class Job:
+    """Tarea programada con sus métricas de ejecución en este worker"""
+
+    def __init__(self, name: str, func: Callable, trigger, exclusive: bool = True, run_in_thread: bool = True):
+        self.name = name
+        self.func = func
+        self.trigger = trigger
+        self.exclusive = exclusive
+        self.run_in_thread = run_in_thread and not inspect.iscoroutinefunction(func)
+        self.next_run: Optional[datetime] = None
+        self.running = False
+        self.runs = 0
+        self.failures = 0
+        self.skipped = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.last_ms: Optional[float] = None
+        self.last_started: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+        self.last_result: Any = None
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trigger": repr(self.trigger),
+            "exclusive": self.exclusive,
+            "running": self.running,
+            "next_run": self.next_run,
+            "runs": self.runs,
+            "failures": self.failures,
+            "skipped": self.skipped,
+            "last_started": self.last_started,
+            "last_ms": self.last_ms,
+            "avg_ms": round(self.total_ms / self.runs, 1) if self.runs else None,
+            "max_ms": round(self.max_ms, 1),
+            "last_error": self.last_error,
+            "last_result": self.last_result,
+        }
+
+class Scheduler:
+    """Scheduler asyncio con triggers de intervalo y cron"""
+
+    def __init__(self, lock: Optional[MongoSlotLock] = None, max_sleep: float = 30.0):
+        self.lock = lock or MongoSlotLock()
+        self.max_sleep = max_sleep
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self.jobs: Dict[str, Job] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._running: Set[asyncio.Task] = set()
+
+    def add_job(self, name: str, func: Callable, trigger, exclusive: bool = True, run_in_thread: bool = True) -> Job:
+        """Registra una tarea. Las funciones síncronas se ejecutan en un thread para no bloquear el event loop"""
+        if name in self.jobs:
+            raise ValueError(f"Ya existe una tarea llamada {name}")
+        job = Job(name, func, trigger, exclusive, run_in_thread)
+        self.jobs[name] = job
+        return job
+
+    @property
+    def started(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Inicia el loop del scheduler en el event loop actual"""
+        if self.started:
+            return
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        now = datetime.now()
+        for job in self.jobs.values():
+            job.next_run = job.trigger.next_run(now)
+        self._task = asyncio.create_task(self._loop())
+        logger.info(f"Scheduler iniciado con {len(self.jobs)} tareas ({self.owner})")
+
+    async def stop(self, timeout: float = 10.0):
+        """Detiene el loop y espera (hasta timeout) las tareas en curso"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._running:
+            done, pending = await asyncio.wait(self._running, timeout=timeout)
+            for task in pending:
+                task.cancel()
+        logger.info("Scheduler detenido")
+
+    async def _loop(self):
+        while True:
+            now = datetime.now()
+            for job in self.jobs.values():
+                if job.next_run and job.next_run <= now:
+                    slot = job.next_run
+                    job.next_run = job.trigger.next_run(now)
+                    if job.running:
+                        job.skipped += 1
+                        logger.warning(f"Tarea {job.name} sigue en ejecución, se omite el slot {slot}")
+                        continue
+                    task = asyncio.create_task(self._run_job(job, slot))
+                    self._running.add(task)
+                    task.add_done_callback(self._running.discard)
+
+            upcoming = min((job.next_run for job in self.jobs.values() if job.next_run), default=None)
+            delay = self.max_sleep if upcoming is None else (upcoming - datetime.now()).total_seconds()
+            await asyncio.sleep(min(max(delay, 0.05), self.max_sleep))
+
+    async def run_now(self, name: str) -> Any:
+        """Ejecuta una tarea fuera de su programación (sin reclamar slot)"""
+        return await self._execute(self.jobs[name])
+
+    async def _run_job(self, job: Job, slot: datetime):
+        if job.exclusive:
+            try:
+                acquired = await asyncio.to_thread(self.lock.acquire, job.name, slot, self.owner)
+            except Exception as e:
+                logger.error(f"No se pudo reclamar el slot de {job.name}: {e}")
+                return
+            if not acquired:
+                job.skipped += 1
+                return
+
+        status = "ok"
+        try:
+            await self._execute(job)
+        except Exception:
+            status = "error"
+
+        if job.exclusive:
+            try:
+                await asyncio.to_thread(self.lock.release, job.name, self.owner, {
+                    "status": status, "duration_ms": job.last_ms, "error": job.last_error if status == "error" else None
+                })
+            except Exception as e:
+                logger.error(f"No se pudo registrar el resultado de {job.name}: {e}")
+
+    async def _execute(self, job: Job) -> Any:
+        job.running = True
+        job.last_started = datetime.now()
+        start = time.perf_counter()
+        try:
+            if job.run_in_thread:
+                result = await asyncio.to_thread(job.func)
+            else:
+                result = job.func()
+                if inspect.isawaitable(result):
+                    result = await result
+            job.last_result = result
+            job.last_error = None
+            return result
+        except Exception as e:
+            job.failures += 1
+            job.last_error = str(e)
+            logger.error(f"Error en tarea {job.name}: {e}")
+            raise
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            job.runs += 1
+            job.total_ms += elapsed
+            job.max_ms = max(job.max_ms, elapsed)
+            job.last_ms = round(elapsed, 1)
+            job.running = False
+            logger.info(f"Tarea {job.name} terminada en {elapsed:.0f} ms")
+
+    def metrics(self) -> Dict[str, Any]:
+        """Métricas de las tareas en este worker y estado compartido de los slots"""
+        try:
+            shared = {state.pop("_id"): state for state in self.lock.states()}
+        except Exception as e:
+            logger.warning(f"No se pudo leer el estado de scheduler_locks: {e}")
+            shared = {}
+        return {
+            "owner": self.owner,
+            "started": self.started,
+            "jobs": [{**job.metrics(), "shared": shared.get(job.name)} for job in self.jobs.values()],
+        }
+
+# Instancia global del scheduler
+scheduler = Scheduler()
@@ -0,0 +1,148 @@
+"""
+Tabla en memoria de versiones de sesión y tokens revocados (SESSION_MODE=stateless).
+
+En modo stateless el token firmado lleva una foto del usuario y su session_version,
+así autenticar un request no consulta MongoDB. La validez se comprueba contra esta
+tabla, que se sincroniza cada SESSION_SYNC_INTERVAL segundos:
+- users: session_version e is_active de cada usuario (desactivar o incrementar la
+  versión invalida todos sus tokens anteriores)
+- revoked_sessions: tokens revocados uno a uno (logout), hasta que expiran
+
+Un cambio hecho en otro worker (o directo en MongoDB) se aplica en este como máximo
+un intervalo después. La tabla se carga al arrancar y la refresca la tarea session_sync;
+validar un token no consulta MongoDB (salvo un usuario creado después de la última carga).
+"""
+import time
+from datetime import datetime, timedelta
+from threading import Lock, Thread
+from typing import Dict, Tuple, Optional
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from app.config import settings
+from app.database import get_database
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Margen al pedir revocaciones nuevas, por diferencias de reloj entre workers
+SYNC_OVERLAP = timedelta(seconds=5)
+
+class SessionRegistry:
+    """Versiones de sesión y revocaciones sincronizadas periódicamente desde MongoDB"""
+
+    def __init__(self, sync_interval: float = None):
+        self.sync_interval = sync_interval or settings.session_sync_interval
+        self._users: Dict[str, Tuple[int, bool]] = {}
+        self._revoked: Dict[str, datetime] = {}
+        self._revoked_since: Optional[datetime] = None
+        self._last_sync: Optional[float] = None
+        self._lock = Lock()
+        self._refreshing = False
+        self.syncs = 0
+        self.lookups = 0
+
+    def sync(self) -> Dict[str, int]:
+        """Recarga las versiones de todos los usuarios y las revocaciones nuevas"""
+        db = get_database()
+        started = datetime.utcnow()
+        users = {
+            str(doc["_id"]): (doc.get("session_version", 0), doc.get("is_active", True))
+            for doc in db.users.find({}, {"session_version": 1, "is_active": 1})
+        }
+        query = {"expires_at": {"$gt": started}}
+        if self._revoked_since:
+            query["revoked_at"] = {"$gte": self._revoked_since - SYNC_OVERLAP}
+        revoked = {doc["_id"]: doc["expires_at"] for doc in db.revoked_sessions.find(query, {"expires_at": 1})}
+
+        with self._lock:
+            self._users = users
+            self._revoked.update(revoked)
+            for jti in [jti for jti, expires_at in self._revoked.items() if expires_at <= started]:
+                del self._revoked[jti]
+            self._revoked_since = started
+            self._last_sync = time.monotonic()
+            self.syncs += 1
+        return {"users": len(users), "revoked": len(self._revoked)}
+
+    def refresh(self):
+        """sync() sin propagar errores: si falla se sigue con la tabla anterior"""
+        try:
+            self.sync()
+        except Exception as e:
+            # Se reintenta en el próximo intervalo
+            logger.warning(f"No se pudo sincronizar la tabla de sesiones: {e}")
+            self._last_sync = time.monotonic()
+        finally:
+            self._refreshing = False
+
+    def _ensure_fresh(self):
+        """
+        Normalmente la tabla la refresca la tarea session_sync. Si quedó vencida (sin
+        scheduler) se refresca en un thread de fondo, uno a la vez; el request nunca
+        espera el recorrido de users y sigue con la tabla actual
+        """
+        if self._last_sync is not None and time.monotonic() - self._last_sync < self.sync_interval:
+            return
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        Thread(target=self.refresh, name="session-sync", daemon=True).start()
+
+    def _user_state(self, user_id: str) -> Tuple[int, bool]:
+        state = self._users.get(user_id)
+        if state is None:
+            # Usuario creado después de la última sincronización
+            self.lookups += 1
+            doc = get_database().users.find_one({"_id": ObjectId(user_id)}, {"session_version": 1, "is_active": 1})
+            state = (doc.get("session_version", 0), doc.get("is_active", True)) if doc else (0, False)
+            with self._lock:
+                self._users[user_id] = state
+        return state
+
+    def is_valid(self, user_id: str, version: int, jti: Optional[str]) -> bool:
+        """El token es válido si no fue revocado, el usuario está activo y su versión no cambió"""
+        self._ensure_fresh()
+        if jti and jti in self._revoked:
+            return False
+        current_version, is_active = self._user_state(user_id)
+        return is_active and version >= current_version
+
+    def revoke(self, jti: str, user_id: str, expires_at: datetime):
+        """Revoca un token (logout); los demás workers lo ven en la próxima sincronización"""
+        with self._lock:
+            self._revoked[jti] = expires_at
+        try:
+            get_database().revoked_sessions.insert_one({
+                "_id": jti,
+                "user_id": ObjectId(user_id),
+                "revoked_at": datetime.utcnow(),
+                "expires_at": expires_at
+            })
+        except DuplicateKeyError:
+            pass
+
+    def revoke_user(self, user_id: str, deactivate: bool = False) -> int:
+        """Invalida todos los tokens del usuario incrementando su session_version"""
+        update = {"$inc": {"session_version": 1}}
+        if deactivate:
+            update["$set"] = {"is_active": False}
+        doc = get_database().users.find_one_and_update(
+            {"_id": ObjectId(user_id)},
+            update,
+            projection={"session_version": 1, "is_active": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        if not doc:
+            raise ValueError(f"Usuario no encontrado: {user_id}")
+        with self._lock:
+            self._users[user_id] = (doc["session_version"], doc.get("is_active", True))
+        logger.info(f"Sesiones del usuario {user_id} revocadas (versión {doc['session_version']})")
+        return doc["session_version"]
+
+    def metrics(self) -> Dict[str, int]:
+        return {"users": len(self._users), "revoked": len(self._revoked), "syncs": self.syncs, "lookups": self.lookups}
+
+# Instancia global de la tabla de sesiones
+session_registry = SessionRegistry()
@@ -0,0 +1,207 @@
+"""
+Archivos estáticos con hash en el nombre y precomprimidos.
+
+El build (python -m app.static_assets) copia cada archivo de static/ a static/dist/
+con el hash de su contenido en el nombre (style.3f2a9c1b7d4e.css), escribe al lado
+las versiones .gz y .br (brotli si está instalado) y guarda el mapa nombre → archivo
+en static/dist/assets.json.
+
+PrecompressedStaticFiles sirve esas versiones según Accept-Encoding sin comprimir
+en cada request, y marca los archivos con hash como inmutables. static_url() emite
+la URL con hash desde los templates; sin build vuelve a la URL original.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+from typing import Dict, Optional
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.staticfiles import StaticFiles, NotModifiedResponse
+from app.config import settings
+import logging
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli es opcional
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+STATIC_URL = "/static"
+DIST_DIR = "dist"
+MANIFEST_NAME = "assets.json"
+HASH_LENGTH = 12
+
+# Extensiones que vale la pena comprimir; los formatos binarios ya vienen comprimidos
+COMPRESSIBLE = {".css", ".js", ".json", ".svg", ".html", ".txt", ".xml", ".map", ".webmanifest"}
+
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+DEFAULT_CACHE = "public, max-age=3600"
+
+def hashed_name(name: str, content: bytes) -> str:
+    """style.css → style.<hash>.css"""
+    root, ext = os.path.splitext(name)
+    digest = hashlib.sha256(content).hexdigest()[:HASH_LENGTH]
+    return f"{root}.{digest}{ext}"
+
+def build_assets(source: str = None, level: int = 9) -> Dict[str, str]:
+    """Genera static/dist con archivos con hash y sus versiones comprimidas; devuelve el manifiesto"""
+    source = source or settings.static_dir
+    dest = os.path.join(source, DIST_DIR)
+    shutil.rmtree(dest, ignore_errors=True)
+    os.makedirs(dest)
+
+    manifest = {}
+    original_bytes = 0
+    compressed_bytes = 0
+    for dirpath, dirnames, filenames in os.walk(source):
+        if os.path.abspath(dirpath) == os.path.abspath(source):
+            dirnames[:] = [d for d in dirnames if d != DIST_DIR]
+        for filename in sorted(filenames):
+            path = os.path.join(dirpath, filename)
+            name = os.path.relpath(path, source).replace(os.sep, "/")
+            with open(path, "rb") as f:
+                content = f.read()
+
+            target = hashed_name(name, content)
+            target_path = os.path.join(dest, target)
+            os.makedirs(os.path.dirname(target_path), exist_ok=True)
+            with open(target_path, "wb") as f:
+                f.write(content)
+            manifest[name] = target
+            original_bytes += len(content)
+
+            if os.path.splitext(name)[1].lower() not in COMPRESSIBLE:
+                continue
+            # mtime=0 para que el .gz sea reproducible entre builds
+            variants = {".gz": gzip.compress(content, compresslevel=level, mtime=0)}
+            if brotli is not None:
+                variants[".br"] = brotli.compress(content, quality=11)
+            for suffix, compressed in variants.items():
+                # Solo se guarda si realmente ahorra bytes
+                if len(compressed) < len(content):
+                    with open(target_path + suffix, "wb") as f:
+                        f.write(compressed)
+            compressed_bytes += min([len(content)] + [len(v) for v in variants.values()])
+
+    with open(os.path.join(dest, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    logger.info(
+        f"{len(manifest)} archivos estáticos en {dest}: {original_bytes} bytes, "
+        f"{compressed_bytes} comprimidos{'' if brotli else ' (sin brotli)'}"
+    )
+    return manifest
+
+class AssetManifest:
+    """Mapa nombre → archivo con hash, leído de static/dist/assets.json"""
+
+    def __init__(self, static_dir: str):
+        self.path = os.path.join(static_dir, DIST_DIR, MANIFEST_NAME)
+        self._assets: Optional[Dict[str, str]] = None
+        self._mtime: Optional[float] = None
+
+    def _load(self) -> Dict[str, str]:
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            if self._assets is None:
+                logger.info(f"Sin manifiesto de estáticos en {self.path}; se usan las URLs sin hash")
+            self._assets, self._mtime = {}, None
+            return self._assets
+        # En producción se lee una vez; en debug se recarga si cambia el build
+        if self._assets is None or (settings.debug and mtime != self._mtime):
+            with open(self.path, encoding="utf-8") as f:
+                self._assets = json.load(f)
+            self._mtime = mtime
+        return self._assets
+
+    def url(self, name: str) -> str:
+        hashed = self._load().get(name)
+        if hashed:
+            return f"{STATIC_URL}/{DIST_DIR}/{hashed}"
+        return f"{STATIC_URL}/{name}"
+
+def static_url(name: str) -> str:
+    """URL de un archivo estático, con hash si existe el build"""
+    return asset_manifest.url(name)
+
+def accepted_encodings(header: str) -> Dict[str, float]:
+    """Parsea Accept-Encoding en {codificación: q}"""
+    encodings = {}
+    for part in header.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        encodings[token] = q
+    return encodings
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    StaticFiles que entrega la versión .br o .gz de un archivo si el cliente la acepta
+    y existe en disco, con Cache-Control inmutable para los archivos de static/dist
+    """
+
+    ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200):
+        request_headers = Headers(scope=scope)
+        full_path = str(full_path)
+        dist = os.path.join(os.path.realpath(self.directory), DIST_DIR) + os.sep
+        fingerprinted = full_path.startswith(dist)
+
+        headers = {
+            "Cache-Control": IMMUTABLE_CACHE if fingerprinted else DEFAULT_CACHE,
+            "Vary": "Accept-Encoding",
+        }
+        path, encoding = full_path, None
+        accepted = accepted_encodings(request_headers.get("accept-encoding", ""))
+        for name, suffix in self.ENCODINGS:
+            if accepted.get(name, 0) > 0:
+                try:
+                    stat_result = os.stat(full_path + suffix)
+                except FileNotFoundError:
+                    continue
+                path, encoding = full_path + suffix, name
+                headers["Content-Encoding"] = name
+                break
+
+        response = FileResponse(
+            path,
+            status_code=status_code,
+            stat_result=stat_result,
+            method=scope["method"],
+            headers=headers,
+            # El tipo es el del archivo original, no el de .gz/.br
+            media_type=(mimetypes.guess_type(full_path)[0] or "text/plain") if encoding else None,
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+# Instancia global del manifiesto
+asset_manifest = AssetManifest(settings.static_dir)
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera los archivos estáticos con hash y precomprimidos")
+    parser.add_argument("--source", default=settings.static_dir, help="Directorio de estáticos")
+    parser.add_argument("--level", type=int, default=9, help="Nivel de gzip (1-9)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    manifest = build_assets(args.source, args.level)
+    for name, hashed in sorted(manifest.items()):
+        print(f"{name} -> {DIST_DIR}/{hashed}")
+
+if __name__ == "__main__":
+    main()
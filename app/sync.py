@@ -0,0 +1,221 @@
+"""
+Sincronización incremental de transacciones para clientes offline (PWA, app móvil).
+
+Cada escritura de transacciones pasa por tracked_change(), que toma una versión nueva
+del contador del usuario (data_versions, el mismo que invalida la cache de fragmentos)
+y la guarda en sync_version del documento; las eliminaciones dejan una lápida en
+tombstones con esa versión. GET /api/v1/sync?since=<token> devuelve solo lo que cambió
+después del token, paginado con keyset (sync_version, _id), y un token nuevo.
+
+Al terminar la escritura se guarda en data_versions.last_change la variación del
+resumen, de donde salen los eventos en vivo del dashboard (app/events.py).
+
+El contador también lleva cuántas escrituras están en curso (pending). Mientras haya
+alguna no se emite un token final, porque una escritura con versión menor todavía
+podría aparecer; el cliente reintenta en un momento.
+"""
+import base64
+import json
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, List, Iterable, Iterator
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ReturnDocument, UpdateOne, ASCENDING, DESCENDING
+from pymongo.database import Database
+from app.indexes import TOMBSTONE_TTL_DAYS
+from app.budgets import month_key
+from app.events import event_bus
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Una escritura "en curso" más vieja que esto se considera abortada (el proceso murió)
+PENDING_TIMEOUT = timedelta(seconds=30)
+
+class SyncTokenError(ValueError):
+    """Token de sincronización mal formado"""
+
+class SyncPending(Exception):
+    """Hay escrituras en curso; el cliente debe reintentar"""
+
+class TrackedChange:
+    """Versión reservada para una escritura y la variación que produce en el resumen por mes"""
+
+    __slots__ = ("version", "summary")
+
+    def __init__(self, version: int):
+        self.version = version
+        self.summary: Dict[str, Dict[str, float]] = {}
+
+    def record(self, removed: Iterable[Dict[str, Any]] = (), added: Iterable[Dict[str, Any]] = ()):
+        """Acumula ingresos, gastos y cantidad por mes: removed son los documentos previos y added los nuevos"""
+        for sign, docs in ((-1, removed), (1, added)):
+            for doc in docs:
+                if not doc.get("date"):
+                    continue
+                month = self.summary.setdefault(month_key(doc["date"]), {"ingreso": 0.0, "gasto": 0.0, "count": 0})
+                month["count"] += sign
+                if doc.get("type") in ("ingreso", "gasto"):
+                    month[doc["type"]] = round(month[doc["type"]] + sign * float(doc.get("amount") or 0), 2)
+
+    def event(self) -> Dict[str, Any]:
+        """Evento para los clientes en vivo (app/events.py); se guarda en data_versions.last_change"""
+        return {
+            "version": self.version,
+            "summary": {month: totals for month, totals in self.summary.items() if any(totals.values())}
+        }
+
+@contextmanager
+def tracked_change(db: Database, user_id) -> Iterator[TrackedChange]:
+    """
+    Reserva una versión para una escritura del usuario y la marca en curso.
+    Al terminar incrementa de nuevo la versión, así un render cacheado durante
+    la escritura queda invalidado, y publica el evento del cambio
+    """
+    user_oid = ObjectId(str(user_id))
+    doc = db.data_versions.find_one_and_update(
+        {"_id": user_oid},
+        {"$inc": {"version": 1, "pending": 1}, "$set": {"pending_at": datetime.utcnow()}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    change = TrackedChange(doc["version"])
+    try:
+        yield change
+    finally:
+        event = change.event()
+        db.data_versions.update_one(
+            {"_id": user_oid},
+            {"$inc": {"version": 1, "pending": -1}, "$set": {"last_change": event}}
+        )
+        event_bus.publish_local(user_oid, event)
+
+def write_tombstones(db: Database, user_id, transaction_ids: List[ObjectId], version: int):
+    """Registra las eliminaciones para que los clientes las vean en su próxima sincronización"""
+    if not transaction_ids:
+        return
+    user_oid = ObjectId(str(user_id))
+    now = datetime.utcnow()
+    db.tombstones.bulk_write([
+        UpdateOne(
+            {"_id": transaction_id},
+            {"$set": {"user_id": user_oid, "sync_version": version, "deleted_at": now}},
+            upsert=True
+        )
+        for transaction_id in transaction_ids
+    ], ordered=False)
+
+def watermark(db: Database, user_id) -> int:
+    """Versión hasta la cual todas las escrituras del usuario están completas"""
+    doc = db.data_versions.find_one({"_id": ObjectId(str(user_id))}) or {}
+    if doc.get("pending", 0) > 0 and doc.get("pending_at") and datetime.utcnow() - doc["pending_at"] < PENDING_TIMEOUT:
+        raise SyncPending()
+    return doc.get("version", 0)
+
+def encode_token(data: Dict[str, Any]) -> str:
+    raw = json.dumps(data, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_token(token: str) -> Dict[str, Any]:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if data["m"] not in ("s", "d"):
+            raise ValueError(data["m"])
+        for key in ("tx", "tb"):
+            if data.get(key) and data[key] != "done":
+                data[key] = (int(data[key][0]), ObjectId(data[key][1]))
+        if data.get("after"):
+            data["after"] = (datetime.fromisoformat(data["after"][0]), ObjectId(data["after"][1]))
+        return data
+    except (ValueError, KeyError, TypeError, InvalidId):
+        raise SyncTokenError("Token de sincronización no válido")
+
+def version_token(version: int) -> str:
+    """Token de sincronización que parte de una versión conocida (la del render del dashboard)"""
+    return encode_token({"m": "d", "v": version, "t": time.time()})
+
+def _after(position) -> Dict[str, Any]:
+    """Filtro keyset: después de (sync_version, _id)"""
+    if not position or position == "done":
+        return {}
+    version, last_id = position
+    return {"$or": [{"sync_version": {"$gt": version}}, {"sync_version": version, "_id": {"$gt": last_id}}]}
+
+def _page(collection, query: Dict[str, Any], projection, limit: int) -> List[Dict[str, Any]]:
+    if projection:
+        projection = {**projection, "sync_version": 1}
+    return list(collection.find(query, projection).sort([("sync_version", ASCENDING), ("_id", ASCENDING)]).limit(limit + 1))
+
+def get_changes(db: Database, user_id, since: Optional[str], limit: int, projection: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+    """
+    Cambios del usuario desde el token since. Sin token (o con uno más viejo que la
+    retención de lápidas) entrega una foto completa paginada y reset=True.
+
+    Retorna {"upserts": [...], "deletes": [...], "next": token, "has_more": bool, "reset": bool}
+    """
+    user_oid = ObjectId(str(user_id))
+    state = decode_token(since) if since else None
+    now = time.time()
+    reset = False
+    if state and state["m"] == "d" and now - state.get("t", 0) > TOMBSTONE_TTL_DAYS * 86400:
+        # Las lápidas de esa época ya expiraron: hay que empezar de cero
+        state = None
+    if state is None:
+        reset = True
+        state = {"m": "s", "w": watermark(db, user_id), "t": now}
+
+    if state["m"] == "s":
+        # Foto completa en el orden del índice user_date_id; lo que cambie mientras tanto
+        # tiene versión mayor que w y llega en el siguiente delta
+        query = {"user_id": user_oid}
+        if state.get("after"):
+            last_date, last_id = state["after"]
+            query["$or"] = [{"date": {"$lt": last_date}}, {"date": last_date, "_id": {"$lt": last_id}}]
+        if projection:
+            projection = {**projection, "date": 1}
+        docs = list(
+            db.transactions.find(query, projection).sort([("date", DESCENDING), ("_id", DESCENDING)]).limit(limit + 1)
+        )
+        has_more = len(docs) > limit
+        docs = docs[:limit]
+        if has_more:
+            after = [docs[-1]["date"].isoformat(), str(docs[-1]["_id"])]
+            next_state = {"m": "s", "w": state["w"], "t": state["t"], "after": after}
+        else:
+            next_state = {"m": "d", "v": state["w"], "t": state["t"]}
+        return {"upserts": docs, "deletes": [], "next": encode_token(next_state), "has_more": has_more, "reset": reset}
+
+    # Delta: cambios con sync_version en (v, w], las dos colecciones paginadas por separado
+    # (una transacción eliminada no vuelve a existir, así que el orden entre ellas no importa)
+    upper = state.get("w")
+    if upper is None:
+        upper = watermark(db, user_id)
+    bounds = {"user_id": user_oid, "sync_version": {"$gt": state["v"], "$lte": upper}}
+
+    tx_query = {**bounds, **_after(state.get("tx"))}
+    docs = _page(db.transactions, tx_query, projection, limit) if state.get("tx") != "done" else []
+    tb_query = {**bounds, **_after(state.get("tb"))}
+    tombstones = _page(db.tombstones, tb_query, {"sync_version": 1}, limit) if state.get("tb") != "done" else []
+
+    tx_more = len(docs) > limit
+    tb_more = len(tombstones) > limit
+    docs, tombstones = docs[:limit], tombstones[:limit]
+    has_more = tx_more or tb_more
+    if has_more:
+        next_state = {
+            "m": "d", "v": state["v"], "w": upper, "t": state["t"],
+            "tx": [docs[-1]["sync_version"], str(docs[-1]["_id"])] if tx_more else "done",
+            "tb": [tombstones[-1]["sync_version"], str(tombstones[-1]["_id"])] if tb_more else "done",
+        }
+    else:
+        next_state = {"m": "d", "v": upper, "t": now}
+    return {
+        "upserts": docs,
+        "deletes": [doc["_id"] for doc in tombstones],
+        "next": encode_token(next_state),
+        "has_more": has_more,
+        "reset": reset,
+    }
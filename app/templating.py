@@ -0,0 +1,86 @@
+import os
+import time
+from typing import Iterator, Iterable
+from fastapi.responses import StreamingResponse
+from fastapi.templating import Jinja2Templates
+from jinja2 import Environment, FileSystemBytecodeCache
+from app.config import settings
+from app.utils import (
+    format_currency, format_datetime, format_date, humanize_origin,
+    humanize_category, humanize_transaction_type, get_transaction_type_color,
+    get_transaction_type_icon, get_current_month_name
+)
+from app.static_assets import static_url
+import logging
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_HELPERS = {
+    "format_currency": format_currency,
+    "format_datetime": format_datetime,
+    "format_date": format_date,
+    "humanize_origin": humanize_origin,
+    "humanize_category": humanize_category,
+    "humanize_transaction_type": humanize_transaction_type,
+    "get_transaction_type_color": get_transaction_type_color,
+    "get_transaction_type_icon": get_transaction_type_icon,
+    "get_current_month_name": get_current_month_name,
+    "static_url": static_url,
+}
+
+def create_bytecode_cache(directory: str = None) -> FileSystemBytecodeCache:
+    """Crea la cache de bytecode en disco compartida por todos los workers"""
+    directory = directory or settings.template_cache_dir
+    os.makedirs(directory, exist_ok=True)
+    return FileSystemBytecodeCache(directory)
+
+def register_helpers(env: Environment):
+    """Añade las funciones helper a los templates"""
+    env.globals.update(TEMPLATE_HELPERS)
+
+def precompile_templates(env: Environment) -> int:
+    """Compila todos los templates (escribiendo su bytecode) antes de atender requests"""
+    start = time.perf_counter()
+    names = env.list_templates(extensions=["html"])
+    for name in names:
+        env.get_template(name)
+    logger.info(f"{len(names)} templates precompilados en {(time.perf_counter() - start) * 1000:.1f} ms")
+    return len(names)
+
+def buffer_chunks(chunks: Iterable[str], min_size: int = None) -> Iterator[bytes]:
+    """Agrupa los fragmentos pequeños que produce generate() en bloques de al menos min_size bytes"""
+    min_size = min_size or settings.stream_chunk_size
+    buffer = []
+    size = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        size += len(chunk)
+        if size >= min_size:
+            yield "".join(buffer).encode("utf-8")
+            buffer = []
+            size = 0
+    if buffer:
+        yield "".join(buffer).encode("utf-8")
+
+def stream_template(name: str, context: dict, status_code: int = 200) -> StreamingResponse:
+    """Renderiza un template con generate() y lo envía por partes, sin construir la página completa"""
+    template = templates.get_template(name)
+    # El iterador es síncrono: Starlette lo consume en el threadpool, junto al cursor de MongoDB
+    return StreamingResponse(
+        buffer_chunks(template.generate(context)),
+        status_code=status_code,
+        media_type="text/html"
+    )
+
+# Configurar templates
+templates = Jinja2Templates(
+    directory=settings.templates_dir,
+    bytecode_cache=create_bytecode_cache(),
+    auto_reload=settings.debug
+)
+register_helpers(templates.env)
+
+if __name__ == "__main__":
+    # Paso de build: python -m app.templating
+    logging.basicConfig(level=logging.INFO)
+    precompile_templates(templates.env)
@@ -0,0 +1,188 @@
+from contextlib import ExitStack
+from datetime import datetime
+from typing import Optional, Dict, Any, List
+from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne, DeleteOne
+from pymongo.database import Database
+from app.sync import tracked_change, write_tombstones
+from app.budgets import track_spending, SPEND_FIELDS, SPEND_PROJECTION
+from app.recurring import normalize_merchant
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Operaciones de escritura sobre transacciones, compartidas por las rutas HTML y la API.
+# Cada escritura invalida los fragmentos cacheados del usuario, actualiza sus presupuestos
+# y marca los documentos con sync_version (o deja lápidas) para la sincronización incremental;
+# la variación del resumen registrada en el cambio llega a los dashboards abiertos (app/events.py).
+
+def owner_filter(user_id: str, transaction_id: str) -> Dict[str, Any]:
+    """Filtro por id de transacción restringido al usuario dueño"""
+    return {"_id": ObjectId(transaction_id), "user_id": ObjectId(str(user_id))}
+
+def insert_transaction(db: Database, document: Dict[str, Any]) -> ObjectId:
+    """Inserta un documento de transacción listo para MongoDB"""
+    document.setdefault("merchant_key", normalize_merchant(document.get("description")))
+    with tracked_change(db, document["user_id"]) as change:
+        document["sync_version"] = change.version
+        result = db.transactions.insert_one(document)
+        change.record(added=[document])
+    track_spending(db, added=[document])
+    return result.inserted_id
+
+def insert_transactions(db: Database, documents: List[Dict[str, Any]]) -> List[ObjectId]:
+    """Inserta varios documentos en un solo insert_many"""
+    if not documents:
+        return []
+    for document in documents:
+        document.setdefault("merchant_key", normalize_merchant(document.get("description")))
+    with ExitStack() as stack:
+        changes = {
+            user_id: stack.enter_context(tracked_change(db, user_id))
+            for user_id in {str(document["user_id"]) for document in documents}
+        }
+        for document in documents:
+            document["sync_version"] = changes[str(document["user_id"])].version
+        result = db.transactions.insert_many(documents, ordered=False)
+        for document in documents:
+            changes[str(document["user_id"])].record(added=[document])
+    track_spending(db, added=documents)
+    return result.inserted_ids
+
+def update_transaction(
+    db: Database,
+    user_id: str,
+    transaction_id: str,
+    changes: Dict[str, Any],
+    extra_filter: Optional[Dict[str, Any]] = None
+) -> Optional[Dict[str, Any]]:
+    """Actualiza campos de una transacción. Retorna el documento previo, o None si no existe"""
+    query = owner_filter(user_id, transaction_id)
+    if extra_filter:
+        query.update(extra_filter)
+    if "description" in changes:
+        changes = {**changes, "merchant_key": normalize_merchant(changes["description"])}
+
+    with tracked_change(db, user_id) as change:
+        previous = db.transactions.find_one_and_update(
+            query,
+            {"$set": {"updated_at": datetime.utcnow(), "sync_version": change.version, **changes}},
+            return_document=ReturnDocument.BEFORE
+        )
+        if previous:
+            change.record(removed=[previous], added=[{**previous, **changes}])
+    if previous:
+        if SPEND_FIELDS.intersection(changes):
+            track_spending(db, removed=[previous], added=[{**previous, **changes}])
+    return previous
+
+def delete_transaction(db: Database, user_id: str, transaction_id: str) -> Optional[Dict[str, Any]]:
+    """Elimina una transacción. Retorna el documento eliminado, o None si no existe"""
+    with tracked_change(db, user_id) as change:
+        deleted = db.transactions.find_one_and_delete(owner_filter(user_id, transaction_id))
+        if deleted:
+            write_tombstones(db, user_id, [deleted["_id"]], change.version)
+            change.record(removed=[deleted])
+    if deleted:
+        track_spending(db, removed=[deleted])
+    return deleted
+
+def update_many_transactions(db: Database, user_id: str, query: Dict[str, Any], changes: Dict[str, Any]) -> Dict[str, int]:
+    """Aplica los mismos cambios a todas las transacciones del usuario que cumplan el filtro"""
+    query = {**query, "user_id": ObjectId(str(user_id))}
+    # Los presupuestos necesitan el estado previo solo si cambia algo que afecta el gasto
+    affected = list(db.transactions.find(query, SPEND_PROJECTION)) if SPEND_FIELDS.intersection(changes) else []
+    with tracked_change(db, user_id) as change:
+        result = db.transactions.update_many(
+            query, {"$set": {"updated_at": datetime.utcnow(), "sync_version": change.version, **changes}}
+        )
+        if result.modified_count:
+            change.record(removed=affected, added=[{**doc, **changes} for doc in affected])
+    if result.modified_count:
+        track_spending(db, removed=affected, added=[{**doc, **changes} for doc in affected])
+    return {"matched": result.matched_count, "modified": result.modified_count}
+
+def delete_many_transactions(db: Database, user_id: str, query: Dict[str, Any]) -> Dict[str, int]:
+    """Elimina todas las transacciones del usuario que cumplan el filtro"""
+    query = {**query, "user_id": ObjectId(str(user_id))}
+    affected = list(db.transactions.find(query, SPEND_PROJECTION))
+    ids = [doc["_id"] for doc in affected]
+    with tracked_change(db, user_id) as change:
+        result = db.transactions.delete_many({"_id": {"$in": ids}, "user_id": query["user_id"]})
+        if result.deleted_count:
+            write_tombstones(db, user_id, ids, change.version)
+            change.record(removed=affected)
+    if result.deleted_count:
+        track_spending(db, removed=affected)
+    return {"deleted": result.deleted_count}
+
+def bulk_write_transactions(db: Database, user_id: str, operations: List[Dict[str, Any]]) -> Dict[str, int]:
+    """
+    Ejecuta una lista ordenada de operaciones en un solo bulk_write.
+    Cada operación: {"id": ..., "set": {...}} para actualizar o {"id": ..., "delete": True} para eliminar.
+    """
+    if not operations:
+        return {"matched": 0, "modified": 0, "deleted": 0}
+
+    removed, added = replay_spending(db, user_id, operations)
+    # Solo las transacciones del usuario que existen dejan lápida
+    delete_ids = [ObjectId(operation["id"]) for operation in operations if operation.get("delete")]
+    owned = [
+        doc["_id"] for doc in db.transactions.find({"_id": {"$in": delete_ids}, "user_id": ObjectId(str(user_id))}, {"_id": 1})
+    ] if delete_ids else []
+
+    with tracked_change(db, user_id) as change:
+        requests = []
+        now = datetime.utcnow()
+        for operation in operations:
+            query = owner_filter(user_id, operation["id"])
+            if operation.get("delete"):
+                requests.append(DeleteOne(query))
+            else:
+                query.update(operation.get("filter") or {})
+                requests.append(UpdateOne(query, {"$set": {"updated_at": now, "sync_version": change.version, **operation["set"]}}))
+        result = db.transactions.bulk_write(requests, ordered=True)
+        if result.deleted_count:
+            write_tombstones(db, user_id, owned, change.version)
+        if result.modified_count or result.deleted_count:
+            change.record(removed=removed, added=added)
+    if result.modified_count or result.deleted_count:
+        track_spending(db, removed=removed, added=added)
+    return {"matched": result.matched_count, "modified": result.modified_count, "deleted": result.deleted_count}
+
+def replay_spending(db: Database, user_id: str, operations: List[Dict[str, Any]]) -> tuple:
+    """
+    Reproduce en memoria las operaciones de un bulk_write sobre el estado previo de las
+    transacciones afectadas y retorna (removed, added) para actualizar los presupuestos
+    """
+    ids = [
+        ObjectId(operation["id"]) for operation in operations
+        if operation.get("delete") or SPEND_FIELDS.intersection(operation.get("set") or {})
+    ]
+    if not ids:
+        return [], []
+
+    state = {
+        str(doc["_id"]): doc
+        for doc in db.transactions.find({"_id": {"$in": ids}, "user_id": ObjectId(str(user_id))}, SPEND_PROJECTION)
+    }
+    # El filtro extra de una operación (p. ej. {"type": "gasto"}) puede referir campos fuera de la proyección
+    extra_fields = {field for operation in operations for field in (operation.get("filter") or {})} - set(SPEND_PROJECTION)
+    if extra_fields:
+        for doc in db.transactions.find({"_id": {"$in": ids}}, {field: 1 for field in extra_fields}):
+            state.get(str(doc["_id"]), {}).update(doc)
+
+    removed, added = [], []
+    for operation in operations:
+        doc = state.get(operation["id"])
+        if doc is None or any(doc.get(k) != v for k, v in (operation.get("filter") or {}).items()):
+            continue
+        if operation.get("delete"):
+            removed.append(doc)
+            del state[operation["id"]]
+        elif SPEND_FIELDS.intersection(operation["set"]):
+            updated = {**doc, **operation["set"]}
+            removed.append(doc)
+            added.append(updated)
+            state[operation["id"]] = updated
+    return removed, added
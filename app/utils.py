@@ -1,5 +1,6 @@
 from datetime import datetime
-from typing import Optional, List
+from functools import lru_cache
+from typing import Optional
 import json
 import logging
 
@@ -18,6 +19,53 @@ def get_current_month_name(include_year: bool = True) -> str:
     else:
         return months[now.month]
 
+# Tablas de búsqueda para los helpers que se llaman por cada fila en los templates
+TRANSACTION_TYPE_COLORS = {
+    "ingreso": "text-success",
+    "gasto": "text-danger", 
+    "transferencia": "text-info"
+}
+
+TRANSACTION_TYPE_ICONS = {
+    "ingreso": "↗️",
+    "gasto": "↘️",
+    "transferencia": "🔄"
+}
+
+ORIGIN_LABELS = {
+    "efectivo": "Efectivo",
+    "banco": "Banco",
+    "tarjeta_credito": "Tarjeta de Crédito",
+    "tarjeta_debito": "Tarjeta de Débito", 
+    "transferencia_bancaria": "Transferencia Bancaria",
+    "tenpo": "Tenpo",
+    "otro": "Otro"
+}
+
+CATEGORY_LABELS = {
+    "alimentacion": "Alimentación",
+    "transporte": "Transporte",
+    "entretenimiento": "Entretenimiento",
+    "salud": "Salud",
+    "educacion": "Educación",
+    "hogar": "Hogar",
+    "gato": "Gato",
+    "trabajo": "Trabajo",
+    "compras": "Compras",
+    "servicios": "Servicios",
+    "supermercado": "Supermercado",
+    "restaurantes": "Restaurantes",
+    "ropa": "Ropa y Accesorios",
+    "otros": "Otros",
+}
+
+TRANSACTION_TYPE_LABELS = {
+    "gasto": "Gasto",
+    "ingreso": "Ingreso",
+    "transferencia": "Transferencia"
+}
+
+@lru_cache(maxsize=4096)
 def format_currency(amount: float) -> str:
     """Formatea un monto como moneda"""
     return f"${amount:,.2f}"
@@ -51,71 +99,34 @@ def safe_json_dumps(data: dict) -> str:
     except (TypeError, ValueError):
         return "{}"
 
+@lru_cache(maxsize=64)
 def get_transaction_type_color(transaction_type: str) -> str:
     """Retorna una clase CSS para el color según el tipo de transacción"""
-    colors = {
-        "ingreso": "text-success",
-        "gasto": "text-danger", 
-        "transferencia": "text-info"
-    }
-    return colors.get(transaction_type.lower(), "text-secondary")
+    return TRANSACTION_TYPE_COLORS.get(transaction_type.lower(), "text-secondary")
 
+@lru_cache(maxsize=64)
 def get_transaction_type_icon(transaction_type: str) -> str:
     """Retorna un icono para el tipo de transacción"""
-    icons = {
-        "ingreso": "↗️",
-        "gasto": "↘️",
-        "transferencia": "🔄"
-    }
-    return icons.get(transaction_type.lower(), "💰")
+    return TRANSACTION_TYPE_ICONS.get(transaction_type.lower(), "💰")
 
+@lru_cache(maxsize=256)
 def humanize_origin(origin: Optional[str]) -> str:
     """Convierte el origen técnico a formato legible"""
     if not origin:
         return "No especificado"
-    
-    mapping = {
-        "efectivo": "Efectivo",
-        "banco": "Banco",
-        "tarjeta_credito": "Tarjeta de Crédito",
-        "tarjeta_debito": "Tarjeta de Débito", 
-        "transferencia_bancaria": "Transferencia Bancaria",
-        "tenpo": "Tenpo",
-        "otro": "Otro"
-    }
-    return mapping.get(origin, origin.replace("_", " ").title())
+    return ORIGIN_LABELS.get(origin) or origin.replace("_", " ").title()
 
+@lru_cache(maxsize=256)
 def humanize_category(category: Optional[str]) -> str:
     """Convierte la categoría técnica a formato legible"""
     if not category:
         return "Sin categoría"
-        
-    mapping = {
-        "alimentacion": "Alimentación",
-        "transporte": "Transporte",
-        "entretenimiento": "Entretenimiento",
-        "salud": "Salud",
-        "educacion": "Educación",
-        "hogar": "Hogar",
-        "gato": "Gato",
-        "trabajo": "Trabajo",
-        "compras": "Compras",
-        "servicios": "Servicios",
-        "supermercado": "Supermercado",
-        "restaurantes": "Restaurantes",
-        "ropa": "Ropa y Accesorios",
-        "otros": "Otros",
-    }
-    return mapping.get(category, category.replace("_", " ").title())
+    return CATEGORY_LABELS.get(category) or category.replace("_", " ").title()
 
+@lru_cache(maxsize=64)
 def humanize_transaction_type(transaction_type: str) -> str:
     """Convierte el tipo de transacción a formato legible"""
-    mapping = {
-        "gasto": "Gasto",
-        "ingreso": "Ingreso",
-        "transferencia": "Transferencia"
-    }
-    return mapping.get(transaction_type.lower(), transaction_type.title())
+    return TRANSACTION_TYPE_LABELS.get(transaction_type.lower(), transaction_type.title())
 
 def validate_metadata_json(metadata_str: Optional[str]) -> tuple[bool, dict, str]:
     """
@@ -133,18 +144,10 @@ def validate_metadata_json(metadata_str: Optional[str]) -> tuple[bool, dict, str
     except json.JSONDecodeError as e:
         return False, {}, f"JSON inválido: {str(e)}"
 
-def paginate_list(items: List, page: int = 1, per_page: int = 20) -> tuple[List, dict]:
-    """
-    Pagina una lista de elementos.
-    Retorna: (items_paginados, info_paginacion)
-    """
-    total = len(items)
-    start = (page - 1) * per_page
-    end = start + per_page
-    
-    items_page = items[start:end]
-    
-    pagination_info = {
+def build_pagination(total: int, page: int = 1, per_page: int = 20) -> dict:
+    """Construye la información de paginación a partir del total de elementos"""
+    end = page * per_page
+    return {
         "page": page,
         "per_page": per_page,
         "total": total,
@@ -154,8 +157,6 @@ def paginate_list(items: List, page: int = 1, per_page: int = 20) -> tuple[List,
         "prev_num": page - 1 if page > 1 else None,
         "next_num": page + 1 if end < total else None
     }
-    
-    return items_page, pagination_info
 
 def truncate_text(text: Optional[str], max_length: int = 50) -> str:
     """Trunca texto si es muy largo"""
@@ -0,0 +1,32 @@
+"""
+Backends de base de datos para benchmarks: un mongod local o un MongoDB en memoria (mongomock).
+
+Debe llamarse a attach_database() antes de importar main/app.routes, porque
+app.auth obtiene la base de datos al importarse.
+"""
+from pymongo import MongoClient
+
+from app.database import db_connection
+
+def create_client(backend: str, uri: str = "mongodb://localhost:27017"):
+    """Crea un cliente para el backend indicado ("memory" o "mongod")"""
+    if backend == "memory":
+        try:
+            import mongomock
+        except ImportError:
+            raise SystemExit("El backend en memoria requiere mongomock: pip install -r benchmarks/requirements.txt")
+        return mongomock.MongoClient()
+    if backend == "mongod":
+        client = MongoClient(uri, serverSelectionTimeoutMS=5000)
+        client.admin.command("ping")
+        return client
+    raise SystemExit(f"Backend desconocido: {backend}")
+
+def attach_database(backend: str, uri: str, database_name: str = "mybills_bench", drop: bool = True):
+    """Conecta la app al backend indicado con una base de datos dedicada a benchmarks"""
+    client = create_client(backend, uri)
+    if drop:
+        client.drop_database(database_name)
+    database = client[database_name]
+    db_connection.attach(client, database)
+    return database
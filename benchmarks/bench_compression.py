@@ -0,0 +1,127 @@
+"""
+Benchmark de la compresión de respuestas sobre páginas reales del dashboard.
+
+Siembra un usuario con transacciones sintéticas, descarga el dashboard mensual e
+histórico y el listado de la API sin comprimir, y para cada algoritmo y nivel mide:
+- bytes comprimidos y ahorro respecto al original
+- tiempo de CPU para comprimir la página completa y en bloques (como el streaming)
+- tiempo estimado de transferencia en redes móviles (más CPU de compresión)
+- latencia del request completo con el middleware (TestClient)
+
+Uso:
+    python -m benchmarks.bench_compression --transactions 2000 --output compression.json
+"""
+import argparse
+import os
+
+from bson import ObjectId
+
+from benchmarks.backends import attach_database
+from benchmarks.datagen import BENCH_PASSWORD, generate_users, seed_database
+from benchmarks.timing import environment_info, measure, write_results
+
+WEBHOOK_USER_ID = ObjectId("68ae0680e37dadbe6b948619")
+
+# Ancho de banda efectivo de bajada (bits por segundo) y latencia de ida y vuelta
+NETWORKS = {
+    "3g": (1.6e6, 0.150),
+    "4g": (12e6, 0.050),
+    "wifi": (50e6, 0.020),
+}
+
+PAGES = {
+    "dashboard_monthly": "/dashboard?view=monthly",
+    "dashboard_historical": "/dashboard?view=historical",
+    "api_transactions": "/api/v1/transactions?limit=200",
+}
+
+def transfer_ms(size: int, network: str) -> float:
+    """Tiempo aproximado de descarga: un RTT más los bytes sobre el ancho de banda"""
+    bandwidth, rtt = NETWORKS[network]
+    return round((rtt + size * 8 / bandwidth) * 1000, 2)
+
+def chunks_of(body: bytes, size: int) -> list:
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+def compress_whole(encoder_cls, level: int, body: bytes) -> bytes:
+    encoder = encoder_cls(level)
+    return encoder.compress(body) + encoder.finish()
+
+def compress_streamed(encoder_cls, level: int, chunks: list) -> bytes:
+    encoder = encoder_cls(level)
+    return b"".join(encoder.compress(chunk) for chunk in chunks) + encoder.finish()
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de compresión de respuestas")
+    parser.add_argument("--transactions", type=int, default=2000, help="Transacciones del usuario")
+    parser.add_argument("--levels", default="1,5,9", help="Niveles de gzip a probar")
+    parser.add_argument("--br-levels", default="1,5,11", help="Niveles de brotli a probar (si está instalado)")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", help="Archivo JSON donde guardar los resultados")
+    args = parser.parse_args()
+
+    os.environ["SCHEDULER_ENABLED"] = "False"
+    os.environ["PARSER_WORKERS"] = "0"
+    db = attach_database("memory", "")
+    users = generate_users(1, first_id=WEBHOOK_USER_ID)
+    seed_database(db, users, args.transactions)
+
+    from fastapi.testclient import TestClient
+    from app.compression import ENCODERS
+    from app.config import settings
+    from main import app
+
+    client = TestClient(app)
+    response = client.post("/login", data={"username": users[0]["username"], "password": BENCH_PASSWORD}, follow_redirects=False)
+    if response.status_code != 302:
+        raise SystemExit(f"Login falló: {response.status_code}")
+
+    configs = [("gzip", int(level)) for level in args.levels.split(",")]
+    if "br" in ENCODERS:
+        configs += [("br", int(level)) for level in args.br_levels.split(",")]
+
+    results = {"meta": {**environment_info(), "transactions": args.transactions, "encoders": sorted(ENCODERS)}, "pages": {}}
+    for page, url in PAGES.items():
+        body = client.get(url, headers={"Accept-Encoding": "identity"}).content
+        chunks = chunks_of(body, settings.stream_chunk_size)
+        page_results = {
+            "identity": {
+                "bytes": len(body),
+                "transfer_ms": {network: transfer_ms(len(body), network) for network in NETWORKS},
+                "request": measure(lambda: client.get(url, headers={"Accept-Encoding": "identity"}), args.repeat),
+            }
+        }
+        for encoding, level in configs:
+            encoder_cls = ENCODERS[encoding]
+            compressed = compress_whole(encoder_cls, level, body)
+            streamed = compress_streamed(encoder_cls, level, chunks)
+            whole = measure(lambda: compress_whole(encoder_cls, level, body), args.repeat)
+            stream = measure(lambda: compress_streamed(encoder_cls, level, chunks), args.repeat)
+
+            # Latencia real con el middleware configurado con este algoritmo y nivel
+            settings.compression_level = level
+            for middleware in app.user_middleware:
+                if middleware.cls.__name__ == "CompressionMiddleware":
+                    middleware.options.update({"algorithm": encoding, "level": level})
+            app.middleware_stack = app.build_middleware_stack()
+            request = measure(lambda: client.get(url, headers={"Accept-Encoding": encoding}), args.repeat)
+
+            page_results[f"{encoding}_{level}"] = {
+                "bytes": len(compressed),
+                "bytes_streamed": len(streamed),
+                "saving_pct": round(100 * (1 - len(compressed) / len(body)), 1),
+                "compress_ms": whole["median_ms"],
+                "compress_streamed_ms": stream["median_ms"],
+                # CPU de compresión + descarga del cuerpo comprimido
+                "transfer_ms": {
+                    network: round(transfer_ms(len(streamed), network) + stream["median_ms"], 2)
+                    for network in NETWORKS
+                },
+                "request": request,
+            }
+        results["pages"][page] = page_results
+
+    write_results(results, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Benchmark del costo del logging en la latencia de los requests.
+
+Compara la configuración anterior (StreamHandler + FileHandler síncronos, como el
+basicConfig original de main.py) con la cola de app/logging_setup.py, en texto y JSON:
+- costo por llamada a logger.info desde el thread que atiende el request
+- latencia de POST /webhook/email (escribe logs en cada email) con el TestClient
+
+La consola se descarta (/dev/null) y el archivo se escribe en un directorio temporal.
+Con --fsync cada línea fuerza la escritura a disco, para simular un disco lento o compartido.
+
+Uso:
+    python -m benchmarks.bench_logging --requests 500 --output logging.json
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+from benchmarks.backends import attach_database
+from benchmarks.datagen import generate_emails, generate_users
+from benchmarks.timing import environment_info, percentile, write_results
+
+class FsyncFileHandler(logging.FileHandler):
+    """FileHandler que hace fsync después de cada línea"""
+
+    def emit(self, record):
+        super().emit(record)
+        self.flush()
+        os.fsync(self.stream.fileno())
+
+def configure_sync(log_file: str, devnull, fsync: bool):
+    """Configuración original: handlers síncronos en el logger raíz"""
+    from app.logging_setup import stop_logging
+    stop_logging()
+    file_handler = FsyncFileHandler(log_file) if fsync else logging.FileHandler(log_file)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[logging.StreamHandler(devnull), file_handler],
+        force=True
+    )
+
+def configure_queue(log_file: str, devnull, fsync: bool, json_format: bool):
+    from app.logging_setup import configure_logging
+    listener = configure_logging(level="INFO", log_file=log_file, json_format=json_format, module_levels={}, stream=devnull)
+    if fsync:
+        # Reemplaza el handler de archivo del listener por uno con fsync (sigue fuera del request)
+        handlers = [h for h in listener.handlers if not isinstance(h, logging.FileHandler)]
+        fsync_handler = FsyncFileHandler(log_file)
+        fsync_handler.setFormatter(handlers[0].formatter)
+        listener.handlers = tuple(handlers + [fsync_handler])
+
+def per_call(calls: int) -> dict:
+    logger = logging.getLogger("bench.logging")
+    timings = []
+    for i in range(calls):
+        start = time.perf_counter()
+        logger.info(f"Transacción creada desde email: {i}")
+        timings.append((time.perf_counter() - start) * 1e6)
+    return {"p50_us": round(percentile(timings, 50), 2), "p99_us": round(percentile(timings, 99), 2)}
+
+def request_latency(client, emails: list) -> dict:
+    timings = []
+    for subject, body in emails:
+        start = time.perf_counter()
+        response = client.post("/webhook/email", data={"subject": subject, "body": body})
+        timings.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200, response.text
+    return {
+        "requests": len(timings),
+        "p50_ms": round(percentile(timings, 50), 3),
+        "p95_ms": round(percentile(timings, 95), 3),
+        "p99_ms": round(percentile(timings, 99), 3),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del pipeline de logging")
+    parser.add_argument("--requests", type=int, default=500, help="Requests al webhook por configuración")
+    parser.add_argument("--calls", type=int, default=20000, help="Llamadas a logger.info por configuración")
+    parser.add_argument("--fsync", action="store_true", help="Forzar fsync por línea (disco lento)")
+    parser.add_argument("--output", help="Archivo JSON donde guardar los resultados")
+    args = parser.parse_args()
+
+    os.environ["SCHEDULER_ENABLED"] = "False"
+    os.environ["PARSER_WORKERS"] = "0"
+    db = attach_database("memory", "")
+    db.users.insert_many(generate_users(1))
+
+    from fastapi.testclient import TestClient
+    from main import app
+    client = TestClient(app)
+    emails = generate_emails(args.requests)
+
+    devnull = open(os.devnull, "w")
+    results = {"meta": {**environment_info(), "fsync": args.fsync}, "results": {}}
+    with tempfile.TemporaryDirectory() as directory:
+        configs = {
+            "sync_file": lambda path: configure_sync(path, devnull, args.fsync),
+            "queue_text": lambda path: configure_queue(path, devnull, args.fsync, json_format=False),
+            "queue_json": lambda path: configure_queue(path, devnull, args.fsync, json_format=True),
+        }
+        for name, configure in configs.items():
+            configure(os.path.join(directory, f"{name}.log"))
+            results["results"][name] = {
+                "log_call": per_call(args.calls),
+                "webhook": request_latency(client, emails),
+            }
+
+    from app.logging_setup import stop_logging
+    stop_logging()
+    logging.basicConfig(level=logging.WARNING, force=True)
+    write_results(results, args.output)
+
+if __name__ == "__main__":
+    main()
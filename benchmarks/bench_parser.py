@@ -0,0 +1,106 @@
+"""
+Benchmark de throughput y peor caso de TenpoEmailParser.
+
+Mide emails/segundo sobre un corpus realista y el tiempo de cada email del corpus
+de variantes, fuzzing y entradas patológicas. Termina con código 1 si algún email
+supera --budget-ms. Las entradas patológicas se ejecutan en un proceso aparte que
+se corta a los --hard-timeout segundos, para que un backtracking catastrófico no
+cuelgue la suite.
+
+Uso:
+    python -m benchmarks.bench_parser --budget-ms 50 --output parser.json
+"""
+import argparse
+import multiprocessing
+import sys
+import time
+
+from app.parsers import TenpoEmailParser
+from benchmarks import parser_corpus
+from benchmarks.timing import environment_info, percentile, write_results
+
+def time_parse(email: tuple) -> float:
+    """Tiempo en milisegundos de parsear un email"""
+    subject, body = email
+    start = time.perf_counter()
+    TenpoEmailParser.parse(subject, body)
+    return (time.perf_counter() - start) * 1000
+
+def throughput(emails: list, rounds: int) -> dict:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for subject, body in emails:
+            TenpoEmailParser.parse(subject, body)
+    elapsed = time.perf_counter() - start
+    return {"emails": len(emails) * rounds, "seconds": round(elapsed, 3), "emails_per_second": round(len(emails) * rounds / elapsed, 1)}
+
+def per_email(name: str, emails: list, budget_ms: float) -> dict:
+    timings = [time_parse(email) for email in emails]
+    worst = max(range(len(timings)), key=timings.__getitem__)
+    return {
+        "corpus": name,
+        "emails": len(emails),
+        "p50_ms": round(percentile(timings, 50), 4),
+        "p99_ms": round(percentile(timings, 99), 4),
+        "max_ms": round(timings[worst], 4),
+        "worst_index": worst,
+        "over_budget": sum(1 for t in timings if t > budget_ms),
+    }
+
+def run_pathological(size: int, budget_ms: float, hard_timeout: float) -> list:
+    results = []
+    pool = multiprocessing.Pool(1)
+    try:
+        for name, email in parser_corpus.pathological(size):
+            pending = pool.apply_async(time_parse, (email,))
+            try:
+                elapsed = pending.get(timeout=hard_timeout)
+                results.append({"case": name, "bytes": len(email[1]), "ms": round(elapsed, 3), "over_budget": elapsed > budget_ms})
+            except multiprocessing.TimeoutError:
+                results.append({"case": name, "bytes": len(email[1]), "ms": None, "timeout": True, "over_budget": True})
+                pool.terminate()
+                pool = multiprocessing.Pool(1)
+    finally:
+        pool.terminate()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del parser de emails de Tenpo")
+    parser.add_argument("--emails", type=int, default=2000, help="Tamaño del corpus realista")
+    parser.add_argument("--rounds", type=int, default=5, help="Pasadas para medir throughput")
+    parser.add_argument("--fuzz", type=int, default=2000, help="Cantidad de emails mutados")
+    parser.add_argument("--size", type=int, default=20000, help="Tamaño de las entradas patológicas")
+    parser.add_argument("--budget-ms", type=float, default=50.0, help="Tiempo máximo por email")
+    parser.add_argument("--hard-timeout", type=float, default=10.0, help="Segundos antes de cortar un caso patológico")
+    parser.add_argument("--output", help="Archivo JSON donde guardar los resultados")
+    args = parser.parse_args()
+
+    realistic = parser_corpus.realistic(args.emails)
+    corpora = {
+        "realistic": realistic,
+        "variants": parser_corpus.variants(realistic),
+        "fuzz": parser_corpus.fuzz(realistic, args.fuzz),
+    }
+
+    results = {
+        "meta": {**environment_info(), "budget_ms": args.budget_ms, "pathological_size": args.size},
+        "throughput": throughput(realistic, args.rounds),
+        "corpora": [per_email(name, emails, args.budget_ms) for name, emails in corpora.items()],
+        "pathological": run_pathological(args.size, args.budget_ms, args.hard_timeout),
+    }
+
+    worst = max(
+        [c["max_ms"] for c in results["corpora"]] +
+        [c["ms"] if c["ms"] is not None else float("inf") for c in results["pathological"]]
+    )
+    failures = sum(c["over_budget"] for c in results["corpora"]) + sum(1 for c in results["pathological"] if c["over_budget"])
+    results["worst_case_ms"] = worst
+    results["failures"] = failures
+    write_results(results, args.output)
+
+    if failures:
+        print(f"{failures} emails superaron el presupuesto de {args.budget_ms} ms", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
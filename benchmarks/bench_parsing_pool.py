@@ -0,0 +1,69 @@
+"""
+Benchmark de throughput del pool de parseo según cantidad de workers.
+
+Parsea el mismo lote de emails inline y con ParsingPool para cada cantidad de
+workers, y reporta emails/segundo y speedup respecto de inline.
+
+Uso:
+    python -m benchmarks.bench_parsing_pool --emails 20000 --workers 1,2,4,8 --output pool.json
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from app.parsing_pool import ParsingPool, parse_chunk
+from benchmarks import parser_corpus
+from benchmarks.timing import environment_info, write_results
+
+def run_inline(emails: list) -> float:
+    start = time.perf_counter()
+    parse_chunk(emails)
+    return time.perf_counter() - start
+
+def run_pool(emails: list, workers: int, chunk_size: int) -> float:
+    pool = ParsingPool(workers=workers, chunk_size=chunk_size)
+    pool.start()
+    try:
+        # Calentar los procesos para no medir el arranque de cada worker
+        asyncio.run(pool.parse_batch(emails[:chunk_size * workers + 1]))
+        start = time.perf_counter()
+        parsed = asyncio.run(pool.parse_batch(emails))
+        elapsed = time.perf_counter() - start
+    finally:
+        pool.shutdown()
+    assert len(parsed) == len(emails)
+    return elapsed
+
+def main():
+    cpus = os.cpu_count() or 1
+    default_workers = ",".join(str(n) for n in sorted({1, 2, 4, cpus}) if n <= cpus)
+
+    parser = argparse.ArgumentParser(description="Benchmark del pool de parseo de emails")
+    parser.add_argument("--emails", type=int, default=20000, help="Cantidad de emails del lote")
+    parser.add_argument("--workers", default=default_workers, help="Cantidades de workers separadas por coma")
+    parser.add_argument("--chunk-size", type=int, default=64, help="Emails por tarea enviada al pool")
+    parser.add_argument("--output", help="Archivo JSON donde guardar los resultados")
+    args = parser.parse_args()
+
+    emails = parser_corpus.realistic(args.emails)
+    inline = run_inline(emails)
+
+    results = {
+        "meta": {**environment_info(), "cpus": cpus, "emails": len(emails), "chunk_size": args.chunk_size},
+        "inline": {"seconds": round(inline, 3), "emails_per_second": round(len(emails) / inline, 1)},
+        "pool": [],
+    }
+    for workers in (int(n) for n in args.workers.split(",")):
+        elapsed = run_pool(emails, workers, args.chunk_size)
+        results["pool"].append({
+            "workers": workers,
+            "seconds": round(elapsed, 3),
+            "emails_per_second": round(len(emails) / elapsed, 1),
+            "speedup": round(inline / elapsed, 2),
+        })
+
+    write_results(results, args.output)
+
+if __name__ == "__main__":
+    main()
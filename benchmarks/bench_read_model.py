@@ -0,0 +1,67 @@
+"""
+Benchmark de la representación de filas en las listas de transacciones.
+
+Compara, por cada 10k filas, el costo en CPU y la memoria retenida de:
+- dict: el documento BSON completo tal como llega de MongoDB
+- pydantic: Transaction.model_validate sobre el documento completo
+- row: TransactionRow.from_bson sobre el documento proyectado
+
+Uso:
+    python -m benchmarks.bench_read_model --rows 10000 --output read_model.json
+"""
+import argparse
+import tracemalloc
+
+from bson import ObjectId
+
+from app.models import Transaction, TransactionRow
+from benchmarks.datagen import generate_transactions
+from benchmarks.timing import measure, environment_info, write_results
+
+def project(doc: dict, projection: dict) -> dict:
+    """Simula la proyección que aplica MongoDB (siempre incluye _id)"""
+    return {"_id": doc["_id"], **{field: doc[field] for field in projection if field in doc}}
+
+def retained_bytes(build) -> int:
+    """Bytes que siguen asignados mientras se mantiene la lista construida"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    rows = build()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del rows
+    return retained
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del modelo de lectura de transacciones")
+    parser.add_argument("--rows", type=int, default=10000, help="Filas por medición")
+    parser.add_argument("--repeat", type=int, default=10, help="Repeticiones por variante")
+    parser.add_argument("--output", help="Archivo JSON donde guardar los resultados")
+    args = parser.parse_args()
+
+    full_docs = list(generate_transactions(ObjectId(), args.rows))
+    projected_docs = [project(doc, TransactionRow.PROJECTION) for doc in full_docs]
+
+    # La memoria de los dicts incluye copiar el documento, como hace el driver al decodificar
+    variants = {
+        "dict": lambda: [dict(doc) for doc in full_docs],
+        "pydantic": lambda: [Transaction.model_validate(doc) for doc in full_docs],
+        "row": lambda: [TransactionRow.from_bson(doc) for doc in projected_docs],
+    }
+
+    results = {"meta": {**environment_info(), "rows": args.rows}, "results": {}}
+    for name, build in variants.items():
+        stats = measure(build, repeat=args.repeat)
+        stats["retained_kb"] = round(retained_bytes(build) / 1024, 1)
+        stats["bytes_per_row"] = round(stats["retained_kb"] * 1024 / args.rows, 1)
+        results["results"][name] = stats
+
+    pydantic, row = results["results"]["pydantic"], results["results"]["row"]
+    results["row_vs_pydantic"] = {
+        "cpu_speedup": round(pydantic["median_ms"] / row["median_ms"], 1),
+        "memory_ratio": round(row["retained_kb"] / pydantic["retained_kb"], 2),
+    }
+    write_results(results, args.output)
+
+if __name__ == "__main__":
+    main()
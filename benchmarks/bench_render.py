@@ -0,0 +1,214 @@
+"""
+Benchmark de renderizado del dashboard con una tabla de N filas.
+
+Compara la configuración original (sin cache de bytecode y los helpers tal como estaban
+en app/utils.py, con sus diccionarios armados en cada llamada) con la actual (bytecode
+precompilado en disco y helpers con tablas de búsqueda + lru_cache).
+
+Uso:
+    python -m benchmarks.bench_render --rows 1000 --output render.json
+"""
+import argparse
+import random
+import tempfile
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Optional
+
+from jinja2 import Environment, FileSystemLoader
+
+from app.models import TransactionSummary
+from app.templating import TEMPLATE_HELPERS, create_bytecode_cache, register_helpers
+from benchmarks.timing import measure, environment_info, write_results
+
+CATEGORIES = ["supermercado", "restaurantes", "transporte", "salud", "entretenimiento", "otros", None]
+ORIGINS = ["tenpo", "tarjeta_debito", "efectivo", "banco", None]
+TYPES = ["gasto", "gasto", "gasto", "ingreso", "transferencia"]
+
+def make_rows(count: int, seed: int = 42) -> list:
+    """Genera filas sintéticas con la forma de los documentos de MongoDB"""
+    rng = random.Random(seed)
+    now = datetime(2025, 8, 31, 12, 0)
+    return [
+        {
+            "_id": f"{i:024x}",
+            "amount": float(rng.choice([990, 1490, 2500, 3990, 8034, 12990, 25000, rng.randint(500, 90000)])),
+            "type": rng.choice(TYPES),
+            "category": rng.choice(CATEGORIES),
+            "description": f"Compra en comercio {rng.randint(1, 300)}",
+            "origin": rng.choice(ORIGINS),
+            "date": now - timedelta(minutes=37 * i),
+            "validated": rng.random() < 0.7,
+        }
+        for i in range(count)
+    ]
+
+# Copias de los helpers originales de app/utils.py, para que el baseline no mida los nuevos
+
+def original_format_currency(amount: float) -> str:
+    """Formatea un monto como moneda"""
+    return f"${amount:,.2f}"
+
+def original_format_datetime(dt: datetime, format_str: str = "%d/%m/%Y %H:%M") -> str:
+    """Formatea una fecha/hora"""
+    if isinstance(dt, str):
+        try:
+            dt = datetime.fromisoformat(dt.replace('Z', '+00:00'))
+        except:
+            return dt
+    return dt.strftime(format_str)
+
+def original_format_date(dt: datetime, format_str: str = "%d/%m/%Y") -> str:
+    """Formatea solo la fecha"""
+    return original_format_datetime(dt, format_str)
+
+def original_get_transaction_type_color(transaction_type: str) -> str:
+    """Retorna una clase CSS para el color según el tipo de transacción"""
+    colors = {
+        "ingreso": "text-success",
+        "gasto": "text-danger",
+        "transferencia": "text-info"
+    }
+    return colors.get(transaction_type.lower(), "text-secondary")
+
+def original_get_transaction_type_icon(transaction_type: str) -> str:
+    """Retorna un icono para el tipo de transacción"""
+    icons = {
+        "ingreso": "↗️",
+        "gasto": "↘️",
+        "transferencia": "🔄"
+    }
+    return icons.get(transaction_type.lower(), "💰")
+
+def original_humanize_origin(origin: Optional[str]) -> str:
+    """Convierte el origen técnico a formato legible"""
+    if not origin:
+        return "No especificado"
+
+    mapping = {
+        "efectivo": "Efectivo",
+        "banco": "Banco",
+        "tarjeta_credito": "Tarjeta de Crédito",
+        "tarjeta_debito": "Tarjeta de Débito",
+        "transferencia_bancaria": "Transferencia Bancaria",
+        "tenpo": "Tenpo",
+        "otro": "Otro"
+    }
+    return mapping.get(origin, origin.replace("_", " ").title())
+
+def original_humanize_category(category: Optional[str]) -> str:
+    """Convierte la categoría técnica a formato legible"""
+    if not category:
+        return "Sin categoría"
+
+    mapping = {
+        "alimentacion": "Alimentación",
+        "transporte": "Transporte",
+        "entretenimiento": "Entretenimiento",
+        "salud": "Salud",
+        "educacion": "Educación",
+        "hogar": "Hogar",
+        "gato": "Gato",
+        "trabajo": "Trabajo",
+        "compras": "Compras",
+        "servicios": "Servicios",
+        "supermercado": "Supermercado",
+        "restaurantes": "Restaurantes",
+        "ropa": "Ropa y Accesorios",
+        "otros": "Otros",
+    }
+    return mapping.get(category, category.replace("_", " ").title())
+
+def original_humanize_transaction_type(transaction_type: str) -> str:
+    """Convierte el tipo de transacción a formato legible"""
+    mapping = {
+        "gasto": "Gasto",
+        "ingreso": "Ingreso",
+        "transferencia": "Transferencia"
+    }
+    return mapping.get(transaction_type.lower(), transaction_type.title())
+
+ORIGINAL_HELPERS = {
+    **TEMPLATE_HELPERS,
+    "format_currency": original_format_currency,
+    "format_datetime": original_format_datetime,
+    "format_date": original_format_date,
+    "humanize_origin": original_humanize_origin,
+    "humanize_category": original_humanize_category,
+    "humanize_transaction_type": original_humanize_transaction_type,
+    "get_transaction_type_color": original_get_transaction_type_color,
+    "get_transaction_type_icon": original_get_transaction_type_icon,
+}
+
+def build_environment(optimized: bool, cache_dir: str = None) -> Environment:
+    """Crea un Environment equivalente al de la app, con o sin optimizaciones"""
+    options = {"loader": FileSystemLoader("templates"), "autoescape": True}
+    if optimized:
+        options["bytecode_cache"] = create_bytecode_cache(cache_dir)
+        options["auto_reload"] = False
+    env = Environment(**options)
+    if optimized:
+        register_helpers(env)
+    else:
+        env.globals.update(ORIGINAL_HELPERS)
+    return env
+
+def render_dashboard(env: Environment, rows: list) -> str:
+    summary = TransactionSummary.from_transactions(rows)
+    context = {
+        "request": SimpleNamespace(query_params={}),
+        "user": SimpleNamespace(username="bench"),
+        "transactions": rows,
+        "has_transactions": True,
+        "transaction_count": len(rows),
+        "fragments": {"summary": "", "chart": "", "chart_script": "", "count": len(rows)},
+        "pagination": {"page": 1, "pages": 1, "has_prev": False, "has_next": False},
+        "current_view": "historical",
+        "is_monthly": False,
+        "summary": summary,
+    }
+    return env.get_template("dashboard.html").render(context)
+
+def clear_helper_caches():
+    for fn in TEMPLATE_HELPERS.values():
+        if hasattr(fn, "cache_clear"):
+            fn.cache_clear()
+
+def run(rows_count: int, repeat: int) -> dict:
+    rows = make_rows(rows_count)
+    results = {"rows": rows_count, "repeat": repeat, **environment_info()}
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        # Calentar la cache de bytecode (equivalente a precompilar en el build/arranque)
+        render_dashboard(build_environment(True, cache_dir), rows[:1])
+
+        for name, optimized in (("baseline", False), ("optimized", True)):
+            # Primer render en un worker nuevo: compilación (o carga de bytecode) + render
+            def cold():
+                clear_helper_caches()
+                render_dashboard(build_environment(optimized, cache_dir), rows)
+
+            env = build_environment(optimized, cache_dir)
+            render_dashboard(env, rows)
+            results[name] = {
+                "cold_render": measure(cold, repeat, warmup=0),
+                "warm_render": measure(lambda: render_dashboard(env, rows), repeat),
+            }
+
+    for phase in ("cold_render", "warm_render"):
+        results[f"{phase}_speedup"] = round(
+            results["baseline"][phase]["median_ms"] / results["optimized"][phase]["median_ms"], 2
+        )
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de renderizado del dashboard")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", help="Archivo JSON donde guardar los resultados")
+    args = parser.parse_args()
+
+    write_results(run(args.rows, args.repeat), args.output)
+
+if __name__ == "__main__":
+    main()
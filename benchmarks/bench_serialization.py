@@ -0,0 +1,64 @@
+"""
+Benchmark de la conversión de la salida del parser a documentos de MongoDB.
+
+Compara, sobre N conversiones:
+- legacy: metadata_json=str(metadata) + to_transaction().model_dump(by_alias=True)
+- model: metadata estructurada + to_transaction().model_dump(by_alias=True)
+- document: metadata estructurada + to_document() con user_id ya convertido a ObjectId
+
+Además cuenta cuántas conversiones legacy perdían la metadata (quedaba como {"raw": ...}).
+
+Uso:
+    python -m benchmarks.bench_serialization --conversions 100000 --output serialization.json
+"""
+import argparse
+import time
+
+from bson import ObjectId
+
+from app.parsers import TenpoEmailParser
+from benchmarks import parser_corpus
+from benchmarks.timing import environment_info, write_results
+
+USER_ID = "68ae0680e37dadbe6b948619"
+
+def timed(fn, items) -> tuple:
+    start = time.perf_counter()
+    documents = [fn(item) for item in items]
+    return time.perf_counter() - start, documents
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de serialización de transacciones para insertar")
+    parser.add_argument("--conversions", type=int, default=100000, help="Cantidad de conversiones por variante")
+    parser.add_argument("--output", help="Archivo JSON donde guardar los resultados")
+    args = parser.parse_args()
+
+    parsed = [p for p in (TenpoEmailParser.parse(s, b) for s, b in parser_corpus.realistic(2000)) if p]
+    items = [parsed[i % len(parsed)] for i in range(args.conversions)]
+    legacy_items = [
+        item.model_copy(update={"metadata": None, "metadata_json": str(item.metadata) if item.metadata else None})
+        for item in items
+    ]
+    user_oid = ObjectId(USER_ID)
+
+    variants = {
+        "legacy": (lambda item: item.to_transaction(USER_ID).model_dump(by_alias=True), legacy_items),
+        "model": (lambda item: item.to_transaction(USER_ID).model_dump(by_alias=True), items),
+        "document": (lambda item: item.to_document(user_oid), items),
+    }
+
+    results = {"meta": {**environment_info(), "conversions": args.conversions}, "results": {}}
+    for name, (fn, source) in variants.items():
+        elapsed, documents = timed(fn, source)
+        results["results"][name] = {
+            "seconds": round(elapsed, 3),
+            "us_per_conversion": round(elapsed / len(source) * 1e6, 2),
+            "metadata_lost": sum(1 for doc in documents if "raw" in doc["metadata"]),
+        }
+
+    legacy, document = results["results"]["legacy"], results["results"]["document"]
+    results["speedup"] = round(legacy["seconds"] / document["seconds"], 1)
+    write_results(results, args.output)
+
+if __name__ == "__main__":
+    main()
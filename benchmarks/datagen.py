@@ -0,0 +1,146 @@
+"""
+Generador de datos sintéticos: usuarios, transacciones y emails de comprobantes de Tenpo.
+
+Los datos siguen la forma de los documentos que escribe la app (ver app/models.py)
+y se generan de forma determinista a partir de una semilla.
+"""
+import random
+from datetime import datetime, timedelta
+from typing import Iterator, List, Optional
+
+import bcrypt
+from bson import ObjectId
+
+from app.config import TRANSACTION_ORIGINS
+
+BENCH_PASSWORD = "password123"
+
+# Comercios con la categoría que asigna TenpoEmailParser y un rango de montos típico (CLP)
+MERCHANTS = [
+    ("UNIMARC LAS CONDES", "supermercado", (3000, 60000)),
+    ("JUMBO COSTANERA", "supermercado", (5000, 120000)),
+    ("LIDER EXPRESS", "supermercado", (1500, 40000)),
+    ("STARBUCKS COFFEE", "restaurantes", (2500, 9000)),
+    ("MCDONALDS PROVIDENCIA", "restaurantes", (3000, 15000)),
+    ("SUSHI BLUE", "restaurantes", (8000, 35000)),
+    ("UBER TRIP", "transporte", (2000, 18000)),
+    ("COPEC AUTOPISTA", "transporte", (10000, 60000)),
+    ("METRO DE SANTIAGO", "transporte", (800, 1600)),
+    ("CRUZ VERDE", "salud", (2000, 45000)),
+    ("NETFLIX.COM", "entretenimiento", (7990, 7990)),
+    ("SPOTIFY", "entretenimiento", (5990, 5990)),
+    ("CINE HOYTS", "entretenimiento", (4500, 16000)),
+    ("FALABELLA", "ropa", (9990, 89990)),
+    ("LIBRERIA NACIONAL", "educacion", (2000, 25000)),
+    ("SERVICIO TECNICO", "servicios", (10000, 80000)),
+    ("KIOSCO DON PEPE", "otros", (500, 5000)),
+]
+
+INCOME_SOURCES = [
+    ("Sueldo", "trabajo", (900000, 2500000)),
+    ("Transferencia recibida", "otros", (5000, 200000)),
+]
+
+def tenpo_email(merchant: str, amount: float, date: datetime, code: str, installments: int = 1) -> tuple:
+    """Retorna (subject, body) con el formato de un comprobante de compra de Tenpo"""
+    amount_str = f"{int(amount):,}".replace(",", ".")
+    subject = "Comprobante de compra exitosa"
+    body = (
+        f"Hola,\n\n"
+        f"La compra por ${amount_str} fue exitosa.\n\n"
+        f"Detalle de la compra\n"
+        f"Monto transacción: ${amount_str}\n"
+        f"Comercio: {merchant} Cuotas: {installments}\n"
+        f"Fecha: {date.strftime('%d-%m-%Y')}\n"
+        f"Hora: {date.strftime('%H:%M:%S')}\n"
+        f"Código de transacción: {code}\n\n"
+        f"Equipo Tenpo\n"
+    )
+    return subject, body
+
+def generate_emails(count: int, seed: int = 7) -> List[tuple]:
+    """Genera count emails de Tenpo con comercios, montos y fechas variados"""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    emails = []
+    for i in range(count):
+        merchant, _, (low, high) = rng.choice(MERCHANTS)
+        date = start + timedelta(minutes=rng.randint(0, 60 * 24 * 600))
+        emails.append(tenpo_email(merchant, rng.randint(low, high), date, f"{rng.randint(10**8, 10**9 - 1)}", rng.choice([1, 1, 1, 3, 6])))
+    return emails
+
+def generate_users(count: int, first_id: Optional[ObjectId] = None) -> List[dict]:
+    """Genera usuarios con la misma contraseña (un solo hash bcrypt con el costo por defecto)"""
+    password_hash = bcrypt.hashpw(BENCH_PASSWORD.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+    users = []
+    for i in range(count):
+        users.append({
+            "_id": first_id if (i == 0 and first_id) else ObjectId(),
+            "username": f"bench{i}",
+            "password_hash": password_hash,
+            "email": f"bench{i}@example.com",
+            "created_at": datetime.utcnow(),
+            "is_active": True,
+        })
+    return users
+
+def generate_transactions(user_id: ObjectId, count: int, months: int = 24, seed: int = 42,
+                          end: Optional[datetime] = None) -> Iterator[dict]:
+    """
+    Genera count transacciones repartidas en los últimos `months` meses.
+    La mayoría son gastos de Tenpo; incluye ingresos mensuales y suscripciones recurrentes.
+    """
+    rng = random.Random(seed)
+    end = end or datetime.now()
+    span_minutes = months * 30 * 24 * 60
+    now = datetime.utcnow()
+
+    for _ in range(count):
+        date = end - timedelta(minutes=rng.randint(0, span_minutes))
+        roll = rng.random()
+        metadata = {}
+
+        if roll < 0.05:
+            description, category, (low, high) = rng.choice(INCOME_SOURCES)
+            tx_type, origin = "ingreso", "transferencia_bancaria"
+        elif roll < 0.08:
+            description, category, (low, high) = "Transferencia a terceros", "otros", (5000, 150000)
+            tx_type, origin = "transferencia", "transferencia_bancaria"
+        else:
+            description, category, (low, high) = rng.choice(MERCHANTS)
+            tx_type = "gasto"
+            origin = "tenpo" if rng.random() < 0.7 else rng.choice(TRANSACTION_ORIGINS)
+            if origin == "tenpo":
+                metadata = {"transaction_code": str(rng.randint(10**8, 10**9 - 1)), "installments": 1, "source": "tenpo_email"}
+
+        yield {
+            "_id": ObjectId(),
+            "user_id": user_id,
+            "amount": float(rng.randint(low, high)),
+            "type": tx_type,
+            "category": category,
+            "description": description,
+            "date": date,
+            "origin": origin,
+            "validated": rng.random() < 0.6,
+            "metadata": metadata,
+            "created_at": now,
+            "updated_at": None,
+        }
+
+def seed_database(db, users: List[dict], transactions_per_user: int, batch_size: int = 5000, seed: int = 42) -> int:
+    """Inserta usuarios y sus transacciones por lotes. Retorna el total de transacciones"""
+    db.users.insert_many(users)
+    total = 0
+    for index, user in enumerate(users):
+        batch = []
+        for doc in generate_transactions(user["_id"], transactions_per_user, seed=seed + index):
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                db.transactions.insert_many(batch, ordered=False)
+                total += len(batch)
+                batch = []
+        if batch:
+            db.transactions.insert_many(batch, ordered=False)
+            total += len(batch)
+    return total
@@ -0,0 +1,209 @@
+"""
+Generador de carga asíncrono para la app.
+
+Cada usuario virtual inicia sesión (manteniendo su cookie) y ejecuta una mezcla
+configurable de peticiones durante un tiempo fijo. Reporta latencias p50/p95/p99
+y throughput por acción y en total.
+
+La app debe correr localmente contra una base de datos local. Con --spawn se
+levanta un worker uvicorn (opcionalmente sembrando datos sintéticos con --seed):
+
+    python -m benchmarks.loadtest --spawn --seed 20000 --users 50 --duration 60
+    python -m benchmarks.loadtest --url http://127.0.0.1:8000 --users 20 \\
+        --mix dashboard=60,dashboard_page=15,add_transaction=10,webhook=15
+"""
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+import httpx
+
+from benchmarks.datagen import BENCH_PASSWORD, generate_emails
+from benchmarks.timing import environment_info, percentile, write_results
+
+DEFAULT_MIX = "dashboard=60,dashboard_page=15,add_transaction=10,webhook=15"
+
+def parse_mix(mix: str) -> dict:
+    """Convierte "accion=peso,..." en un diccionario de pesos"""
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in ACTIONS:
+            raise SystemExit(f"Acción desconocida en --mix: {name}")
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+async def action_dashboard(client: httpx.AsyncClient, rng: random.Random, ctx: dict):
+    return await client.get("/dashboard", params={"view": rng.choice(["monthly", "historical"])})
+
+async def action_dashboard_page(client: httpx.AsyncClient, rng: random.Random, ctx: dict):
+    return await client.get("/dashboard", params={"view": "historical", "page": rng.randint(2, 20)})
+
+async def action_add_transaction(client: httpx.AsyncClient, rng: random.Random, ctx: dict):
+    return await client.post("/add-transaction", data={
+        "amount": str(rng.randint(500, 50000)),
+        "type": "gasto",
+        "category": rng.choice(["supermercado", "transporte", "restaurantes", "otros"]),
+        "description": "Carga sintética",
+        "origin": "efectivo",
+    })
+
+async def action_webhook(client: httpx.AsyncClient, rng: random.Random, ctx: dict):
+    subject, body = rng.choice(ctx["emails"])
+    return await client.post("/webhook/email", data={"subject": subject, "body": body})
+
+ACTIONS = {
+    "dashboard": action_dashboard,
+    "dashboard_page": action_dashboard_page,
+    "add_transaction": action_add_transaction,
+    "webhook": action_webhook,
+}
+
+async def virtual_user(index: int, args, weights: dict, ctx: dict, latencies: dict, errors: dict, deadline: float):
+    rng = random.Random(index)
+    names = list(weights)
+    cumulative = list(weights.values())
+
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, follow_redirects=False) as client:
+        # Login: la cookie de sesión queda en el cliente
+        start = time.perf_counter()
+        response = await client.post("/login", data={"username": args.username, "password": args.password})
+        latencies["login"].append((time.perf_counter() - start) * 1000)
+        if response.status_code != 302 or "session_token" not in client.cookies:
+            errors["login"] += 1
+            return
+
+        while time.perf_counter() < deadline:
+            name = rng.choices(names, weights=cumulative)[0]
+            start = time.perf_counter()
+            try:
+                response = await ACTIONS[name](client, rng, ctx)
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            latencies[name].append((time.perf_counter() - start) * 1000)
+            if not ok:
+                errors[name] += 1
+            if args.think_ms:
+                await asyncio.sleep(rng.uniform(0, 2 * args.think_ms) / 1000)
+
+def report(latencies: dict, errors: dict, elapsed: float) -> dict:
+    def stats(values, failed):
+        return {
+            "requests": len(values),
+            "errors": failed,
+            "throughput_rps": round(len(values) / elapsed, 2),
+            "p50_ms": round(percentile(values, 50), 2),
+            "p95_ms": round(percentile(values, 95), 2),
+            "p99_ms": round(percentile(values, 99), 2),
+            "max_ms": round(max(values), 2) if values else 0.0,
+        }
+
+    actions = {name: stats(values, errors[name]) for name, values in latencies.items() if name != "login"}
+    every = [v for name, values in latencies.items() if name != "login" for v in values]
+    return {
+        "login": stats(latencies["login"], errors["login"]),
+        "actions": actions,
+        "total": stats(every, sum(e for name, e in errors.items() if name != "login")),
+    }
+
+async def run_load(args) -> dict:
+    weights = parse_mix(args.mix)
+    ctx = {"emails": generate_emails(200)}
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+
+    # Rampa: los usuarios arrancan repartidos en --ramp segundos
+    start = time.perf_counter()
+    deadline = start + args.ramp + args.duration
+    tasks = []
+    for index in range(args.users):
+        tasks.append(asyncio.create_task(virtual_user(index, args, weights, ctx, latencies, errors, deadline)))
+        if args.ramp:
+            await asyncio.sleep(args.ramp / args.users)
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "meta": {
+            **environment_info(),
+            "url": args.url,
+            "users": args.users,
+            "duration_s": args.duration,
+            "mix": weights,
+            "elapsed_s": round(elapsed, 2),
+        },
+        **report(latencies, errors, elapsed),
+    }
+
+def seed_local_database(args):
+    """Crea el usuario de carga con transacciones sintéticas en la base local"""
+    from pymongo import MongoClient
+    from benchmarks.datagen import generate_users, seed_database
+
+    client = MongoClient(args.mongodb_uri, serverSelectionTimeoutMS=5000)
+    db = client.get_default_database()
+    db.users.delete_many({"username": "bench0"})
+    users = generate_users(1)
+    seed_database(db, users, args.seed)
+    client.close()
+    args.username, args.password = users[0]["username"], BENCH_PASSWORD
+
+def spawn_server(args) -> subprocess.Popen:
+    """Levanta un worker uvicorn local y espera a que responda"""
+    # Sin tareas en segundo plano, para que no compitan con la carga medida
+    env = {**os.environ, "MONGODB_URI": args.mongodb_uri, "SCHEDULER_ENABLED": "False"}
+    host, port = "127.0.0.1", str(args.port)
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", host, "--port", port, "--log-level", "warning"],
+        env=env
+    )
+    args.url = f"http://{host}:{port}"
+    for _ in range(100):
+        try:
+            if httpx.get(f"{args.url}/health", timeout=1).status_code < 500:
+                return process
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise SystemExit("El servidor no respondió a tiempo")
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga de mybills")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--users", type=int, default=10, help="Usuarios virtuales concurrentes")
+    parser.add_argument("--duration", type=float, default=30, help="Segundos de carga sostenida")
+    parser.add_argument("--ramp", type=float, default=0, help="Segundos para arrancar todos los usuarios")
+    parser.add_argument("--think-ms", type=float, default=0, help="Pausa media entre peticiones")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--mix", default=DEFAULT_MIX)
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="password123")
+    parser.add_argument("--spawn", action="store_true", help="Levantar un worker uvicorn local")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--mongodb-uri", default="mongodb://localhost:27017/mybills_load")
+    parser.add_argument("--seed", type=int, default=0, help="Sembrar N transacciones para el usuario de carga")
+    parser.add_argument("--output", help="Archivo JSON donde guardar los resultados")
+    args = parser.parse_args()
+
+    if args.seed:
+        seed_local_database(args)
+
+    process = spawn_server(args) if args.spawn else None
+    try:
+        results = asyncio.run(run_load(args))
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
+
+    write_results(results, args.output)
+
+if __name__ == "__main__":
+    main()
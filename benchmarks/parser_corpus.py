@@ -0,0 +1,76 @@
+"""
+Corpus para TenpoEmailParser: emails realistas, variantes de formato, mutaciones
+aleatorias (fuzzing) y entradas patológicas pensadas para provocar backtracking.
+"""
+import random
+from typing import List, Tuple
+
+from benchmarks.datagen import generate_emails
+
+Email = Tuple[str, str]
+
+HEADER = "Comprobante de compra exitosa\nLa compra por $8.034 fue exitosa.\n"
+
+# Fragmentos con los que se construyen las mutaciones
+FUZZ_TOKENS = [
+    " ", "\t", "\n", "\r\n", "Comercio:", "Cuotas:", "Fecha:", "Hora:", "$", "1.234,5",
+    "Código de transacción:", "transacción:", "ñ", "é", "  ", "0", "-", ":",
+]
+
+def realistic(count: int = 2000, seed: int = 7) -> List[Email]:
+    """Comprobantes con el formato actual de Tenpo"""
+    return generate_emails(count, seed=seed)
+
+def variants(emails: List[Email], seed: int = 3) -> List[Email]:
+    """Variantes de formato que se ven al reenviar emails: tabs, CRLF, mayúsculas, saltos de línea"""
+    rng = random.Random(seed)
+    transforms = [
+        lambda b: b.replace(" ", "\t"),
+        lambda b: b.replace("\n", "\r\n"),
+        lambda b: b.replace(" Cuotas", "\nCuotas"),
+        lambda b: b.replace(": ", ":     "),
+        lambda b: b.replace("Comercio: ", "Comercio:\n"),
+        lambda b: b.upper(),
+        lambda b: b.replace(" Cuotas: 1", ""),
+        lambda b: "> " + b.replace("\n", "\n> "),
+    ]
+    return [(subject, rng.choice(transforms)(body)) for subject, body in emails]
+
+def fuzz(emails: List[Email], count: int = 2000, seed: int = 11) -> List[Email]:
+    """Mutaciones aleatorias: inserta, duplica y borra segmentos de emails reales"""
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(count):
+        subject, body = rng.choice(emails)
+        for _ in range(rng.randint(1, 8)):
+            position = rng.randint(0, len(body))
+            operation = rng.random()
+            if operation < 0.5:
+                body = body[:position] + rng.choice(FUZZ_TOKENS) * rng.randint(1, 200) + body[position:]
+            elif operation < 0.8:
+                end = min(len(body), position + rng.randint(1, 40))
+                body = body[:position] + body[position:end] * rng.randint(2, 50) + body[end:]
+            else:
+                body = body[:position] + body[position + rng.randint(1, 40):]
+        corpus.append((subject, body))
+    return corpus
+
+def pathological(size: int = 20000) -> List[Tuple[str, Email]]:
+    """Entradas adversarias de tamaño ~size, con nombre para el reporte"""
+    cases = {
+        "spaces_after_comercio": "Comercio:" + " " * size + "x\nfin",
+        "newline_space_run": "Comercio:" + " \n" * (size // 2) + "x\nfin",
+        "crlf_run": "Comercio:" + " \r\n" * (size // 3) + "x\nfin",
+        "tab_space_run": "Comercio:" + " \t" * (size // 2) + "\nfin",
+        "long_merchant_line": "Comercio: " + "a " * (size // 2) + "\nfin",
+        "merchant_digits": "Comercio: " + "a 1 " * (size // 4) + "\nfin",
+        "repeated_label": "Comercio: a b\n" * (size // 14) + "fin",
+        "repeated_label_one_line": "Comercio:" * (size // 9) + "\nfin",
+        "label_empty_lines": "Comercio: \n" * (size // 11) + "fin",
+        "cuotas_words": "Comercio:" + " cuotas" * (size // 7) + "\nfin",
+        "dollar_run": "$" * size + "1" * size,
+        "amount_digits": "Monto transacción: $" + "1." * (size // 2),
+        "codigo_run": "Código de transacción: \n" * (size // 24),
+        "huge_body": ("Comercio: UNIMARC Cuotas: 1\n" * (size // 28)) * 10,
+    }
+    return [(name, ("Comprobante de compra exitosa", HEADER + body)) for name, body in cases.items()]
@@ -0,0 +1,122 @@
+"""
+Suite de benchmarks de los caminos críticos de la app a escala realista.
+
+Genera usuarios con N transacciones sintéticas, los carga en un mongod local o en
+un MongoDB en memoria, y mide con el TestClient de FastAPI:
+    - dashboard mensual e histórico (con y sin fragmentos cacheados)
+    - login (incluye bcrypt)
+    - parsing de emails de Tenpo y el webhook completo
+    - detalle de transacción
+
+Uso:
+    python -m benchmarks.run --backend memory --transactions 10000 --output bench.json
+    python -m benchmarks.run --backend mongod --uri mongodb://localhost:27017 --transactions 1000000
+    python -m benchmarks.run --compare bench.json --threshold 0.2   # falla si hay regresiones
+"""
+import argparse
+import json
+import random
+import sys
+import time
+
+from bson import ObjectId
+
+from benchmarks.backends import attach_database
+from benchmarks.datagen import BENCH_PASSWORD, generate_emails, generate_users, seed_database
+from benchmarks.timing import compare_results, environment_info, measure, write_results
+
+# Usuario al que el webhook asigna las transacciones (ver receive_email_webhook)
+WEBHOOK_USER_ID = ObjectId("68ae0680e37dadbe6b948619")
+
+def run(args) -> dict:
+    db = attach_database(args.backend, args.uri)
+
+    start = time.perf_counter()
+    users = generate_users(args.users, first_id=WEBHOOK_USER_ID)
+    total = seed_database(db, users, args.transactions)
+    seed_seconds = time.perf_counter() - start
+
+    # Importar la app después de conectar la base de datos de benchmarks
+    from fastapi.testclient import TestClient
+    from app.cache import fragment_cache
+    from app.parsers import TenpoEmailParser
+    from main import app
+
+    client = TestClient(app)
+    response = client.post("/login", data={"username": users[0]["username"], "password": BENCH_PASSWORD}, follow_redirects=False)
+    if response.status_code != 302:
+        raise SystemExit(f"Login falló: {response.status_code}")
+
+    repeat = args.repeat
+    results = {}
+
+    def get(url):
+        def call():
+            r = client.get(url)
+            assert r.status_code == 200, f"{url}: {r.status_code}"
+        return call
+
+    for view in ("monthly", "historical"):
+        # Sin cache: agregación de resumen/gráfico + render de fragmentos + página
+        results[f"dashboard_{view}_cold"] = measure(get(f"/dashboard?view={view}"), repeat, setup=fragment_cache.clear)
+        # Paginación con fragmentos cacheados: solo la página de la tabla
+        results[f"dashboard_{view}_page2_cached"] = measure(get(f"/dashboard?view={view}&page=2"), repeat)
+
+    results["login"] = measure(
+        lambda: client.post("/login", data={"username": users[0]["username"], "password": BENCH_PASSWORD}, follow_redirects=False),
+        max(3, repeat // 4)
+    )
+
+    emails = generate_emails(args.emails)
+    results["parse_emails"] = measure(lambda: [TenpoEmailParser.parse(s, b) for s, b in emails], repeat)
+    results["parse_emails"]["emails"] = len(emails)
+
+    subject, body = emails[0]
+    results["webhook_email"] = measure(
+        lambda: client.post("/webhook/email", data={"subject": subject, "body": body}), repeat
+    )
+
+    sample_ids = [str(doc["_id"]) for doc in db.transactions.find({"user_id": WEBHOOK_USER_ID}, {"_id": 1}).limit(200)]
+    rng = random.Random(1)
+    results["transaction_detail"] = measure(lambda: get(f"/transaction/{rng.choice(sample_ids)}")(), repeat)
+
+    return {
+        "meta": {
+            **environment_info(),
+            "backend": args.backend,
+            "users": args.users,
+            "transactions_per_user": args.transactions,
+            "transactions_total": total,
+            "seed_seconds": round(seed_seconds, 2),
+        },
+        "results": results,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de mybills")
+    parser.add_argument("--backend", choices=["memory", "mongod"], default="memory")
+    parser.add_argument("--uri", default="mongodb://localhost:27017")
+    parser.add_argument("--users", type=int, default=1)
+    parser.add_argument("--transactions", type=int, default=10000, help="Transacciones por usuario")
+    parser.add_argument("--emails", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", help="Archivo JSON donde guardar los resultados")
+    parser.add_argument("--compare", help="Resultados JSON previos contra los que comparar")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Regresión tolerada (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    results = run(args)
+
+    regressions = []
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare_results(results, json.load(f), args.threshold)
+        results["regressions"] = regressions
+
+    write_results(results, args.output)
+    if regressions:
+        print(f"{len(regressions)} regresiones sobre {args.compare}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Utilidades de medición y reporte compartidas por los benchmarks"""
+import json
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime
+from typing import Callable, Optional
+
+def percentile(values: list, pct: float) -> float:
+    """Percentil por rango más cercano (values no necesita estar ordenado)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+def summarize(timings_ms: list) -> dict:
+    """Estadísticas de una serie de tiempos en milisegundos"""
+    return {
+        "runs": len(timings_ms),
+        "min_ms": round(min(timings_ms), 3),
+        "median_ms": round(statistics.median(timings_ms), 3),
+        "p95_ms": round(percentile(timings_ms, 95), 3),
+        "max_ms": round(max(timings_ms), 3),
+    }
+
+def measure(fn: Callable, repeat: int, warmup: int = 1, setup: Optional[Callable] = None) -> dict:
+    """Ejecuta fn repeat veces (tras warmup ejecuciones) y resume los tiempos"""
+    for _ in range(warmup):
+        if setup:
+            setup()
+        fn()
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return summarize(timings)
+
+def environment_info() -> dict:
+    """Metadatos del entorno para poder comparar ejecuciones"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        commit = None
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "commit": commit,
+    }
+
+def write_results(results: dict, path: Optional[str]):
+    """Imprime los resultados y, si se indica, los guarda en un archivo JSON"""
+    output = json.dumps(results, indent=2, default=str)
+    if path:
+        with open(path, "w") as f:
+            f.write(output)
+    print(output)
+
+def compare_results(current: dict, baseline: dict, threshold: float) -> list:
+    """
+    Compara las medianas de current contra baseline.
+    Retorna la lista de regresiones (más lentas que baseline por encima de threshold).
+    """
+    regressions = []
+    for name, stats in current.get("results", {}).items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous or not previous.get("median_ms"):
+            continue
+        ratio = stats["median_ms"] / previous["median_ms"]
+        stats["vs_baseline"] = round(ratio, 3)
+        if ratio > 1 + threshold:
+            regressions.append({"name": name, "baseline_ms": previous["median_ms"], "current_ms": stats["median_ms"], "ratio": round(ratio, 3)})
+    return regressions
@@ -1,19 +1,26 @@
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
-from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from app.routes import create_routes
+from app.api import create_api_routes
+from app.admin import create_admin_routes
+from app.health import create_health_routes, health_monitor
 from app.database import close_database
+from app.templating import templates, precompile_templates
+from app.parsing_pool import parsing_pool
+from app.scheduler import scheduler
+from app.jobs import register_default_jobs
+from app.profiling import ProfilingMiddleware
+from app.static_assets import PrecompressedStaticFiles
+from app.compression import CompressionMiddleware
+from app.events import start_event_source, stop_event_source
+from app.sessions import session_registry
+from app.config import settings
+from app.logging_setup import configure_logging
 import logging
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler('mybills.log')
-    ]
-)
+# Los registros se encolan y un thread de fondo los escribe (consola y archivo con rotación)
+configure_logging()
 
 logger = logging.getLogger(__name__)
 
@@ -22,8 +29,21 @@ def create_app() -> FastAPI:
 
     @asynccontextmanager
     async def lifespan(_):
+        precompile_templates(templates.env)
+        parsing_pool.start()
+        health_monitor.start()
+        start_event_source()
+        if settings.session_mode == "stateless":
+            # Tabla de sesiones cargada antes de atender requests
+            session_registry.refresh()
+        if settings.scheduler_enabled:
+            scheduler.start()
         yield
         logger.info("Cerrando mybills...")
+        await scheduler.stop()
+        await health_monitor.stop()
+        stop_event_source()
+        parsing_pool.shutdown()
         close_database()
         logger.info("Aplicación cerrada correctamente")
     
@@ -41,9 +61,23 @@ def create_app() -> FastAPI:
         allowed_hosts=["*"]
     )
     
-    app.mount("/static", StaticFiles(directory="static"), name="static")
+    # Compresión de HTML y JSON, también en streaming (COMPRESSION_*)
+    if settings.compression_enabled:
+        app.add_middleware(CompressionMiddleware)
+    
+    # Perfilado bajo demanda (X-Profile: 1 + X-Admin-Token, o PROFILE_SAMPLE_RATE)
+    app.add_middleware(ProfilingMiddleware)
+    
+    # Sirve las versiones .br/.gz de static/dist (python -m app.static_assets) sin comprimir al vuelo
+    app.mount("/static", PrecompressedStaticFiles(directory=settings.static_dir), name="static")
     
     create_routes(app)
+    create_api_routes(app)
+    create_admin_routes(app)
+    create_health_routes(app)
+    
+    if settings.scheduler_enabled:
+        register_default_jobs(scheduler)
     
     return app
 
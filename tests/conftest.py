@@ -0,0 +1,49 @@
+"""
+Fixtures comunes: la app conectada a un MongoDB en memoria (mongomock).
+
+La conexión se engancha al importar este módulo, antes de que los tests importen
+main/app.routes, porque app.auth obtiene la base de datos al importarse.
+"""
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+
+from benchmarks.backends import attach_database
+
+TEST_DATABASE = "mybills_tests"
+
+database = attach_database("memory", "", TEST_DATABASE)
+
+@pytest.fixture
+def db():
+    """Base de datos en memoria, vacía para cada test (los índices se conservan)"""
+    for name in database.list_collection_names():
+        database[name].delete_many({})
+    yield database
+
+@pytest.fixture
+def client(db):
+    from fastapi.testclient import TestClient
+    from main import app
+    return TestClient(app)
+
+@pytest.fixture
+def user(db):
+    """Usuario activo en la base de datos"""
+    from app.auth import auth_manager
+    from app.models import User
+
+    doc = {
+        "_id": ObjectId(), "username": "tester", "email": "tester@example.com",
+        "password_hash": auth_manager.hash_password("password123"),
+        "created_at": datetime.utcnow(), "is_active": True
+    }
+    db.users.insert_one(doc)
+    return User(**doc)
+
+@pytest.fixture
+def auth_headers(user):
+    """Header Authorization con un token de sesión del usuario"""
+    from app.auth import auth_manager
+    return {"Authorization": f"Bearer {auth_manager.create_session_token(str(user.id), user)}"}
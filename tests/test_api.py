@@ -0,0 +1,104 @@
+"""Tests de la API JSON de transacciones (app/api.py) contra MongoDB en memoria"""
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+
+from app.api import API_FIELDS, API_PREFIX, selection_query
+from app.models import BulkSelection, TransactionFilter
+
+INTERNAL_FIELDS = {"_id", "user_id", "sync_version", "merchant_key"}
+
+def create_transaction(client, headers, **overrides):
+    payload = {"amount": 4990, "type": "gasto", "category": "supermercado",
+               "description": "Compra en LIDER 123", "origin": "tenpo", **overrides}
+    response = client.post(f"{API_PREFIX}/transactions", json=payload, headers=headers)
+    assert response.status_code == 201, response.text
+    return response.json()
+
+def assert_public(item):
+    assert not INTERNAL_FIELDS & item.keys(), item
+    assert set(item) <= API_FIELDS | {"id"}, item
+
+def test_responses_do_not_expose_internal_fields(client, auth_headers, db):
+    created = create_transaction(client, auth_headers)
+    assert_public(created)
+    # El documento guardado sí tiene los campos internos
+    assert db.transactions.find_one({})["merchant_key"]
+
+    transaction_url = f"{API_PREFIX}/transactions/{created['id']}"
+    assert_public(client.get(transaction_url, headers=auth_headers).json())
+    for item in client.get(f"{API_PREFIX}/transactions", headers=auth_headers).json()["data"]:
+        assert_public(item)
+    for item in client.get(f"{API_PREFIX}/sync", headers=auth_headers).json()["data"]["upserts"]:
+        assert_public(item)
+
+    patched = client.patch(transaction_url, json={"description": "Uber viaje"}, headers=auth_headers)
+    assert patched.status_code == 200, patched.text
+    assert_public(patched.json())
+    assert patched.json()["description"] == "Uber viaje"
+
+USER_ID = "68ae0680e37dadbe6b948619"
+
+@pytest.mark.parametrize("selection", [
+    BulkSelection(),
+    BulkSelection(ids=[]),
+    BulkSelection(filter=TransactionFilter()),
+    BulkSelection(ids=[], filter=TransactionFilter()),
+], ids=["nada", "ids_vacios", "filtro_vacio", "ambos_vacios"])
+def test_empty_selection_is_rejected(selection):
+    with pytest.raises(HTTPException) as error:
+        selection_query(USER_ID, selection)
+    assert error.value.status_code == 422
+
+def test_selection_query_by_ids_and_filter():
+    ids = [str(ObjectId()), str(ObjectId())]
+    query = selection_query(USER_ID, BulkSelection(ids=ids))
+    assert query == {"user_id": ObjectId(USER_ID), "_id": {"$in": [ObjectId(i) for i in ids]}}
+
+    query = selection_query(USER_ID, BulkSelection(filter=TransactionFilter(category="transporte")))
+    assert query == {"user_id": ObjectId(USER_ID), "category": "transporte"}
+
+    with pytest.raises(HTTPException) as error:
+        selection_query(USER_ID, BulkSelection(ids=["no-es-un-id"]))
+    assert error.value.status_code == 400
+
+@pytest.mark.parametrize("action", ["validate", "recategorize", "delete"])
+def test_bulk_endpoints_reject_empty_selection(client, auth_headers, db, action):
+    create_transaction(client, auth_headers)
+    payload = {"filter": {}, "category": "otros"}
+    response = client.post(f"{API_PREFIX}/transactions/bulk/{action}", json=payload, headers=auth_headers)
+    assert response.status_code == 422
+    assert db.transactions.count_documents({}) == 1
+
+def test_bulk_operations_by_selection(client, auth_headers, db):
+    gasto = create_transaction(client, auth_headers, validated=False)
+    ingreso = create_transaction(client, auth_headers, type="ingreso", category="trabajo", validated=False)
+    transporte = create_transaction(client, auth_headers, category="transporte")
+
+    # Solo valida gastos, aunque la selección incluya el ingreso
+    response = client.post(f"{API_PREFIX}/transactions/bulk/validate",
+                           json={"ids": [gasto["id"], ingreso["id"]]}, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    assert db.transactions.find_one({"_id": ObjectId(gasto["id"])})["validated"] is True
+    assert db.transactions.find_one({"_id": ObjectId(ingreso["id"])})["validated"] is False
+
+    response = client.post(f"{API_PREFIX}/transactions/bulk/recategorize",
+                           json={"filter": {"category": "transporte"}, "category": "otros"}, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    assert db.transactions.find_one({"_id": ObjectId(transporte["id"])})["category"] == "otros"
+
+    response = client.post(f"{API_PREFIX}/transactions/bulk/delete",
+                           json={"filter": {"type": "ingreso"}}, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    assert db.transactions.count_documents({}) == 2
+    assert db.transactions.find_one({"_id": ObjectId(ingreso["id"])}) is None
+
+def test_bulk_selection_only_touches_own_transactions(client, auth_headers, db):
+    other = {"_id": ObjectId(), "user_id": ObjectId(), "amount": 10.0, "type": "gasto",
+             "category": "otros", "validated": False}
+    db.transactions.insert_one(other)
+
+    response = client.post(f"{API_PREFIX}/transactions/bulk/delete",
+                           json={"ids": [str(other["_id"])]}, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    assert db.transactions.find_one({"_id": other["_id"]}) is not None
@@ -0,0 +1,72 @@
+"""Tests de app/budgets.py contra MongoDB en memoria"""
+from datetime import datetime
+
+from bson import ObjectId
+
+from app import budgets
+from app.budgets import budget_id, budget_status, initialize_budget, spend_deltas, track_spending
+from app.config import settings
+
+MONTH = "2025-08"
+
+def expense(user_id, amount, category="supermercado", day=10):
+    return {"_id": ObjectId(), "user_id": user_id, "type": "gasto", "category": category,
+            "amount": float(amount), "date": datetime(2025, 8, day)}
+
+def test_spend_deltas_cancel_out():
+    user_id = ObjectId()
+    before = expense(user_id, 1000)
+    after = {**before, "category": "transporte"}
+    deltas = spend_deltas(removed=[before], added=[after])
+    assert deltas == {(str(user_id), MONTH, "supermercado"): -1000.0, (str(user_id), MONTH, "transporte"): 1000.0}
+    assert spend_deltas(removed=[before], added=[before]) == {}
+
+def test_first_expense_initializes_from_existing_transactions(db):
+    user_id = ObjectId()
+    db.users.insert_one({"_id": user_id, "budget_limits": {"supermercado": 2000.0}})
+    db.transactions.insert_one(expense(user_id, 1500))
+    new = expense(user_id, 600)
+    db.transactions.insert_one(new)
+
+    track_spending(db, added=[new])
+
+    doc = db.budgets.find_one({"_id": budget_id(user_id, MONTH)})
+    assert doc["initialized"] is True
+    assert doc["spent"] == {"supermercado": 2100.0}
+    assert doc["limits"] == {"supermercado": 2000.0}
+    assert [alert["threshold"] for alert in doc["alerts"]] == [0.8, 1.0]
+
+def test_initialize_keeps_concurrent_increment(db, monkeypatch):
+    user_id = ObjectId()
+    db.transactions.insert_one(expense(user_id, 1000))
+    original = budgets._month_spending
+    calls = []
+
+    def month_spending_with_concurrent_write(db, user_id, month):
+        spent = original(db, user_id, month)
+        if not calls:
+            # Otro request inserta un gasto y aplica su $inc después de la suma
+            late = expense(user_id, 500)
+            db.transactions.insert_one(late)
+            db.budgets.update_one({"_id": budget_id(user_id, month)},
+                                  {"$inc": {"spent.supermercado": 500.0, "spent_version": 1}})
+        calls.append(spent)
+        return spent
+
+    monkeypatch.setattr(budgets, "_month_spending", month_spending_with_concurrent_write)
+
+    doc = initialize_budget(db, user_id, MONTH)
+
+    assert len(calls) == 2
+    assert doc["spent"] == {"supermercado": 1500.0}
+
+def test_budget_status_levels(monkeypatch):
+    doc = {"limits": {"supermercado": 1000.0, "transporte": 1000.0, "salud": 1000.0},
+           "spent": {"supermercado": 1200.0, "transporte": 850.0}}
+    levels = {row["category"]: row["level"] for row in budget_status(doc)}
+    assert levels == {"supermercado": "danger", "transporte": "warning", "salud": "success"}
+
+    monkeypatch.setattr(settings, "budget_alert_thresholds", [])
+    levels = {row["category"]: row["level"] for row in budget_status(doc)}
+    assert levels == {"supermercado": "danger", "transporte": "success", "salud": "success"}
+    assert budget_status(None) == []
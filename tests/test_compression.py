@@ -0,0 +1,99 @@
+"""Tests de app/compression.py sobre una app Starlette mínima (sin MongoDB)"""
+import gzip
+import zlib
+
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.compression import ENCODERS, CompressionMiddleware, choose_encoding
+
+PAGE = "<html><body>" + "<tr><td>Supermercado</td><td>$8.034</td></tr>" * 200 + "</body></html>"
+CHUNKS = ["<html><body>", "<p>" + "fila " * 400 + "</p>", "</body></html>"]
+
+async def page(request):
+    return HTMLResponse(PAGE)
+
+async def small(request):
+    return JSONResponse({"ok": True})
+
+async def streamed(request):
+    async def generate():
+        for chunk in CHUNKS:
+            yield chunk.encode()
+    return StreamingResponse(generate(), media_type="text/html")
+
+async def encoded(request):
+    return Response(gzip.compress(PAGE.encode()), media_type="text/html", headers={"Content-Encoding": "gzip"})
+
+async def image(request):
+    return Response(b"\x89PNG" + b"\x00" * 4096, media_type="image/png")
+
+@pytest.fixture
+def client():
+    app = Starlette(routes=[
+        Route("/page", page), Route("/small", small), Route("/stream", streamed),
+        Route("/encoded", encoded), Route("/image", image), Route("/static/app.js", page),
+    ])
+    app.add_middleware(CompressionMiddleware, algorithm="gzip", minimum_size=1024, level=5)
+    return TestClient(app)
+
+@pytest.mark.parametrize("header, algorithm, expected", [
+    ("gzip, deflate, br", "auto", "br" if "br" in ENCODERS else "gzip"),
+    ("gzip, br;q=0", "auto", "gzip"),
+    ("gzip;q=0", "gzip", None),
+    ("deflate", "auto", None),
+    ("", "auto", None),
+    ("GZIP", "gzip", "gzip"),
+    ("br", "gzip", None),
+])
+def test_choose_encoding(header, algorithm, expected):
+    assert choose_encoding(header, algorithm) == expected
+
+def test_large_html_is_gzipped(client):
+    response = client.get("/page", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert int(response.headers["content-length"]) < len(PAGE)
+    assert response.text == PAGE
+
+def test_client_without_gzip_gets_identity(client):
+    response = client.get("/page", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert int(response.headers["content-length"]) == len(PAGE)
+
+def test_small_response_is_not_compressed(client):
+    response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.json() == {"ok": True}
+
+def test_streaming_is_compressed_chunk_by_chunk(client):
+    with client.stream("GET", "/stream", headers={"Accept-Encoding": "gzip"}) as response:
+        assert response.headers["content-encoding"] == "gzip"
+        assert "content-length" not in response.headers
+        raw = b"".join(response.iter_raw())
+    # Cada bloque termina en un flush: se puede descomprimir a medida que llega
+    assert zlib.decompress(raw, 31).decode() == "".join(CHUNKS)
+
+@pytest.mark.parametrize("path", ["/encoded", "/image", "/static/app.js"])
+def test_skipped_responses(client, path):
+    response = client.get(path, headers={"Accept-Encoding": "gzip"})
+    if path == "/encoded":
+        # Ya venía comprimida: se entrega tal cual, sin comprimir dos veces
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.text == PAGE
+    else:
+        assert "content-encoding" not in response.headers
+
+@pytest.mark.skipif("br" not in ENCODERS, reason="brotli no está instalado")
+def test_auto_prefers_brotli():
+    import brotli
+
+    app = Starlette(routes=[Route("/page", page)])
+    app.add_middleware(CompressionMiddleware, algorithm="auto", minimum_size=1024, level=5)
+    with TestClient(app).stream("GET", "/page", headers={"Accept-Encoding": "gzip, br"}) as response:
+        assert response.headers["content-encoding"] == "br"
+        raw = b"".join(response.iter_raw())
+    assert brotli.decompress(raw).decode() == PAGE
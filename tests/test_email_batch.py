@@ -0,0 +1,47 @@
+"""Tests de /webhook/email/batch y del parseo de lotes (app/parsing_pool.py)"""
+import asyncio
+import threading
+
+from bson import ObjectId
+
+from benchmarks.parser_corpus import realistic
+from app.parsing_pool import ParsingPool
+
+def batch_payload(emails):
+    return {"emails": [{"subject": subject, "body": body} for subject, body in emails]}
+
+def test_batch_requires_authentication(client, db):
+    response = client.post("/webhook/email/batch", json=batch_payload(realistic(2)))
+    assert response.status_code == 401
+    assert db.transactions.count_documents({}) == 0
+
+def test_batch_creates_transactions_for_authenticated_user(client, db, user, auth_headers):
+    emails = realistic(5)
+    response = client.post("/webhook/email/batch", json=batch_payload(emails), headers=auth_headers)
+    assert response.status_code == 200, response.text
+    assert response.json()["received"] == len(emails)
+    created = response.json()["created"]
+    assert created > 0
+    assert db.transactions.count_documents({"user_id": ObjectId(user.id)}) == created
+
+def test_batch_rejects_oversized_body(client, auth_headers):
+    payload = {"emails": [{"subject": "Comprobante de compra exitosa", "body": "x" * 100_001}]}
+    response = client.post("/webhook/email/batch", json=payload, headers=auth_headers)
+    assert response.status_code == 422
+
+def test_inline_batch_runs_off_the_event_loop(monkeypatch):
+    threads = []
+
+    def fake_parse_chunk(emails):
+        threads.append(threading.get_ident())
+        return [None] * len(emails)
+
+    monkeypatch.setattr("app.parsing_pool.parse_chunk", fake_parse_chunk)
+
+    async def run():
+        result = await ParsingPool(workers=0).parse_batch(realistic(3))
+        return threading.get_ident(), result
+
+    loop_thread, result = asyncio.run(run())
+    assert result == [None, None, None]
+    assert threads and threads[0] != loop_thread
@@ -0,0 +1,162 @@
+"""
+Tests de app/indexes.py.
+
+Los de consistencia (QUERY_SHAPES contra INDEX_SPECS) y los de ensure_indexes corren
+siempre, con mongomock. Los de explain() verifican que cada forma de consulta gana con
+su índice esperado, sin COLLSCAN ni ordenamiento en memoria; necesitan un mongod real
+(el planificador no existe en mongomock): usan MONGODB_TEST_URI o MONGODB_URI, y se
+saltan si no hay servidor disponible.
+"""
+import os
+
+import mongomock
+import pytest
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+from app.indexes import (
+    INDEX_SPECS, OBSOLETE_INDEXES, QUERY_SHAPES, ensure_indexes, explain_shape, _seed_sample
+)
+
+SHAPE_IDS = [shape["name"] for shape in QUERY_SHAPES]
+
+def expected_indexes(shape):
+    return shape["index"] if isinstance(shape["index"], list) else [shape["index"]]
+
+def index_keys(collection, name):
+    """Campos de un índice de INDEX_SPECS, en orden, con su dirección"""
+    if name == "_id_":
+        return [("_id", 1)]
+    keys, _ = INDEX_SPECS[collection][name]
+    return keys
+
+def shape_filter(shape):
+    command = shape["command"]
+    if "aggregate" in command:
+        return next(stage["$match"] for stage in command["pipeline"] if "$match" in stage)
+    return command.get("filter", {})
+
+def filter_branches(query):
+    """Un $or de primer nivel se resuelve por rama: cada una debe poder usar un índice"""
+    rest = {field: value for field, value in query.items() if field != "$or"}
+    for branch in query.get("$or", [{}]):
+        yield {**rest, **branch}
+
+def index_serves(collection, name, query, sort):
+    """El índice contiene los campos del filtro (o su filtro parcial, o es único) y sirve el orden"""
+    keys = index_keys(collection, name)
+    fields = [field for field, _ in keys]
+    options = {} if name == "_id_" else INDEX_SPECS[collection][name][1]
+    partial = options.get("partialFilterExpression", {})
+
+    if any(query.get(field) != value for field, value in partial.items()):
+        return False
+    if name == "_id_" or options.get("unique"):
+        # Un índice único encuentra a lo más un documento: el resto del filtro se aplica sobre él
+        if not set(fields) <= set(query):
+            return False
+    elif not set(query) <= set(fields) | set(partial):
+        return False
+    if sort:
+        directions = dict(keys)
+        sort_fields = list(sort)
+        # El orden debe seguir a los campos con igualdad, en el orden del índice
+        position = [fields.index(field) for field in sort_fields if field in fields]
+        if len(position) != len(sort_fields) or position != sorted(position):
+            return False
+        signs = {sort[field] * directions[field] for field in sort_fields}
+        if len(signs) != 1:
+            return False
+    return True
+
+@pytest.mark.parametrize("shape", QUERY_SHAPES, ids=SHAPE_IDS)
+def test_query_shape_matches_index_specs(shape):
+    collection = shape["collection"]
+    command = shape["command"]
+    assert command.get("find", command.get("aggregate")) == collection
+    for name in expected_indexes(shape):
+        assert name == "_id_" or name in INDEX_SPECS[collection], name
+
+    sort = command.get("sort")
+    for branch in filter_branches(shape_filter(shape)):
+        assert any(index_serves(collection, name, branch, sort) for name in expected_indexes(shape)), branch
+
+    if shape.get("covered"):
+        group = next(stage["$group"] for stage in command["pipeline"] if "$group" in stage)
+        referenced = {value[1:] for value in _find_strings(group) if value.startswith("$")}
+        (name,) = expected_indexes(shape)
+        assert referenced <= {field for field, _ in index_keys(collection, name)}
+
+def _find_strings(document):
+    if isinstance(document, dict):
+        for value in document.values():
+            yield from _find_strings(value)
+    elif isinstance(document, str):
+        yield document
+
+def test_every_transactions_index_serves_a_query_shape():
+    used = {name for shape in QUERY_SHAPES if shape["collection"] == "transactions" for name in expected_indexes(shape)}
+    assert set(INDEX_SPECS["transactions"]) <= used
+
+def test_obsolete_indexes_are_not_recreated():
+    for collection, names in OBSOLETE_INDEXES.items():
+        assert not set(names) & set(INDEX_SPECS.get(collection, {}))
+
+def test_ensure_indexes_creates_specs_and_drops_obsolete():
+    db = mongomock.MongoClient().db
+    db.transactions.create_index([("date", 1)], name="date_1")
+
+    ensure_indexes(db)
+    ensure_indexes(db)  # idempotente
+
+    for collection, specs in INDEX_SPECS.items():
+        assert set(specs) <= set(db[collection].index_information())
+    assert "date_1" not in db.transactions.index_information()
+
+def test_ensure_indexes_keeps_obsolete_when_creation_fails(monkeypatch):
+    db = mongomock.MongoClient().db
+    db.transactions.create_index([("date", 1)], name="date_1")
+
+    def failing_create_index(self, keys, **kwargs):
+        if kwargs.get("name") == "user_merchant_date":
+            raise PyMongoError("fallo al crear el índice")
+        return original_create_index(self, keys, **kwargs)
+
+    original_create_index = mongomock.Collection.create_index
+    monkeypatch.setattr(mongomock.Collection, "create_index", failing_create_index)
+
+    with pytest.raises(PyMongoError):
+        ensure_indexes(db)
+    assert "date_1" in db.transactions.index_information()
+
+MONGODB_URI = os.getenv("MONGODB_TEST_URI", os.getenv("MONGODB_URI", "mongodb://localhost:27017"))
+SCRATCH_DB = "mybills_test_indexes"
+
+def _connect():
+    client = MongoClient(MONGODB_URI, serverSelectionTimeoutMS=1000)
+    try:
+        client.admin.command("ping")
+    except PyMongoError:
+        client.close()
+        return None
+    return client
+
+@pytest.fixture(scope="module")
+def scratch_db():
+    client = _connect()
+    if client is None:
+        pytest.skip(f"No hay mongod disponible en {MONGODB_URI}")
+    client.drop_database(SCRATCH_DB)
+    db = client[SCRATCH_DB]
+    ensure_indexes(db)
+    _seed_sample(db, 5000)
+    yield db
+    client.drop_database(SCRATCH_DB)
+    client.close()
+
+@pytest.mark.parametrize("shape", QUERY_SHAPES, ids=SHAPE_IDS)
+def test_query_shape_uses_expected_index(scratch_db, shape):
+    report = explain_shape(scratch_db, shape)
+
+    assert any(name in report["indexes"] for name in expected_indexes(shape)), report
+    assert report["problems"] == [], report
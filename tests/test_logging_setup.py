@@ -0,0 +1,33 @@
+"""Tests del handler de archivo de app/logging_setup.py"""
+import os
+from logging.handlers import RotatingFileHandler, WatchedFileHandler
+
+from app.logging_setup import create_file_handler, parse_levels
+
+def test_single_worker_rotates_configured_file(tmp_path):
+    handler = create_file_handler(str(tmp_path / "app.log"), rotation="size", workers=1)
+    try:
+        assert isinstance(handler, RotatingFileHandler)
+        assert handler.baseFilename == str(tmp_path / "app.log")
+    finally:
+        handler.close()
+
+def test_several_workers_get_one_file_per_process(tmp_path):
+    handler = create_file_handler(str(tmp_path / "app.log"), rotation="size", workers=4)
+    try:
+        assert isinstance(handler, RotatingFileHandler)
+        assert handler.baseFilename == str(tmp_path / f"app.{os.getpid()}.log")
+    finally:
+        handler.close()
+
+def test_external_rotation_shares_file_and_reopens(tmp_path):
+    path = tmp_path / "app.log"
+    handler = create_file_handler(str(path), rotation="external", workers=4)
+    try:
+        assert isinstance(handler, WatchedFileHandler)
+        assert handler.baseFilename == str(path)
+    finally:
+        handler.close()
+
+def test_parse_levels():
+    assert parse_levels("pymongo=warning, app.routes=DEBUG,basura") == {"pymongo": "WARNING", "app.routes": "DEBUG"}
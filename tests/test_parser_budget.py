@@ -0,0 +1,40 @@
+"""Presupuesto de tiempo de TenpoEmailParser sobre los corpus de benchmarks/parser_corpus.py"""
+from app.parsers import TenpoEmailParser
+from benchmarks import parser_corpus
+from benchmarks.bench_parser import per_email, run_pathological
+
+# Holgado respecto al presupuesto del benchmark (50 ms) para no fallar por ruido de CI;
+# un backtracking catastrófico tarda segundos, no milisegundos
+BUDGET_MS = 250.0
+
+def test_corpora_are_deterministic():
+    assert parser_corpus.realistic(50) == parser_corpus.realistic(50)
+    realistic = parser_corpus.realistic(50)
+    assert parser_corpus.fuzz(realistic, 50) == parser_corpus.fuzz(realistic, 50)
+
+def test_realistic_corpus_parses():
+    emails = parser_corpus.realistic(200)
+    parsed = [TenpoEmailParser.parse(subject, body) for subject, body in emails]
+    assert all(parsed)
+    assert all(item.amount > 0 for item in parsed)
+
+def test_per_email_counts_over_budget():
+    emails = parser_corpus.realistic(20)
+    assert per_email("realistic", emails, budget_ms=0)["over_budget"] == 20
+    report = per_email("realistic", emails, budget_ms=float("inf"))
+    assert report["over_budget"] == 0
+    assert report["emails"] == 20
+    assert 0 <= report["worst_index"] < 20
+
+def test_variants_and_fuzz_within_budget():
+    realistic = parser_corpus.realistic(200)
+    for name, emails in (("variants", parser_corpus.variants(realistic)), ("fuzz", parser_corpus.fuzz(realistic, 500))):
+        report = per_email(name, emails, BUDGET_MS)
+        assert report["over_budget"] == 0, report
+
+def test_pathological_inputs_within_budget():
+    # Cada caso corre en un proceso aparte que se corta a los 10 s
+    results = run_pathological(20000, BUDGET_MS, hard_timeout=10)
+    assert len(results) == len(parser_corpus.pathological(10))
+    slow = [case for case in results if case["over_budget"]]
+    assert not slow, slow
@@ -0,0 +1,50 @@
+"""Tests del muestreador de app/profiling.py (sin MongoDB)"""
+import asyncio
+import threading
+import time
+
+from app.profiling import StackSampler, breakdown, classify_stack
+
+def busy_in_thread(seconds: float):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+def sampled_functions(sampler: StackSampler) -> set:
+    return {name for stack in sampler.stacks for name, _, _ in stack}
+
+def test_sampler_includes_threadpool_work():
+    async def run():
+        sampler = StackSampler(threading.get_ident(), 0.002)
+        sampler.start()
+        try:
+            await asyncio.to_thread(busy_in_thread, 0.2)
+        finally:
+            sampler.stop()
+        return sampler
+
+    sampler = asyncio.run(run())
+    assert "busy_in_thread" in sampled_functions(sampler)
+    # Mientras el thread trabaja, la espera del loop no se cuenta aparte
+    assert breakdown(sampler.stacks, 200)["python"]["percent"] > 50
+
+def test_sampler_skips_idle_workers():
+    async def run():
+        await asyncio.to_thread(lambda: None)  # deja un worker creado y ocioso
+        sampler = StackSampler(threading.get_ident(), 0.002)
+        sampler.start()
+        try:
+            await asyncio.sleep(0.1)
+        finally:
+            sampler.stop()
+        return sampler
+
+    sampler = asyncio.run(run())
+    assert sampler.samples > 0
+    assert breakdown(sampler.stacks, 100)["wait"]["percent"] > 50
+
+def test_classify_stack():
+    assert classify_stack((("run", "/x/main.py", 1), ("select", "/usr/lib/python3/selectors.py", 2))) == "wait"
+    assert classify_stack((("find", "/site-packages/pymongo/cursor.py", 1),)) == "mongo"
+    assert classify_stack((("root", "templates/dashboard.html", 3),)) == "render"
+    assert classify_stack((("handler", "/app/routes.py", 10),)) == "python"
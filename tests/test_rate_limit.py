@@ -0,0 +1,79 @@
+"""Tests del límite de intentos de login (app/rate_limit.py)"""
+import pytest
+
+from app import rate_limit
+from app.rate_limit import LoginRateLimiter, MemoryRateLimitBackend
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = {"t": 1000.0}
+    monkeypatch.setattr(rate_limit.time, "monotonic", lambda: now["t"])
+    return now
+
+def test_memory_backend_sliding_window(clock):
+    backend = MemoryRateLimitBackend()
+    for _ in range(3):
+        assert backend.retry_after(["k"], [3], 60) is None
+        backend.record(["k"], [3], 60)
+        clock["t"] += 10
+    # El intento más antiguo sale de la ventana 60 s después de registrarse
+    assert backend.retry_after(["k"], [3], 60) == pytest.approx(30)
+    clock["t"] += 30
+    assert backend.retry_after(["k"], [3], 60) is None
+
+def test_memory_backend_reset_and_max_keys(clock):
+    backend = MemoryRateLimitBackend(max_keys=2)
+    backend.record(["a"], [1], 60)
+    assert backend.retry_after(["a"], [1], 60)
+    backend.reset("a", 60)
+    assert backend.retry_after(["a"], [1], 60) is None
+
+    for key in ("a", "b", "c"):
+        backend.record([key], [1], 60)
+    # La clave menos reciente se descarta al superar max_keys
+    assert backend.retry_after(["a"], [1], 60) is None
+    assert backend.retry_after(["c"], [1], 60)
+
+def test_limiter_counts_only_failures(clock):
+    limiter = LoginRateLimiter(per_username=3, per_ip=5, window=60, backend=MemoryRateLimitBackend())
+    for i in range(20):
+        assert limiter.check(f"user{i}", "10.0.0.1") is None
+
+    for _ in range(3):
+        assert limiter.check("ana", "10.0.0.1") is None
+        limiter.record_failure("ana", "10.0.0.1")
+    assert limiter.check("ana", "10.0.0.1") == 60
+    assert limiter.rejected == 1
+
+    limiter.reset("ana")
+    assert limiter.check("ana", "10.0.0.1") is None
+
+def test_limiter_per_ip_budget(clock):
+    limiter = LoginRateLimiter(per_username=10, per_ip=2, window=60, backend=MemoryRateLimitBackend())
+    limiter.record_failure("ana", None)
+    limiter.record_failure("beto", None)
+    assert limiter.check("carla", None) == 60
+    assert limiter.check("carla", "10.0.0.2") is None
+
+def test_successful_logins_do_not_exhaust_ip_budget(client, user, monkeypatch):
+    limiter = LoginRateLimiter(per_username=2, per_ip=2, window=60, backend=MemoryRateLimitBackend())
+    monkeypatch.setattr("app.api.login_rate_limiter", limiter)
+    credentials = {"username": user.username, "password": "password123"}
+    for _ in range(5):
+        assert client.post("/api/v1/session", json=credentials).status_code == 200
+
+    wrong = {"username": user.username, "password": "incorrecta"}
+    assert client.post("/api/v1/session", json=wrong).status_code == 401
+    assert client.post("/api/v1/session", json=wrong).status_code == 401
+    response = client.post("/api/v1/session", json=wrong)
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "60"
+
+def test_mongo_backend_counts_and_resets(db):
+    backend = rate_limit.MongoRateLimitBackend()
+    for _ in range(2):
+        assert backend.retry_after(["k"], [2], 3600) is None
+        backend.record(["k"], [2], 3600)
+    assert backend.retry_after(["k"], [2], 3600) > 0
+    backend.reset("k", 3600)
+    assert backend.retry_after(["k"], [2], 3600) is None
@@ -0,0 +1,47 @@
+"""Tests de app/recurring.py contra MongoDB en memoria"""
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from app.recurring import MERCHANT_KEY_MIGRATION, backfill_merchant_keys, detect_recurring, normalize_merchant
+
+def legacy_transaction(user_id, description, date, type="gasto", amount=7990.0):
+    """Documento escrito antes de que existiera merchant_key"""
+    return {"_id": ObjectId(), "user_id": user_id, "amount": amount, "type": type,
+            "category": "entretenimiento", "description": description, "date": date}
+
+def test_normalize_merchant():
+    assert normalize_merchant("NETFLIX.COM") == "netflix"
+    assert normalize_merchant("Uber *Trip 4821") == "uber trip"
+    assert normalize_merchant("Compra 1234") is None
+    assert normalize_merchant(None) is None
+
+def test_backfill_runs_once(db):
+    user_id = ObjectId()
+    db.transactions.insert_many([
+        legacy_transaction(user_id, "NETFLIX.COM", datetime(2025, 1, 5)),
+        legacy_transaction(user_id, "Sueldo ACME SPA", datetime(2025, 1, 1), type="ingreso"),
+    ])
+
+    assert backfill_merchant_keys(db) == 2
+    assert db.transactions.count_documents({"merchant_key": {"$exists": False}}) == 0
+    assert db.migrations.find_one({"_id": MERCHANT_KEY_MIGRATION})["updated"] == 2
+
+    # Con la migración registrada no vuelve a recorrer la colección
+    db.transactions.insert_one(legacy_transaction(user_id, "Spotify", datetime(2025, 2, 5)))
+    assert backfill_merchant_keys(db) == 0
+    assert db.transactions.count_documents({"merchant_key": {"$exists": False}}) == 1
+
+def test_detect_monthly_subscription(db):
+    user_id = ObjectId()
+    start = datetime.now() - timedelta(days=150)
+    db.transactions.insert_many([
+        legacy_transaction(user_id, f"NETFLIX.COM {i}", start + timedelta(days=30 * i)) for i in range(6)
+    ])
+
+    stats = detect_recurring(db)
+
+    assert stats["recurring"] == 1
+    recurring = db.recurring.find_one({"user_id": user_id})
+    assert recurring["merchant_key"] == "netflix"
+    assert recurring["period"] == "mensual"
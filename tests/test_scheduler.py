@@ -0,0 +1,88 @@
+"""Tests de app/scheduler.py: triggers, slots en MongoDB (mongomock) y ejecución de tareas"""
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from app.scheduler import CronTrigger, IntervalTrigger, MongoSlotLock, Scheduler
+
+@pytest.mark.parametrize("expression, after, expected", [
+    ("0 4 * * *", datetime(2025, 8, 31, 3, 59, 30), datetime(2025, 8, 31, 4, 0)),
+    ("0 4 * * *", datetime(2025, 8, 31, 4, 0), datetime(2025, 9, 1, 4, 0)),
+    ("*/15 * * * *", datetime(2025, 8, 31, 10, 7), datetime(2025, 8, 31, 10, 15)),
+    ("*/15 * * * *", datetime(2025, 8, 31, 23, 50), datetime(2025, 9, 1, 0, 0)),
+    ("30 3 * * 0", datetime(2025, 8, 27, 12, 0), datetime(2025, 8, 31, 3, 30)),  # domingo
+    ("15 4 * * 0", datetime(2025, 8, 31, 4, 15), datetime(2025, 9, 7, 4, 15)),
+    ("0 9-17/4 * * 1-5", datetime(2025, 8, 29, 17, 0), datetime(2025, 9, 1, 9, 0)),  # viernes -> lunes
+    ("0 0 1 1 *", datetime(2025, 12, 31, 23, 59), datetime(2026, 1, 1, 0, 0)),
+    ("0 0 29 2 *", datetime(2025, 3, 1), datetime(2028, 2, 29, 0, 0)),
+    ("5,35 * * * *", datetime(2025, 8, 31, 10, 5), datetime(2025, 8, 31, 10, 35)),
+])
+def test_cron_next_run(expression, after, expected):
+    assert CronTrigger(expression).next_run(after) == expected
+
+def test_cron_day_of_month_or_weekday():
+    # Con ambos campos restringidos basta con que calce uno (como en cron): día 13 o viernes
+    trigger = CronTrigger("0 0 13 * 5")
+    assert trigger.next_run(datetime(2025, 8, 10)) == datetime(2025, 8, 13)
+    assert trigger.next_run(datetime(2025, 8, 13)) == datetime(2025, 8, 15)
+
+@pytest.mark.parametrize("expression", ["", "* * * *", "60 * * * *", "* 24 * * *", "*/0 * * * *", "0 0 0 * *", "* * * * 7"])
+def test_cron_rejects_invalid_expressions(expression):
+    with pytest.raises(ValueError):
+        CronTrigger(expression)
+
+def test_cron_without_future_runs():
+    with pytest.raises(ValueError):
+        CronTrigger("0 0 31 2 *").next_run(datetime(2025, 1, 1))
+
+def test_interval_aligned_to_midnight():
+    trigger = IntervalTrigger(900)
+    assert trigger.next_run(datetime(2025, 8, 31, 10, 7)) == datetime(2025, 8, 31, 10, 15)
+    assert trigger.next_run(datetime(2025, 8, 31, 10, 15)) == datetime(2025, 8, 31, 10, 30)
+    assert trigger.next_run(datetime(2025, 8, 31, 23, 59)) == datetime(2025, 9, 1, 0, 0)
+    assert IntervalTrigger(0).seconds == 1
+
+def test_slot_is_claimed_once(db):
+    lock = MongoSlotLock()
+    slot = datetime(2025, 8, 31, 4, 0)
+    assert lock.acquire("job", slot, "worker-a")
+    assert not lock.acquire("job", slot, "worker-b")
+    assert lock.acquire("job", datetime(2025, 9, 1, 4, 0), "worker-b")
+
+    lock.release("job", "worker-b", {"status": "ok"})
+    (state,) = lock.states()
+    assert state["owner"] == "worker-b"
+    assert state["status"] == "ok"
+
+def test_exclusive_job_runs_once_per_slot(db):
+    calls = []
+    workers = [Scheduler(lock=MongoSlotLock()) for _ in range(2)]
+    for index, worker in enumerate(workers):
+        worker.owner = f"worker-{index}"
+        worker.add_job("tarea", lambda: calls.append(1) or len(calls), IntervalTrigger(60))
+
+    async def run():
+        slot = datetime(2025, 8, 31, 4, 0)
+        await asyncio.gather(*(worker._run_job(worker.jobs["tarea"], slot) for worker in workers))
+
+    asyncio.run(run())
+    assert calls == [1]
+    assert sum(worker.jobs["tarea"].skipped for worker in workers) == 1
+
+def test_run_now_records_failures():
+    scheduler = Scheduler(lock=MongoSlotLock())
+
+    async def failing():
+        raise RuntimeError("falló")
+
+    scheduler.add_job("falla", failing, IntervalTrigger(60))
+    with pytest.raises(ValueError):
+        scheduler.add_job("falla", failing, IntervalTrigger(60))
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(scheduler.run_now("falla"))
+    metrics = scheduler.jobs["falla"].metrics()
+    assert metrics["runs"] == 1
+    assert metrics["failures"] == 1
+    assert metrics["last_error"] == "falló"